@@ -1,8 +1,23 @@
 from django.contrib import admin
 # Ensure all models are imported. AttendanceSession is no longer imported as it's removed from models.py.
-from .models import Department, Semester, Student, Course, Enrollment, DepartmentPassword
+from .models import Department, Semester, Student, Course, Enrollment, DepartmentPassword, GradeBand, Job
+import os
 from django import forms
+from django.conf import settings
 from django.contrib import messages
+from django.core.exceptions import PermissionDenied
+from django.db.models import F, FloatField, Value
+from django.http import FileResponse, Http404
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
+from django.utils import timezone
+from django.utils.html import format_html
+from .credentials import hash_credential, is_hashed
+from .enrollments import bulk_enroll
+from .grading import letter_grade_expression, total_score_expression
+from .imports import ScoreImportError, import_scores
+from .jobs import enqueue
+from .snapshots import unfreeze_semester
 # You might need this if you use MaxValueValidator in admin.py itself, but usually only needed in models.py
 # from django.core.validators import MaxValueValidator
 
@@ -13,9 +28,17 @@ class EnrollInSemesterForm(forms.Form):
     action = forms.CharField(widget=forms.HiddenInput(), initial='enroll_in_semester')
     select_across = forms.CharField(widget=forms.HiddenInput(), initial='1')
 
+class ScoreImportForm(forms.Form):
+    file = forms.FileField(help_text="CSV or XLSX with columns student_id, course_code, ca_score, exam_score and optionally classes_attended.")
+    dry_run = forms.BooleanField(required=False, initial=True, help_text="Validate the file and count changes without saving them.")
+
 # --- Admin Actions ---
+def queued_message(request, job, description):
+    url = reverse('admin:performance_monitoring_job_change', args=[job.pk])
+    messages.info(request, format_html('{} was queued as <a href="{}">job #{}</a>; run_worker will pick it up.', description, url, job.pk))
+
 def enroll_in_semester(modeladmin, request, queryset):
-    from .models import Course, Enrollment, Semester # Import models inside function to avoid circular imports
+    from .models import Semester # Import models inside function to avoid circular imports
     academic_year = request.POST.get('academic_year')
     semester_name = request.POST.get('semester_name')
 
@@ -28,50 +51,134 @@ def enroll_in_semester(modeladmin, request, queryset):
     except Semester.DoesNotExist:
         messages.error(request, f'Semester "{semester_name} {academic_year}" does not exist.')
         return
+    if semester.results_frozen_at:
+        messages.error(request, f'The results of {semester} are frozen; unfreeze the semester to enroll students.')
+        return
+
+    # Large selections go to the job queue instead of holding the request open
+    student_ids = list(queryset.order_by('pk').values_list('pk', flat=True))
+    if len(student_ids) > settings.BACKGROUND_JOB_THRESHOLD:
+        job = enqueue('enroll_in_semester', {'student_ids': student_ids, 'semester_id': semester.pk}, user=request.user)
+        queued_message(request, job, f'Enrolling {len(student_ids)} students in {semester}')
+        return
+
+    # Set-based: existing enrollments are skipped, the rest are bulk inserted
+    created_count, skipped_count = bulk_enroll(queryset, semester)
 
-    enrolled_count = 0
-    for student in queryset:
-        # Filter courses by both department and semester to ensure correct courses are enrolled
-        courses = Course.objects.filter(department=student.department, semester=semester)
-        for course in courses:
-            # get_or_create prevents duplicate enrollments
-            enrollment, created = Enrollment.objects.get_or_create(student=student, course=course, semester=semester)
-            if created:
-                enrolled_count += 1
-
-    if enrolled_count:
-        messages.success(request, f'{enrolled_count} new enrollments were successfully created for {semester}.')
+    if created_count:
+        messages.success(request, f'{created_count} new enrollments were successfully created for {semester} ({skipped_count} already existed).')
     else:
-        messages.info(request, 'No new enrollments were created (students might already be enrolled in these courses).')
+        messages.info(request, f'No new enrollments were created ({skipped_count} enrollments already existed).')
 
 enroll_in_semester.short_description = "Enroll selected students in a specific semester's courses"
 
-# --- Admin Model Configurations ---
+def recompute_department_cgpas(modeladmin, request, queryset):
+    department_ids = list(queryset.values_list('pk', flat=True))
+    job = enqueue('rebuild_summaries', {'department_ids': department_ids}, user=request.user)
+    queued_message(request, job, f'Recomputing CGPAs for {len(department_ids)} department(s)')
+
+recompute_department_cgpas.short_description = "Recompute CGPAs for selected departments (background)"
+
+def export_department_results(modeladmin, request, queryset):
+    for department in queryset:
+        job = enqueue('export_results', {'department_id': department.pk}, user=request.user)
+        queued_message(request, job, f'The {department} result sheet')
+
+export_department_results.short_description = "Export results for selected departments (background)"
+
+def retry_jobs(modeladmin, request, queryset):
+    retried = queryset.filter(status=Job.FAILED).update(
+        status=Job.QUEUED, attempts=0, run_after=timezone.now(), finished_at=None, message='Retry requested.',
+    )
+    messages.success(request, f'{retried} failed job(s) queued again.')
+
+retry_jobs.short_description = "Retry selected failed jobs"
+
+def freeze_semester_results(modeladmin, request, queryset):
+    for semester in queryset:
+        job = enqueue('freeze_semester', {'semester_id': semester.pk}, user=request.user)
+        queued_message(request, job, f'Freezing the {semester} results')
+
+freeze_semester_results.short_description = "Freeze (publish) results of selected semesters (background)"
+
+def unfreeze_semester_results(modeladmin, request, queryset):
+    # Cheap: deletes the snapshots, after which transcripts compute the semesters live again
+    semesters = list(queryset.filter(results_frozen_at__isnull=False))
+    for semester in semesters:
+        unfreeze_semester(semester)
+    messages.success(request, f'{len(semesters)} semester(s) unfrozen.')
+
+unfreeze_semester_results.short_description = "Unfreeze results of selected semesters"
 
 @admin.register(Department)
 class DepartmentAdmin(admin.ModelAdmin):
     list_display = ('id', 'name')
     search_fields = ('name',) # Added search field for Department
+    actions = [recompute_department_cgpas, export_department_results]
 
 @admin.register(Semester)
 class SemesterAdmin(admin.ModelAdmin):
-    list_display = ('name', 'academic_year', 'start_date', 'end_date')
+    list_display = ('name', 'academic_year', 'start_date', 'end_date', 'results_frozen_at')
     search_fields = ('name', 'academic_year')
     list_filter = ('academic_year',) # Added list filter for academic year
+    readonly_fields = ('results_frozen_at',)
+    actions = [freeze_semester_results, unfreeze_semester_results]
+
+# --- Admin List Filters ---
+class CourseListFilter(admin.SimpleListFilter):
+    # Listing every course code doesn't scale; offer only the courses of the
+    # department / academic year already being filtered on
+    title = 'course'
+    parameter_name = 'course'
+    scope_parameters = {
+        'student__department__id__exact': 'department_id',
+        'semester__academic_year': 'semester__academic_year',
+        'semester__name': 'semester__name',
+    }
+
+    def lookups(self, request, model_admin):
+        scope = {field: request.GET[param] for param, field in self.scope_parameters.items() if request.GET.get(param)}
+        if not scope:
+            return []
+        return Course.objects.filter(**scope).order_by('course_code').values_list('pk', 'course_code')
+
+    def has_output(self):
+        # Also shown when a course is selected but the scope was cleared, so it can be undone
+        return bool(self.lookup_choices) or self.value() is not None
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(course_id=self.value())
+        return queryset
+
+# --- Admin Model Configurations ---
 
 @admin.register(Student)
 class StudentAdmin(admin.ModelAdmin):
-    list_display = ('student_id', 'name', 'email', 'department')
+    list_display = ('student_id', 'name', 'email', 'department', 'cgpa')
+    list_select_related = ('department', 'summary')
     search_fields = ('student_id', 'name', 'email', 'department__name') # Added department search
     list_filter = ('department',) # Added department filter
     actions = [enroll_in_semester]
     action_form = EnrollInSemesterForm
-    # custom_password might be sensitive, consider making it readonly or not visible by default
+    # custom_password holds a hash; typing a new plaintext value replaces it (see save_model)
     fields = ('student_id', 'name', 'email', 'phone_number', 'department', 'custom_password')
 
+    def save_model(self, request, obj, form, change):
+        if obj.custom_password and not is_hashed(obj.custom_password):
+            obj.custom_password = hash_credential(obj.custom_password)
+        super().save_model(request, obj, form, change)
+
+    @admin.display(description='CGPA', ordering='summary__cgpa')
+    def cgpa(self, student):
+        # From the precomputed summary row joined in by list_select_related
+        summary = getattr(student, 'summary', None)
+        return f'{summary.cgpa:.2f}' if summary else '-'
+
 @admin.register(Course)
 class CourseAdmin(admin.ModelAdmin):
     list_display = ('course_code', 'course_title', 'credit_unit', 'department', 'semester')
+    list_select_related = ('department', 'semester')
     search_fields = ('course_code', 'course_title', 'department__name', 'semester__name', 'semester__academic_year')
     list_filter = ('department', 'semester__academic_year', 'semester__name')
 
@@ -84,25 +191,172 @@ class CourseAdmin(admin.ModelAdmin):
 
 @admin.register(Enrollment)
 class EnrollmentAdmin(admin.ModelAdmin):
-    # list_display fields are now completely in sync with the Enrollment model's fields/properties
+    # Related columns come from list_select_related and the computed ones are
+    # annotated in get_queryset, so a page costs the same few queries at any size
     list_display = (
-        'id', 'student', 'course', 'semester', 'enrollment_date',
-        'classes_attended', 'attendance_percentage', # classes_attended is a field, attendance_percentage is a property
-        'ca_score', 'exam_score', 'total_score', 'grade' # ca_score, exam_score are fields, total_score, grade are properties
+        'id', 'student', 'course_code', 'semester', 'enrollment_date',
+        'classes_attended', 'attendance_column',
+        'ca_score', 'exam_score', 'total_column', 'grade_column',
     )
-    search_fields = ('student__name', 'course__course_code', 'semester__name', 'semester__academic_year')
+    list_select_related = ('student', 'course', 'semester')
+    search_fields = ('student__student_id', 'student__name', 'course__course_code', 'semester__name', 'semester__academic_year')
     list_filter = (
-        'semester__academic_year', 'semester__name', 'course__course_code',
-        'student__department' # Filter by student's department
+        'semester__academic_year', 'semester__name',
+        'student__department', # Filter by student's department
+        CourseListFilter,
     )
+    # Facet counts cost a COUNT per filter, so they stay opt-in ("Show counts"),
+    # and a filtered page skips the second, unfiltered COUNT over the table
+    show_facets = admin.ShowFacets.ALLOW
+    show_full_result_count = False
     # fields directly map to the Enrollment model's editable fields
     fields = ('student', 'course', 'semester', 'classes_attended', 'ca_score', 'exam_score')
+    autocomplete_fields = ('student', 'course')
     # readonly_fields correctly include auto_now_add and properties
     readonly_fields = ('enrollment_date', 'attendance_percentage', 'total_score', 'grade')
     # inlines is REMOVED as AttendanceSessionInline no longer exists
     # inlines = [AttendanceSessionInline]
+    change_list_template = 'admin/performance_monitoring/enrollment/change_list.html'
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            _total=total_score_expression(),
+            _grade=letter_grade_expression(),
+            _attendance=F('classes_attended') * Value(10.0, output_field=FloatField()),
+        )
+
+    # Enrollments of frozen semesters can be viewed but not changed (Enrollment.check_semester_open)
+    def has_change_permission(self, request, obj=None):
+        if obj is not None and obj.semester.results_frozen_at:
+            return False
+        return super().has_change_permission(request, obj)
+
+    def has_delete_permission(self, request, obj=None):
+        if obj is not None and obj.semester.results_frozen_at:
+            return False
+        return super().has_delete_permission(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        frozen = queryset.filter(semester__results_frozen_at__isnull=False).count()
+        if frozen:
+            messages.warning(request, f'{frozen} enrollment(s) in frozen semesters were kept.')
+        super().delete_queryset(request, queryset.filter(semester__results_frozen_at__isnull=True))
+
+    @admin.display(description='Course', ordering='course__course_code')
+    def course_code(self, enrollment):
+        # Course.__str__ would pull in the course's semester as well
+        return enrollment.course.course_code
+
+    @admin.display(description='Attendance %', ordering='_attendance')
+    def attendance_column(self, enrollment):
+        return enrollment._attendance
+
+    @admin.display(description='Total score', ordering='_total')
+    def total_column(self, enrollment):
+        return enrollment._total
+
+    @admin.display(description='Grade', ordering='_grade')
+    def grade_column(self, enrollment):
+        return enrollment._grade
+
+    def get_urls(self):
+        custom_urls = [
+            path('import-scores/', self.admin_site.admin_view(self.import_scores_view), name='performance_monitoring_enrollment_import_scores'),
+        ]
+        return custom_urls + super().get_urls()
+
+    def import_scores_view(self, request):
+        if not self.has_change_permission(request):
+            raise PermissionDenied
+
+        result = None
+        if request.method == 'POST':
+            form = ScoreImportForm(request.POST, request.FILES)
+            if form.is_valid():
+                upload = form.cleaned_data['file']
+                try:
+                    result = import_scores(upload, upload.name, dry_run=form.cleaned_data['dry_run'])
+                except ScoreImportError as error:
+                    form.add_error('file', str(error))
+                else:
+                    prefix = "Dry run: " if result.dry_run else ""
+                    messages.success(request, f'{prefix}{result.rows} rows read, {result.updated} updated, {result.unchanged} unchanged, {result.error_count} with errors.')
+        else:
+            form = ScoreImportForm()
+
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': 'Import scores',
+            'form': form,
+            'result': result,
+        }
+        return TemplateResponse(request, 'admin/performance_monitoring/enrollment/import_scores.html', context)
 
 @admin.register(DepartmentPassword)
 class DepartmentPasswordAdmin(admin.ModelAdmin):
     list_display = ('department',) # Only display the department name
-    fields = ('department', 'password')
\ No newline at end of file
+    fields = ('department', 'password')
+
+    def save_model(self, request, obj, form, change):
+        # Stored hashed; an existing hash is left as it is
+        if obj.password and not is_hashed(obj.password):
+            obj.password = hash_credential(obj.password)
+        super().save_model(request, obj, form, change)
+
+@admin.register(GradeBand)
+class GradeBandAdmin(admin.ModelAdmin):
+    # Saving a band regrades affected students (see signals.regrade_on_scale_change)
+    list_display = ('academic_year', 'letter', 'min_score', 'max_score', 'grade_point')
+    list_filter = ('academic_year',)
+    ordering = ('academic_year', '-min_score')
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    # Jobs are created by actions and run by `manage.py run_worker`; the admin only watches them
+    list_display = ('id', 'task', 'status', 'progress', 'attempts', 'message', 'created_by', 'created_at', 'finished_at')
+    list_filter = ('status', 'task')
+    list_select_related = ('created_by',)
+    actions = [retry_jobs]
+    readonly_fields = (
+        'task', 'params', 'status', 'progress', 'attempts', 'max_attempts', 'run_after', 'message', 'result', 'output_file',
+        'error', 'worker', 'heartbeat_at', 'created_by', 'created_at', 'started_at', 'finished_at',
+    )
+    exclude = ('progress_done', 'progress_total')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    @admin.display(description='Progress')
+    def progress(self, job):
+        if job.progress_total is None:
+            return '-'
+        return f'{job.progress_done}/{job.progress_total} ({job.progress_percent}%)'
+
+    @admin.display(description='Output file')
+    def output_file(self, job):
+        if job.status != Job.SUCCEEDED or not (job.result or {}).get('file'):
+            return '-'
+        url = reverse('admin:performance_monitoring_job_download', args=[job.pk])
+        return format_html('<a href="{}">{}</a>', url, job.result['file'])
+
+    def get_urls(self):
+        custom_urls = [
+            path('<int:job_id>/download/', self.admin_site.admin_view(self.download_view), name='performance_monitoring_job_download'),
+        ]
+        return custom_urls + super().get_urls()
+
+    def download_view(self, request, job_id):
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        job = Job.objects.filter(pk=job_id, status=Job.SUCCEEDED).first()
+        # The stored name is only ever a bare file name written by the export task
+        filename = os.path.basename((job.result or {}).get('file', '')) if job else ''
+        path_on_disk = os.path.join(settings.JOB_FILES_DIR, filename)
+        if not filename or not os.path.exists(path_on_disk):
+            raise Http404("This job has no output file.")
+        return FileResponse(open(path_on_disk, 'rb'), as_attachment=True, filename=filename)
@@ -0,0 +1,35 @@
+# performance_monitoring/aggregates.py
+# Database-side versions of the per-enrollment calculations. The CGPA and
+# attendance sums feed the precomputed summaries (summaries.py); nothing
+# here materializes Student/Enrollment instances just to compute averages.
+from django.db.models import Count, F, Q, Sum
+
+# Grade points come from the grading scale (per academic year where overridden)
+from .grading import grade_point_expression
+from .models import Course
+
+
+def summary_totals(prefix='enrollment__'):
+    """
+    The raw sums needed for CGPA and attendance, keyed by annotation name.
+    Only courses with a positive credit unit count towards CGPA, matching
+    the Python loop in the views. Use prefix='' on Enrollment querysets.
+    """
+    credit_unit = F(f'{prefix}course__credit_unit')
+    counts_for_cgpa = Q(**{f'{prefix}course__credit_unit__gt': 0})
+    return {
+        'total_credit_units': Sum(credit_unit, filter=counts_for_cgpa, default=0),
+        'weighted_grade_points': Sum(grade_point_expression(prefix) * credit_unit, filter=counts_for_cgpa, default=0),
+        'classes_attended_sum': Sum(f'{prefix}classes_attended', default=0),
+        'num_enrollments': Count(f'{prefix}id'),
+    }
+
+
+def department_course_rows(department):
+    # One query for every course in the department with its distinct student count
+    return (
+        Course.objects.filter(department=department)
+        .select_related('semester')
+        .annotate(enrolled_students_count=Count('enrollment__student', distinct=True))
+        .order_by('course_code')
+    )
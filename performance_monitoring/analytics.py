@@ -0,0 +1,187 @@
+# performance_monitoring/analytics.py
+# Cohort statistics for a department (optionally one semester) computed with
+# NumPy. The enrollment columns are read in a single values_list query and
+# every statistic is a vectorised reduction over those arrays, so the cost is
+# one query plus a few passes over flat integer arrays whatever the cohort size.
+import itertools
+from dataclasses import dataclass
+
+import numpy as np
+
+from .grading import FAIL_LETTER, FAIL_POINT, MAX_TOTAL, MIN_TOTAL, get_grading_scales
+from .models import Course, Enrollment
+
+# Column order of the arrays built by load_cohort()
+COHORT_COLUMNS = (
+    'student_id', 'course_id', 'ca_score', 'exam_score', 'classes_attended',
+    'course__credit_unit', 'semester__academic_year',
+)
+# GradeBand letters plus the fail letter
+GRADE_LETTERS = ('A', 'B', 'C', 'D', 'E', FAIL_LETTER)
+CGPA_PERCENTILES = (10, 25, 50, 75, 90)
+CGPA_BIN_EDGES = np.linspace(0, 5, 11)
+SCORE_BIN_EDGES = np.arange(0, 101, 10)
+
+_FAIL_INDEX = GRADE_LETTERS.index(FAIL_LETTER)
+
+
+@dataclass(frozen=True, slots=True)
+class Cohort:
+    student_ids: np.ndarray
+    course_ids: np.ndarray
+    totals: np.ndarray
+    attended: np.ndarray
+    credit_units: np.ndarray
+    academic_years: np.ndarray
+
+    def __len__(self):
+        return len(self.totals)
+
+
+@dataclass(frozen=True, slots=True)
+class CourseStats:
+    course_id: int
+    course_code: str
+    course_title: str
+    enrolled: int
+    passed: int
+    pass_rate: float
+    mean_score: float
+
+
+@dataclass(frozen=True, slots=True)
+class CohortAnalytics:
+    enrollments: int
+    students: int
+    grade_distribution: dict
+    courses: tuple
+    cgpa_percentiles: dict
+    cgpa_histogram: tuple
+    score_histogram: tuple
+    mean_cgpa: float
+    attendance_score_correlation: float | None
+
+
+def load_cohort(department, semester=None):
+    """
+    Reads the department's enrollment columns (one query) into int64 arrays.
+    """
+    enrollments = Enrollment.objects.filter(student__department=department)
+    if semester is not None:
+        enrollments = enrollments.filter(semester=semester)
+    rows = enrollments.order_by().values_list(*COHORT_COLUMNS).iterator(chunk_size=5000)
+    flat = np.fromiter(itertools.chain.from_iterable(rows), dtype=np.int64)
+    columns = flat.reshape(-1, len(COHORT_COLUMNS)).T
+    student_ids, course_ids, ca, exam, attended, credit_units, academic_years = columns
+    return Cohort(
+        student_ids=student_ids, course_ids=course_ids, totals=ca + exam,
+        attended=attended, credit_units=credit_units, academic_years=academic_years,
+    )
+
+
+def _scale_lookup(totals, academic_years, table, fail_value):
+    """
+    Maps totals through the 0-100 table of the scale in force for each
+    row's academic year. Tables come from the compiled GradingScale, so the
+    results are exactly the scalar lookups.
+    """
+    scales = get_grading_scales()
+    clipped = np.clip(totals, MIN_TOTAL, MAX_TOTAL)
+    result = table(scales.default)[clipped]
+    if academic_years is not None:
+        for academic_year, scale in scales.by_year.items():
+            rows = academic_years == academic_year
+            result[rows] = table(scale)[clipped[rows]]
+    in_range = (totals >= MIN_TOTAL) & (totals <= MAX_TOTAL)
+    return np.where(in_range, result, fail_value)
+
+
+def grade_points(totals, academic_years=None):
+    # Vectorised GradingScale.point()
+    return _scale_lookup(totals, academic_years, lambda scale: np.array(scale.points, dtype=np.int64), FAIL_POINT)
+
+
+def grade_indexes(totals, academic_years=None):
+    # Index into GRADE_LETTERS per total; vectorised Enrollment.grade
+    def table(scale):
+        return np.array([GRADE_LETTERS.index(letter) for letter in scale.letters], dtype=np.int64)
+    return _scale_lookup(totals, academic_years, table, _FAIL_INDEX)
+
+
+def letter_grades(totals, academic_years=None):
+    return np.array(GRADE_LETTERS)[grade_indexes(totals, academic_years)]
+
+
+def student_cgpas(cohort):
+    """
+    Returns (student_ids, cgpas) for students with at least one credited
+    course. Only courses with a positive credit unit count, as in the
+    summaries and transcripts.
+    """
+    student_ids, position = np.unique(cohort.student_ids, return_inverse=True)
+    credited = np.where(cohort.credit_units > 0, cohort.credit_units, 0)
+    weighted = np.bincount(position, weights=grade_points(cohort.totals, cohort.academic_years) * credited, minlength=len(student_ids))
+    credits = np.bincount(position, weights=credited, minlength=len(student_ids))
+    has_credits = credits > 0
+    return student_ids[has_credits], weighted[has_credits] / credits[has_credits]
+
+
+def course_stats(cohort):
+    course_ids, position = np.unique(cohort.course_ids, return_inverse=True)
+    enrolled = np.bincount(position, minlength=len(course_ids))
+    passed = np.bincount(position, weights=grade_indexes(cohort.totals, cohort.academic_years) != _FAIL_INDEX, minlength=len(course_ids))
+    score_sums = np.bincount(position, weights=cohort.totals, minlength=len(course_ids))
+
+    titles = {
+        pk: (code, title)
+        for pk, code, title in Course.objects.filter(pk__in=course_ids.tolist()).values_list('pk', 'course_code', 'course_title')
+    }
+    stats = [
+        CourseStats(
+            course_id=course_id, course_code=titles[course_id][0], course_title=titles[course_id][1],
+            enrolled=int(count), passed=int(passes), pass_rate=float(passes / count * 100),
+            mean_score=float(total / count),
+        )
+        for course_id, count, passes, total in zip(course_ids.tolist(), enrolled, passed, score_sums)
+    ]
+    return tuple(sorted(stats, key=lambda course: course.course_code))
+
+
+def histogram(values, edges):
+    counts, _ = np.histogram(values, bins=edges)
+    return tuple(
+        (f"{low:g}-{high:g}", int(count))
+        for low, high, count in zip(edges[:-1], edges[1:], counts)
+    )
+
+
+def correlation(x, y):
+    # Pearson r, or None when either side has no variance
+    if len(x) < 2 or x.std() == 0 or y.std() == 0:
+        return None
+    return float(np.corrcoef(x, y)[0, 1])
+
+
+def cohort_analytics(department, semester=None):
+    """
+    Grade distribution, per-course pass rates, CGPA percentiles and
+    histograms and the attendance/score correlation for the department's
+    enrollments (restricted to one semester if given).
+    """
+    cohort = load_cohort(department, semester)
+    grade_counts = np.bincount(grade_indexes(cohort.totals, cohort.academic_years), minlength=len(GRADE_LETTERS))
+    _, cgpas = student_cgpas(cohort)
+
+    return CohortAnalytics(
+        enrollments=len(cohort),
+        students=len(np.unique(cohort.student_ids)),
+        grade_distribution=dict(zip(GRADE_LETTERS, grade_counts.tolist())),
+        courses=course_stats(cohort) if len(cohort) else (),
+        cgpa_percentiles=(
+            dict(zip(CGPA_PERCENTILES, np.percentile(cgpas, CGPA_PERCENTILES).tolist())) if len(cgpas) else {}
+        ),
+        cgpa_histogram=histogram(cgpas, CGPA_BIN_EDGES),
+        score_histogram=histogram(cohort.totals, SCORE_BIN_EDGES),
+        mean_cgpa=float(cgpas.mean()) if len(cgpas) else 0.0,
+        attendance_score_correlation=correlation(cohort.attended, cohort.totals),
+    )
@@ -0,0 +1,82 @@
+# performance_monitoring/api.py
+# Async JSON endpoints for clients that only need the numbers. They use the
+# async ORM and the cache's async API, and run independent queries through
+# asyncio.gather. Access follows the HTML views: a student sees their own
+# transcript, a department admin their department, staff everything.
+import asyncio
+from dataclasses import asdict
+
+from asgiref.sync import sync_to_async
+from django.db.models import Avg, Q
+from django.http import JsonResponse
+
+from .aggregates import department_course_rows
+from .caching import aget_cached_transcript
+from .credentials import session_department_id
+from .models import Department, Student, StudentSummary
+
+COURSE_FIELDS = ('course_code', 'course_title', 'credit_unit', 'semester__name', 'semester__academic_year', 'enrolled_students_count')
+
+
+def error(message, status):
+    return JsonResponse({'error': message}, status=status)
+
+
+async def _viewer(request):
+    # One hop to the sync thread for the session (a DB read) and the user
+    def load():
+        return (
+            request.user.is_authenticated and request.user.is_staff,
+            request.session.get('student_id'),
+            session_department_id(request),
+        )
+    return await sync_to_async(load)()
+
+
+# --- Students ---
+async def student_transcript(request, student_id):
+    is_staff, session_student_id, session_department_id = await _viewer(request)
+    try:
+        student = await Student.objects.select_related('department', 'summary').aget(student_id=student_id)
+    except Student.DoesNotExist:
+        return error("Student not found.", 404)
+    if not (is_staff or session_student_id == student.student_id or session_department_id == student.department_id):
+        return error("You may not view this student's transcript.", 403)
+
+    transcript = await aget_cached_transcript(student)
+    return JsonResponse({
+        'student': {'student_id': student.student_id, 'name': student.name, 'department': student.department.name},
+        **asdict(transcript),
+    })
+
+
+# --- Departments ---
+async def _course_rows(department):
+    return [row async for row in department_course_rows(department).values(*COURSE_FIELDS)]
+
+
+async def department_summary(request, department_id):
+    is_staff, _, session_department_id = await _viewer(request)
+    if not (is_staff or session_department_id == department_id):
+        return error("You may not view this department.", 403)
+    try:
+        department = await Department.objects.aget(pk=department_id)
+    except Department.DoesNotExist:
+        return error("Department not found.", 404)
+
+    student_count, averages, courses = await asyncio.gather(
+        Student.objects.filter(department=department).acount(),
+        StudentSummary.objects.filter(student__department=department).aaggregate(
+            cgpa=Avg('cgpa', filter=Q(total_credit_units__gt=0), default=0),
+            attendance=Avg('average_attendance', filter=Q(num_courses__gt=0), default=0),
+        ),
+        _course_rows(department),
+    )
+    return JsonResponse({
+        'department': {'id': department.pk, 'name': department.name},
+        'student_count': student_count,
+        'course_count': len(courses),
+        'average_cgpa': averages['cgpa'],
+        'average_attendance': averages['attendance'],
+        'courses': courses,
+    })
@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class PerformanceMonitoringConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'performance_monitoring'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from . import signals  # noqa: F401 - registers the summary receivers
+        from . import tasks  # noqa: F401 - registers the background job tasks
+        from .db import configure_connection
+
+        connection_created.connect(configure_connection, dispatch_uid='performance_monitoring.db')
@@ -0,0 +1,13 @@
+# performance_monitoring/backends/sqlite3/base.py
+# Django's SQLite backend, except that transactions begin IMMEDIATE: the
+# write lock is taken up front, so a transaction that reads and then writes
+# (a score edit and its summary refresh) waits its turn under busy_timeout
+# instead of failing with "database is locked" when another writer got in
+# between its read and its write. Django 5.1 offers the same through
+# OPTIONS['transaction_mode'].
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute('BEGIN IMMEDIATE')
@@ -0,0 +1,232 @@
+# performance_monitoring/benchmarks.py
+# Helpers shared by the benchmark management commands: a throwaway database,
+# a synthetic data generator and simple timers. Nothing here runs against
+# the real database unless a command is explicitly told to.
+import random
+import statistics
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from django.db import connection, connections, reset_queries
+from django.test.utils import CaptureQueriesContext
+
+from .models import Course, Department, Enrollment, Semester, Student
+from .summaries import rebuild_student_summaries, summary_batch
+
+SEMESTER_NAMES = ('First', 'Second')
+BENCHMARK_DEPARTMENT_PREFIX = "Benchmark Department "
+BENCHMARK_FIRST_YEAR = 2000
+
+
+@contextmanager
+def benchmark_database(keepdb=False, sqlite_file=None):
+    """
+    Runs the block against a freshly migrated test database (the same one
+    `manage.py test` would create) and drops it afterwards. On SQLite,
+    `sqlite_file` puts it in that file instead of memory, for benchmarks
+    that need a real journal and separate connections per thread.
+    """
+    old_name = connection.settings_dict['NAME']
+    test_settings = connection.settings_dict['TEST']
+    old_test_name = test_settings.get('NAME')
+    if sqlite_file and connection.vendor == 'sqlite':
+        test_settings['NAME'] = sqlite_file
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=keepdb)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=keepdb)
+        test_settings['NAME'] = old_test_name
+
+
+def seed_dataset(departments=2, students_per_department=200, courses_per_semester=6, academic_years=2,
+                 seed=0, chunk_size=5000):
+    """
+    Generates a department/semester/course/student/enrollment tree with
+    bulk_create. Scores follow a rough normal distribution (CA around 20/30,
+    exam around 42/70) and attendance loosely tracks performance. Every
+    student takes every course of their department. Returns a dict of counts.
+    """
+    rng = random.Random(seed)
+    semesters = []
+    for year in range(academic_years):
+        for name in SEMESTER_NAMES:
+            # Semesters may already exist in a real database; reuse them
+            semester, _ = Semester.objects.get_or_create(name=name, academic_year=BENCHMARK_FIRST_YEAR + year)
+            semesters.append(semester)
+    department_objs = Department.objects.bulk_create(
+        Department(name=f"{BENCHMARK_DEPARTMENT_PREFIX}{index + 1}") for index in range(departments)
+    )
+
+    courses = Course.objects.bulk_create(
+        Course(
+            course_code=f"D{d_index + 1:02d}{s_index + 1:02d}{c_index + 1:02d}",
+            course_title=f"Course {c_index + 1} of {semester}",
+            credit_unit=rng.choice((1, 2, 2, 3, 3, 3, 4, 6)),
+            department=department,
+            semester=semester,
+        )
+        for d_index, department in enumerate(department_objs)
+        for s_index, semester in enumerate(semesters)
+        for c_index in range(courses_per_semester)
+    )
+    courses_by_department = {}
+    for course in courses:
+        courses_by_department.setdefault(course.department_id, []).append(course)
+
+    students = Student.objects.bulk_create(
+        (
+            Student(
+                student_id=f"B{d_index + 1:02d}/{s_index:06d}",
+                name=f"Student {d_index + 1}-{s_index}",
+                email=f"student{d_index + 1}.{s_index}@benchmark.invalid",
+                department=department,
+            )
+            for d_index, department in enumerate(department_objs)
+            for s_index in range(students_per_department)
+        ),
+        batch_size=chunk_size,
+    )
+
+    def enrollments():
+        for student in students:
+            ability = rng.gauss(0, 1)
+            for course in courses_by_department[student.department_id]:
+                ca = round(rng.gauss(20 + 4 * ability, 4))
+                exam = round(rng.gauss(42 + 12 * ability, 10))
+                attended = round(rng.gauss(7 + ability, 2))
+                yield Enrollment(
+                    student=student, course=course, semester_id=course.semester_id,
+                    ca_score=min(max(ca, 0), 30), exam_score=min(max(exam, 0), 70),
+                    classes_attended=min(max(attended, 0), 10),
+                )
+
+    created = 0
+    batch = []
+    for enrollment in enrollments():
+        batch.append(enrollment)
+        if len(batch) >= chunk_size:
+            Enrollment.objects.bulk_create(batch)
+            created += len(batch)
+            batch = []
+    if batch:
+        Enrollment.objects.bulk_create(batch)
+        created += len(batch)
+
+    # bulk_create skips signals; build the derived summary tables in one pass
+    rebuild_student_summaries(student.pk for student in students)
+    return {
+        'departments': len(department_objs),
+        'semesters': len(semesters),
+        'courses': len(courses),
+        'students': len(students),
+        'enrollments': created,
+    }
+
+
+def delete_seeded_data():
+    """
+    Removes everything seed_dataset() created (students, courses and
+    enrollments cascade from the benchmark departments). Returns the number
+    of departments removed.
+    """
+    departments = Department.objects.filter(name__startswith=BENCHMARK_DEPARTMENT_PREFIX)
+    count = departments.count()
+    # One summary pass at the end instead of a refresh per cascaded enrollment
+    with summary_batch():
+        departments.delete()
+    return count
+
+
+def time_call(func, repeat=5):
+    """
+    Calls func() `repeat` times and returns the median wall time in
+    milliseconds.
+    """
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def profile_request(client, url, repeat=5, before_each=None):
+    """
+    Requests `url` through the Django test client `repeat` times. Returns
+    the status code, median wall time, query count and peak Python memory
+    (from one extra run under tracemalloc, so tracing doesn't skew timings).
+    `before_each` runs before every request, e.g. to clear caches.
+    """
+    def request():
+        if before_each:
+            before_each()
+        response = client.get(url)
+        if getattr(response, 'streaming', False):
+            b''.join(response.streaming_content)
+        return response
+
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = request()
+        timings.append((time.perf_counter() - started) * 1000)
+
+    # With DEBUG on the query log may already be full (it is a bounded deque),
+    # which would make the captured slice come out empty
+    reset_queries()
+    with CaptureQueriesContext(connection) as queries:
+        request()
+    # captured_queries is read lazily; the next request resets the log
+    query_count = len(queries.captured_queries)
+
+    tracemalloc.start()
+    try:
+        request()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'status': response.status_code,
+        'median_ms': round(statistics.median(timings), 3),
+        'min_ms': round(min(timings), 3),
+        'queries': query_count,
+        'peak_kib': round(peak / 1024, 1),
+    }
+
+
+def run_threads(count, target):
+    """
+    Runs target(index) in `count` threads at once and returns their results
+    in index order. Each thread closes its own database connections when
+    done; the first exception raised in a thread is re-raised here.
+    """
+    results = [None] * count
+    errors = []
+    start = threading.Barrier(count)
+
+    def run(index):
+        try:
+            start.wait()
+            results[index] = target(index)
+        except Exception as error:
+            errors.append(error)
+        finally:
+            connections.close_all()
+
+    threads = [threading.Thread(target=run, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+    return results
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[int(fraction * (len(values) - 1))] if values else 0.0
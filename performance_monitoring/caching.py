@@ -0,0 +1,200 @@
+# performance_monitoring/caching.py
+# Versioned cache for computed transcripts. Every key embeds the student's
+# data version (StudentSummary.data_version), which moves in the database
+# with any change to their enrollments or to the courses and semesters they
+# take, and the version of the grading scale the entry was built with.
+# Whichever process made the change, every process builds the new key from
+# the row it reads anyway, so a stale transcript can never be read back and
+# old entries simply age out of the cache.
+#
+# The rendered course table of a semester that has ended is cached too, under
+# the same version (see templatetags/transcript_fragments.py); tables of open
+# semesters are rendered on every request.
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import F
+from django.utils import timezone
+
+from .grading import grading_version
+from .models import StudentSummary
+from .transcripts import TranscriptService
+
+HITS_KEY = 'pm:transcript:hits'
+MISSES_KEY = 'pm:transcript:misses'
+FRAGMENT_HITS_KEY = 'pm:fragment:hits'
+FRAGMENT_MISSES_KEY = 'pm:fragment:misses'
+FRAGMENT_RENDER_KEY = 'pm:fragment:render_us'
+
+
+def get_cache():
+    return caches[getattr(settings, 'TRANSCRIPT_CACHE_ALIAS', 'default')]
+
+
+def get_timeout():
+    return getattr(settings, 'TRANSCRIPT_CACHE_TIMEOUT', 60 * 60 * 24)
+
+
+def get_fragment_timeout():
+    return getattr(settings, 'SEMESTER_FRAGMENT_TIMEOUT', 60 * 60 * 24 * 30)
+
+
+# --- Versions ---
+def student_version(student):
+    """
+    The student's data version from student.summary (select it with the
+    student), or None without a summary row; nothing is cached for them
+    until they have one.
+    """
+    # A student without a summary row raises RelatedObjectDoesNotExist, an AttributeError
+    summary = getattr(student, 'summary', None)
+    return summary.data_version if summary else None
+
+
+def bump_student_versions(student_pks):
+    # `student_pks` may be ids or a values('student_id') queryset
+    StudentSummary.objects.filter(student_id__in=student_pks).update(data_version=F('data_version') + 1)
+
+
+def data_version(student):
+    # Changes whenever anything on the student's transcript does
+    return f'{student_version(student)}.{grading_version()}'
+
+
+def transcript_cache_key(student):
+    return f'pm:transcript:{student.pk}:{data_version(student)}'
+
+
+# --- Transcripts ---
+def get_cached_transcript(student):
+    """
+    The student's transcript, from the cache when their data version (read
+    from student.summary as loaded with the student) still matches.
+    """
+    if student_version(student) is None:
+        _count(MISSES_KEY)
+        return TranscriptService.for_student(student)
+    cache = get_cache()
+    key = transcript_cache_key(student)
+    transcript = cache.get(key)
+    if transcript is not None:
+        _count(HITS_KEY)
+        return transcript
+
+    _count(MISSES_KEY)
+    transcript = TranscriptService.for_student(student)
+    cache.set(key, transcript, get_timeout())
+    return transcript
+
+
+# --- Semester Fragments ---
+def semester_has_ended(semester):
+    return semester.end_date is not None and semester.end_date < timezone.localdate()
+
+
+def fragment_cache_key(variant, student, semester_id):
+    return f'pm:fragment:{variant}:{student.pk}:{semester_id}:{data_version(student)}'
+
+
+def get_cached_fragment(variant, student, semester, render):
+    """
+    The HTML `render()` returns for one semester of a transcript page.
+    Semesters that have ended are cached for SEMESTER_FRAGMENT_TIMEOUT;
+    open ones are rendered every time. `variant` tells apart the pages
+    that render the same semester differently.
+    """
+    if not semester_has_ended(semester) or student_version(student) is None:
+        return render()
+    cache = get_cache()
+    key = fragment_cache_key(variant, student, semester.semester_id)
+    html = cache.get(key)
+    if html is not None:
+        _count(FRAGMENT_HITS_KEY)
+        return html
+
+    started = time.perf_counter()
+    html = render()
+    _count(FRAGMENT_MISSES_KEY)
+    _count(FRAGMENT_RENDER_KEY, int((time.perf_counter() - started) * 1_000_000))
+    cache.set(key, html, get_fragment_timeout())
+    return html
+
+
+# --- Async Access ---
+# Same keys and semantics as above through the cache's async API, for the
+# async JSON views. The student must come with their summary selected;
+# misses are built with the async ORM.
+async def aget_cached_transcript(student):
+    if student_version(student) is None:
+        await _acount(MISSES_KEY)
+        return await TranscriptService(student).abuild()
+    cache = get_cache()
+    # The grading version may need a (sync) check against the database
+    key = await sync_to_async(transcript_cache_key)(student)
+    transcript = await cache.aget(key)
+    if transcript is not None:
+        await _acount(HITS_KEY)
+        return transcript
+
+    await _acount(MISSES_KEY)
+    transcript = await TranscriptService(student).abuild()
+    await cache.aset(key, transcript, get_timeout())
+    return transcript
+
+
+async def _acount(key):
+    cache = get_cache()
+    try:
+        await cache.aincr(key)
+    except ValueError:
+        if not await cache.aadd(key, 1, None):
+            await cache.aincr(key)
+
+
+# --- Hit / Miss Counters ---
+def _count(key, delta=1):
+    cache = get_cache()
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        # First hit/miss since the counter was created or evicted
+        if not cache.add(key, delta, None):
+            cache.incr(key, delta)
+
+
+def cache_stats():
+    cache = get_cache()
+    hits = cache.get(HITS_KEY, 0)
+    misses = cache.get(MISSES_KEY, 0)
+    lookups = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': (hits / lookups) if lookups else 0.0,
+    }
+
+
+def fragment_stats():
+    """
+    Counters for the cached semester tables. Time saved is estimated as
+    hits times the average time a miss took to render.
+    """
+    cache = get_cache()
+    counters = cache.get_many([FRAGMENT_HITS_KEY, FRAGMENT_MISSES_KEY, FRAGMENT_RENDER_KEY])
+    hits = counters.get(FRAGMENT_HITS_KEY, 0)
+    misses = counters.get(FRAGMENT_MISSES_KEY, 0)
+    render_ms = counters.get(FRAGMENT_RENDER_KEY, 0) / 1000
+    average_ms = (render_ms / misses) if misses else 0.0
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': (hits / (hits + misses)) if hits + misses else 0.0,
+        'average_render_ms': average_ms,
+        'saved_ms': hits * average_ms,
+    }
+
+
+def reset_cache_stats():
+    get_cache().delete_many([HITS_KEY, MISSES_KEY, FRAGMENT_HITS_KEY, FRAGMENT_MISSES_KEY, FRAGMENT_RENDER_KEY])
@@ -0,0 +1,124 @@
+# performance_monitoring/conditional.py
+# Conditional GET for the dashboards. A fingerprint query (one aggregate
+# row) runs before the view; when the client's ETag still matches, Django's
+# condition() answers 304 without building any transcript or template.
+#
+# The fingerprints cover what moves on the pages: enrollment count and
+# latest Enrollment.updated_at, the summaries' updated_at (which also moves
+# on deletes, regrades and class position changes), the students' data
+# versions (which also move with their courses and semesters), the student's
+# own name and email, for a department the latest Student.updated_at (the
+# leaderboard shows names) and course count, and who is looking, since the
+# pages are per-viewer. Catalog edits with no enrolled students (e.g. a
+# course retitled before anyone takes it) don't move them. Only database
+# values go in, so every process gives a page the same ETag.
+import hashlib
+from functools import wraps
+
+from django.db.models import Count, Max, OuterRef, Subquery, Sum
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from .credentials import session_department_id
+from .models import Course, Department, Student
+
+
+def _etag(*parts):
+    return hashlib.sha1(repr(parts).encode()).hexdigest()[:32]
+
+
+def _viewer(request):
+    user_pk = request.user.pk if request.user.is_authenticated else None
+    return (request.session.get('student_id'), session_department_id(request), user_pk)
+
+
+def _latest(*timestamps):
+    timestamps = [timestamp for timestamp in timestamps if timestamp is not None]
+    return max(timestamps) if timestamps else None
+
+
+def student_fingerprint(request, student_id=None):
+    """
+    (etag, last_modified) for a student's dashboard or report, or None when
+    there is no such student (the view then redirects or 404s as usual).
+    """
+    student_id = student_id or request.session.get('student_id')
+    if not student_id:
+        return None
+    row = (
+        Student.objects.filter(student_id=student_id)
+        .values('pk', 'name', 'email', 'department_id', 'summary__updated_at', 'summary__data_version')
+        .annotate(
+            enrollments=Count('enrollment', distinct=True),
+            last_enrollment=Max('enrollment__updated_at'),
+            last_semester_summary=Max('semester_summaries__updated_at'),
+        )
+        .first()
+    )
+    if row is None:
+        return None
+    last_modified = _latest(row['summary__updated_at'], row['last_enrollment'], row['last_semester_summary'])
+    return _etag('student', _viewer(request), *row.values()), last_modified
+
+
+def department_fingerprint(request):
+    department_id = session_department_id(request)
+    if not department_id:
+        return None
+    row = (
+        Department.objects.filter(pk=department_id)
+        .values('name')
+        .annotate(
+            students=Count('student', distinct=True),
+            enrollments=Count('student__enrollment'),
+            last_enrollment=Max('student__enrollment__updated_at'),
+            last_summary=Max('student__summary__updated_at'),
+            last_student=Max('student__updated_at'),
+            versions=Sum('student__summary__data_version'),
+            # Counted apart from the student/enrollment join above
+            courses=Subquery(
+                Course.objects.filter(department=OuterRef('pk')).order_by()
+                .values('department').annotate(count=Count('pk')).values('count')
+            ),
+        )
+        .order_by('pk')
+        .first()
+    )
+    if row is None:
+        return None
+    last_modified = _latest(row['last_summary'], row['last_enrollment'], row['last_student'])
+    return _etag('department', _viewer(request), *row.values()), last_modified
+
+
+def conditional_dashboard(fingerprint):
+    """
+    Adds ETag / Last-Modified from `fingerprint(request, *args, **kwargs)`
+    and answers matching conditional GETs with 304. The fingerprint runs
+    once per request and responses are marked private so shared caches
+    don't store per-viewer pages.
+    """
+    def cached_fingerprint(request, *args, **kwargs):
+        if not hasattr(request, '_dashboard_fingerprint'):
+            request._dashboard_fingerprint = fingerprint(request, *args, **kwargs)
+        return request._dashboard_fingerprint
+
+    def etag(request, *args, **kwargs):
+        result = cached_fingerprint(request, *args, **kwargs)
+        return result[0] if result else None
+
+    def last_modified(request, *args, **kwargs):
+        result = cached_fingerprint(request, *args, **kwargs)
+        return result[1] if result else None
+
+    def decorator(view):
+        conditional_view = condition(etag_func=etag, last_modified_func=last_modified)(view)
+
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            if getattr(request, '_dashboard_fingerprint', None):
+                # Always revalidate; the ETag makes that a cheap 304
+                patch_cache_control(response, private=True, no_cache=True)
+            return response
+        return wrapped
+    return decorator
@@ -0,0 +1,179 @@
+# performance_monitoring/credentials.py
+# Student and department passwords. New values are stored with one of
+# Django's password hashers, CREDENTIAL_HASHER (scrypt by default: memory
+# hard, and a verify costs a fraction of PBKDF2 at Django's default
+# iterations, which matters when a whole cohort logs in at once). Rows that
+# still hold a plaintext password from before are accepted once by a
+# constant-time comparison and rehashed on that successful login, so no
+# bulk migration is needed. Hashes from another hasher or with outdated
+# parameters are upgraded the same way.
+#
+# Logins also pass through LoginThrottle, sliding-window limits on failed
+# attempts kept in the cache per (client IP, account), per account and per
+# client IP. Excess attempts are turned away before any database query or
+# hash computation.
+import hashlib
+import time
+
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher, identify_hasher, make_password
+from django.utils.crypto import constant_time_compare
+
+from .caching import get_cache
+from .models import DepartmentPassword, Student
+
+
+# --- Hashing ---
+def hash_credential(raw):
+    return make_password(raw, hasher=settings.CREDENTIAL_HASHER)
+
+
+def is_hashed(value):
+    try:
+        identify_hasher(value)
+    except ValueError:
+        return False
+    return True
+
+
+def check_credential(raw, stored, setter):
+    """
+    True if `raw` matches `stored`. `setter(raw)` is called to store a fresh
+    hash when `stored` is legacy plaintext or uses outdated hasher settings.
+    A missing password still costs one hash, so unknown accounts can't be
+    told apart by timing.
+    """
+    if not raw or not stored:
+        hash_credential(raw or '')
+        return False
+    if is_hashed(stored):
+        hasher = identify_hasher(stored)
+        if not hasher.verify(raw, stored):
+            return False
+        preferred = get_hasher(settings.CREDENTIAL_HASHER)
+        if hasher.algorithm != preferred.algorithm or preferred.must_update(stored):
+            setter(raw)
+        return True
+    if constant_time_compare(raw, stored):
+        setter(raw)
+        return True
+    return False
+
+
+def check_student_password(student, raw):
+    def setter(raw_password):
+        student.custom_password = hash_credential(raw_password)
+        Student.objects.filter(pk=student.pk).update(custom_password=student.custom_password)
+    return check_credential(raw, student.custom_password if student else None, setter)
+
+
+def check_department_password(department_password, raw):
+    def setter(raw_password):
+        department_password.password = hash_credential(raw_password)
+        DepartmentPassword.objects.filter(pk=department_password.pk).update(password=department_password.password)
+    return check_credential(raw, department_password.password if department_password else None, setter)
+
+
+# --- Sessions ---
+def session_department_id(request):
+    """
+    The department a department admin is logged in to, as an int, or None.
+    Sessions from before department logins stored department.pk may hold
+    it as a string (or something unusable), so it is normalised here rather
+    than compared as stored.
+    """
+    try:
+        return int(request.session.get('department_id'))
+    except (TypeError, ValueError):
+        return None
+
+
+# --- Throttling ---
+def client_ip(request):
+    """
+    The client address to throttle on. Behind a reverse proxy REMOTE_ADDR is
+    the proxy's, so LOGIN_THROTTLE_IP_HEADER names the header it sets (e.g.
+    HTTP_X_FORWARDED_FOR). Proxies append to that header, and anything
+    before their entries came from the client, so the address is read
+    LOGIN_THROTTLE_PROXY_COUNT entries from the end.
+    """
+    header = settings.LOGIN_THROTTLE_IP_HEADER
+    value = request.META.get(header)
+    if not value:
+        return request.META.get('REMOTE_ADDR') or ''
+    if header == 'REMOTE_ADDR':
+        return value
+    entries = [entry.strip() for entry in value.split(',') if entry.strip()]
+    return entries[-min(settings.LOGIN_THROTTLE_PROXY_COUNT, len(entries))] if entries else ''
+
+
+class LoginThrottle:
+    """
+    Sliding-window limits on failed attempts for one login form. Each key
+    keeps a counter per fixed window; the current count is the current
+    window plus the previous one weighted by how much of it still overlaps
+    the sliding window. Checking is one get_many; recording is a few incr
+    calls, all against the cache.
+
+    The tight limit is per (client IP, account), so one guesser behind a
+    campus NAT doesn't lock out the lab. Looser limits per account (guessing
+    from many addresses) and per IP (spraying many accounts) sit above it.
+    A successful login clears that account's counters.
+    """
+
+    def __init__(self, request, scope, account):
+        self.window = settings.LOGIN_THROTTLE_WINDOW
+        account = hashlib.sha1(str(account).strip().upper().encode()).hexdigest()[:16]
+        ip = client_ip(request)
+        self.limits = {
+            f'pm:login:{scope}:pair:{ip}:{account}': settings.LOGIN_THROTTLE_ACCOUNT_ATTEMPTS,
+            f'pm:login:{scope}:account:{account}': settings.LOGIN_THROTTLE_ACCOUNT_TOTAL_ATTEMPTS,
+            f'pm:login:{scope}:ip:{ip}': settings.LOGIN_THROTTLE_IP_ATTEMPTS,
+        }
+        self.pair_key, self.account_key, self.ip_key = self.limits
+
+    def _window_keys(self, key, now):
+        current = int(now // self.window)
+        return f'{key}:{current}', f'{key}:{current - 1}'
+
+    def retry_after(self):
+        """
+        Seconds until another attempt is allowed, or 0 if one is allowed now.
+        """
+        now = time.time()
+        keys = {key: self._window_keys(key, now) for key in self.limits}
+        counts = get_cache().get_many([window_key for pair in keys.values() for window_key in pair])
+        elapsed = (now % self.window) / self.window
+        wait = 0
+        for key, limit in self.limits.items():
+            current_key, previous_key = keys[key]
+            current, previous = counts.get(current_key, 0), counts.get(previous_key, 0)
+            if current + previous * (1 - elapsed) < limit:
+                continue
+            # The older window's weight fades until the estimate drops under the limit
+            if current >= limit:
+                # ... which takes until this window is the previous one
+                fades_at = 1 + (1 - limit / current)
+            else:
+                fades_at = 1 - (limit - current) / previous
+            wait = max(wait, int((fades_at - elapsed) * self.window) + 1)
+        return wait
+
+    def _hit(self, key):
+        cache = get_cache()
+        current_key, _ = self._window_keys(key, time.time())
+        # Two windows' worth: the key is still read as the "previous" window
+        if not cache.add(current_key, 1, self.window * 2):
+            try:
+                cache.incr(current_key)
+            except ValueError:
+                # Expired between add() and incr()
+                cache.add(current_key, 1, self.window * 2)
+
+    def failed(self):
+        for key in self.limits:
+            self._hit(key)
+
+    def succeeded(self):
+        now = time.time()
+        get_cache().delete_many([*self._window_keys(self.pair_key, now), *self._window_keys(self.account_key, now)])
@@ -0,0 +1,64 @@
+# performance_monitoring/db.py
+# Per-connection database setup, connected to connection_created in
+# PerformanceMonitoringConfig.ready(). SQLite connections get the
+# SQLITE_PRAGMAS from settings; with persistent connections (CONN_MAX_AGE)
+# that happens once per connection, not per request. Other backends are
+# left alone.
+#
+# optimize_database() keeps the planner statistics current; run_worker
+# runs it periodically (the optimize_database task, see PERIODIC_JOBS).
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connection
+
+# Rows SQLite samples per index when PRAGMA optimize re-analyzes a table
+SQLITE_ANALYSIS_LIMIT = 1000
+
+
+def sqlite_pragmas():
+    return getattr(settings, 'SQLITE_PRAGMAS', {})
+
+
+def configure_connection(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    # On the raw connection, so setup never shows up in query counts
+    for name, value in sqlite_pragmas().items():
+        connection.connection.execute(f'PRAGMA {name} = {value}')
+
+
+def optimize_database(full=False):
+    """
+    Refreshes the query planner statistics. On SQLite that is PRAGMA
+    optimize, which only re-analyzes tables that changed enough (`full`
+    runs a complete ANALYZE instead), followed by a WAL checkpoint. On
+    PostgreSQL the app's tables are analyzed. Returns what was run and how
+    long it took.
+    """
+    started = time.perf_counter()
+    statements = []
+    with connection.cursor() as cursor:
+        def run(sql):
+            statements.append(sql)
+            cursor.execute(sql)
+            return cursor.fetchall() if cursor.description else None
+
+        if connection.vendor == 'sqlite':
+            if full:
+                run('ANALYZE')
+            else:
+                run(f'PRAGMA analysis_limit = {SQLITE_ANALYSIS_LIMIT}')
+                run('PRAGMA optimize')
+            if run('PRAGMA journal_mode')[0][0] == 'wal':
+                # Folds the write-ahead log back into the database file
+                run('PRAGMA wal_checkpoint(TRUNCATE)')
+        elif connection.vendor == 'postgresql':
+            for model in apps.get_app_config('performance_monitoring').get_models():
+                run(f'ANALYZE {connection.ops.quote_name(model._meta.db_table)}')
+    return {
+        'vendor': connection.vendor,
+        'statements': statements,
+        'ms': round((time.perf_counter() - started) * 1000, 1),
+    }
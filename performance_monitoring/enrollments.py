@@ -0,0 +1,57 @@
+# performance_monitoring/enrollments.py
+# Set-based enrollment of many students at once (used by the admin action).
+from collections import defaultdict
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .caching import bump_student_versions
+from .models import Course, Enrollment
+from .summaries import rebuild_student_summaries
+
+
+def bulk_enroll(students, semester, chunk_size=1000):
+    """
+    Enrolls every student in `students` (a Student queryset) in all of their
+    department's courses for `semester`, skipping existing enrollments.
+    Uses a few queries per chunk of rows instead of one per (student, course)
+    pair. Returns (created, skipped). Raises ValidationError if the
+    semester's results are frozen.
+    """
+    if semester.results_frozen_at:
+        # bulk_create bypasses Enrollment.save(), which refuses frozen semesters
+        raise ValidationError(f"The results of {semester} are frozen; unfreeze the semester to enroll students.")
+    student_rows = list(students.order_by().values_list('pk', 'department_id'))
+    department_ids = {department_id for _, department_id in student_rows}
+
+    courses_by_department = defaultdict(list)
+    course_rows = Course.objects.filter(department_id__in=department_ids, semester=semester).values_list('pk', 'department_id')
+    for course_id, department_id in course_rows:
+        courses_by_department[department_id].append(course_id)
+    course_ids = [course_id for ids in courses_by_department.values() for course_id in ids]
+    if not course_ids:
+        return 0, 0
+
+    existing = set(
+        Enrollment.objects.filter(semester=semester, course_id__in=course_ids, student__in=students.order_by().values('pk'))
+        .values_list('student_id', 'course_id')
+    )
+
+    missing = []
+    skipped = 0
+    for student_id, department_id in student_rows:
+        for course_id in courses_by_department.get(department_id, ()):
+            if (student_id, course_id) in existing:
+                skipped += 1
+            else:
+                missing.append(Enrollment(student_id=student_id, course_id=course_id, semester=semester))
+
+    if missing:
+        with transaction.atomic():
+            Enrollment.objects.bulk_create(missing, batch_size=chunk_size, ignore_conflicts=True)
+            # bulk_create skips the model signals, so refresh derived data here
+            enrolled_ids = {enrollment.student_id for enrollment in missing}
+            rebuild_student_summaries(enrolled_ids)
+        bump_student_versions(enrolled_ids)
+
+    return len(missing), skipped
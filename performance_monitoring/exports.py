@@ -0,0 +1,87 @@
+# performance_monitoring/exports.py
+# Department result sheets streamed straight from a joined values_list
+# query. Rows are never collected in memory: CSV is written line by line
+# and XLSX goes through openpyxl's write-only mode into a temporary file.
+import csv
+import tempfile
+
+from .grading import get_grading_scales
+from .models import Enrollment
+
+EXPORT_HEADER = (
+    'student_id', 'student_name', 'department', 'academic_year', 'semester',
+    'course_code', 'course_title', 'credit_unit', 'ca_score', 'exam_score',
+    'total_score', 'grade', 'grade_point', 'classes_attended', 'attendance_percentage', 'cgpa',
+)
+
+EXPORT_COLUMNS = (
+    'student__student_id', 'student__name', 'student__department__name',
+    'semester__academic_year', 'semester__name',
+    'course__course_code', 'course__course_title', 'course__credit_unit',
+    'ca_score', 'exam_score', 'classes_attended',
+    'student__summary__weighted_grade_points', 'student__summary__total_credit_units',
+)
+
+
+def export_queryset(department=None, semester_name=None, academic_year=None):
+    enrollments = Enrollment.objects.all()
+    if department is not None:
+        enrollments = enrollments.filter(student__department=department)
+    if semester_name:
+        enrollments = enrollments.filter(semester__name=semester_name)
+    if academic_year:
+        enrollments = enrollments.filter(semester__academic_year=academic_year)
+    return enrollments.order_by(
+        'student__department__name', 'student__student_id',
+        'semester__academic_year', 'semester__name', 'course__course_code',
+    ).values_list(*EXPORT_COLUMNS)
+
+
+def iter_export_rows(department=None, semester_name=None, academic_year=None, chunk_size=2000):
+    """
+    Yields one tuple per enrollment in EXPORT_HEADER order. Grades use the
+    same rules as Enrollment.grade; CGPA is the student's overall CGPA.
+    """
+    scales = get_grading_scales()
+    rows = export_queryset(department, semester_name, academic_year).iterator(chunk_size=chunk_size)
+    for (student_id, name, department_name, year, semester, code, title, credit_unit,
+         ca_score, exam_score, classes_attended, weighted, credits) in rows:
+        total = ca_score + exam_score
+        cgpa = (weighted / credits) if credits else 0
+        scale = scales.for_year(year)
+        yield (
+            student_id, name, department_name, year, semester, code, title, credit_unit,
+            ca_score, exam_score, total, scale.letter(total), scale.point(total),
+            classes_attended, round(classes_attended / 10 * 100, 2), round(cgpa, 2),
+        )
+
+
+class Echo:
+    # csv.writer target that hands each formatted line straight back
+    def write(self, value):
+        return value
+
+
+def iter_csv(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_HEADER)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def write_xlsx(rows):
+    """
+    Writes rows to a temporary XLSX file and returns it rewound. Needs
+    openpyxl; raises ImportError otherwise.
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Results')
+    sheet.append(EXPORT_HEADER)
+    for row in rows:
+        sheet.append(row)
+    output = tempfile.TemporaryFile()
+    workbook.save(output)
+    output.seek(0)
+    return output
@@ -0,0 +1,203 @@
+# performance_monitoring/grading.py
+# The grading scale: score bands -> letter and grade point. A scale compiles
+# into 0-100 lookup tables for O(1) lookups in Python and into a Case/When
+# expression for SQL, so Enrollment.grade, transcripts, exports, analytics
+# and the summary aggregates all read the same boundaries.
+#
+# Scales can be overridden per academic year (or globally) with GradeBand
+# rows. The compiled scales are cached in-process; GradeBand changes clear
+# the local copy, and other processes notice the change in the table itself
+# (row count and latest updated_at) on their next check, at most
+# RECHECK_SECONDS later.
+import time
+
+from django.db.models import Case, CharField, Count, ExpressionWrapper, F, IntegerField, Max, Value, When
+from django.db.models.lookups import Range
+
+MIN_TOTAL = 0
+MAX_TOTAL = 100
+FAIL_LETTER = 'F'
+FAIL_POINT = 0
+
+# (lowest total, highest total, letter, grade point)
+DEFAULT_BANDS = (
+    (70, 100, 'A', 5),
+    (60, 69, 'B', 4),
+    (50, 59, 'C', 3),
+    (45, 49, 'D', 2),
+    (40, 44, 'E', 1),
+)
+
+RECHECK_SECONDS = 30
+
+
+def total_score_expression(prefix=''):
+    # SQL equivalent of Enrollment.total_score
+    return ExpressionWrapper(F(f'{prefix}ca_score') + F(f'{prefix}exam_score'), output_field=IntegerField())
+
+
+class GradingScale:
+    """
+    A validated set of bands. Totals no band covers, including anything
+    outside 0-100, are a fail (FAIL_LETTER / FAIL_POINT) in Python and SQL
+    alike.
+    """
+
+    def __init__(self, bands):
+        self.bands = tuple(sorted(bands, key=lambda band: band[0], reverse=True))
+        self.validate()
+        letters = [FAIL_LETTER] * (MAX_TOTAL + 1)
+        points = [FAIL_POINT] * (MAX_TOTAL + 1)
+        for low, high, letter, point in self.bands:
+            for total in range(low, high + 1):
+                letters[total] = letter
+                points[total] = point
+        self.letters = tuple(letters)
+        self.points = tuple(points)
+
+    def validate(self):
+        previous_low = MAX_TOTAL + 1
+        for low, high, letter, point in self.bands:
+            if not MIN_TOTAL <= low <= high <= MAX_TOTAL:
+                raise ValueError(f"Band {letter} ({low}-{high}) must lie within {MIN_TOTAL}-{MAX_TOTAL}.")
+            if high >= previous_low:
+                raise ValueError(f"Band {letter} ({low}-{high}) overlaps a higher band.")
+            if point < 0:
+                raise ValueError(f"Band {letter} has a negative grade point.")
+            previous_low = low
+
+    def letter(self, total):
+        if total is None or not MIN_TOTAL <= total <= MAX_TOTAL:
+            return FAIL_LETTER
+        return self.letters[total]
+
+    def point(self, total):
+        if total is None or not MIN_TOTAL <= total <= MAX_TOTAL:
+            return FAIL_POINT
+        return self.points[total]
+
+    def point_case(self, total):
+        return Case(
+            *[When(Range(total, (low, high)), then=Value(point)) for low, high, _, point in self.bands],
+            default=Value(FAIL_POINT), output_field=IntegerField(),
+        )
+
+    def letter_case(self, total):
+        return Case(
+            *[When(Range(total, (low, high)), then=Value(letter)) for low, high, letter, _ in self.bands],
+            default=Value(FAIL_LETTER), output_field=CharField(),
+        )
+
+
+DEFAULT_SCALE = GradingScale(DEFAULT_BANDS)
+
+
+class GradingScales:
+    """
+    The scale in force for each academic year: a per-year override, else
+    the global override, else DEFAULT_SCALE.
+    """
+
+    def __init__(self, default=DEFAULT_SCALE, by_year=None):
+        self.default = default
+        self.by_year = by_year or {}
+
+    def for_year(self, academic_year=None):
+        return self.by_year.get(academic_year, self.default)
+
+    def letter(self, total, academic_year=None):
+        return self.for_year(academic_year).letter(total)
+
+    def point(self, total, academic_year=None):
+        return self.for_year(academic_year).point(total)
+
+    def _by_year_case(self, prefix, build):
+        total = total_score_expression(prefix)
+        if not self.by_year:
+            return build(self.default, total)
+        year = f'{prefix}semester__academic_year'
+        return Case(
+            *[When(**{year: academic_year}, then=build(scale, total)) for academic_year, scale in self.by_year.items()],
+            default=build(self.default, total),
+        )
+
+    def point_expression(self, prefix=''):
+        return self._by_year_case(prefix, GradingScale.point_case)
+
+    def letter_expression(self, prefix=''):
+        return self._by_year_case(prefix, GradingScale.letter_case)
+
+
+# --- In-process Cache ---
+_loaded = {'scales': None, 'version': None, 'checked_at': 0.0}
+
+
+def _scales_version(count, latest):
+    # Deleting a band changes the count; adding or editing one moves the latest updated_at
+    return f'{count}-{latest:%Y%m%d%H%M%S%f}' if count else '0'
+
+
+def _stored_version():
+    from .models import GradeBand
+    row = GradeBand.objects.aggregate(count=Count('pk'), latest=Max('updated_at'))
+    return _scales_version(row['count'], row['latest'])
+
+
+def load_grading_scales():
+    """
+    (GradingScales, version) from the GradeBand table (one query).
+    """
+    from .models import GradeBand
+    bands = {}
+    count, latest = 0, None
+    for year, low, high, letter, point, updated_at in GradeBand.objects.values_list(
+        'academic_year', 'min_score', 'max_score', 'letter', 'grade_point', 'updated_at',
+    ):
+        bands.setdefault(year, []).append((low, high, letter, point))
+        count += 1
+        latest = max(latest, updated_at) if latest else updated_at
+    default = GradingScale(bands.pop(None)) if None in bands else DEFAULT_SCALE
+    scales = GradingScales(default, {year: GradingScale(year_bands) for year, year_bands in bands.items()})
+    return scales, _scales_version(count, latest)
+
+
+def get_grading_scales():
+    now = time.monotonic()
+    if _loaded['scales'] is not None and now - _loaded['checked_at'] < RECHECK_SECONDS:
+        return _loaded['scales']
+    if _loaded['scales'] is None or _stored_version() != _loaded['version']:
+        _loaded['scales'], _loaded['version'] = load_grading_scales()
+    _loaded['checked_at'] = now
+    return _loaded['scales']
+
+
+def grading_version():
+    """
+    Version of the scales this process grades with. Part of the transcript
+    cache keys, so a process still on an old scale never fills the entries
+    the others read.
+    """
+    get_grading_scales()
+    return _loaded['version']
+
+
+def invalidate_grading_scales():
+    # Local copy now, other processes on their next recheck
+    _loaded['scales'] = None
+
+
+# --- Shortcuts ---
+def letter_grade(total, academic_year=None):
+    return get_grading_scales().letter(total, academic_year)
+
+
+def get_grade_point(total, academic_year=None):
+    return get_grading_scales().point(total, academic_year)
+
+
+def grade_point_expression(prefix=''):
+    return get_grading_scales().point_expression(prefix)
+
+
+def letter_grade_expression(prefix=''):
+    return get_grading_scales().letter_expression(prefix)
@@ -0,0 +1,235 @@
+# performance_monitoring/imports.py
+# Streaming CA/exam score import for Enrollment from CSV or XLSX files.
+# Rows are read one at a time, resolved through lookup dicts built once per
+# file and written back with chunked bulk_update, so memory depends on the
+# chunk size rather than the file size.
+import csv
+import io
+import os
+from dataclasses import dataclass, field
+from zipfile import BadZipFile
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from .caching import bump_student_versions
+from .models import Course, Enrollment, Semester, Student
+from .summaries import rebuild_student_summaries
+
+REQUIRED_COLUMNS = ('student_id', 'course_code', 'ca_score', 'exam_score')
+OPTIONAL_COLUMNS = ('classes_attended',)
+SCORE_FIELDS = ('ca_score', 'exam_score', 'classes_attended')
+
+
+class ScoreImportError(Exception):
+    """The file as a whole can't be imported (bad format or header)."""
+
+
+@dataclass
+class ScoreImportResult:
+    dry_run: bool = False
+    rows: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    errors: list = field(default_factory=list)
+    error_count: int = 0
+
+    def add_error(self, line, message, limit):
+        self.error_count += 1
+        if len(self.errors) < limit:
+            self.errors.append((line, message))
+
+
+# --- Readers ---
+def read_rows(file, filename):
+    """
+    Yields (line_number, row_dict) from an uploaded/opened binary file.
+    The format is chosen from the file extension.
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == '.csv':
+        return _read_csv(file)
+    if extension in ('.xlsx', '.xlsm'):
+        return _read_xlsx(file)
+    raise ScoreImportError(f"Unsupported file type '{extension}'. Upload a .csv or .xlsx file.")
+
+
+def _normalise_header(header):
+    columns = [str(name or '').strip().lower() for name in header]
+    missing = [name for name in REQUIRED_COLUMNS if name not in columns]
+    if missing:
+        raise ScoreImportError(f"Missing column(s): {', '.join(missing)}.")
+    return columns
+
+
+def _read_csv(file):
+    text = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+    reader = csv.reader(text)
+    # The file is decoded and parsed as it is read, so errors can come from any line
+    try:
+        try:
+            columns = _normalise_header(next(reader))
+        except StopIteration:
+            raise ScoreImportError("The file is empty.")
+        for line, values in enumerate(reader, start=2):
+            if any(values):
+                yield line, dict(zip(columns, values))
+    except UnicodeDecodeError:
+        raise ScoreImportError("The file is not UTF-8 text; save the CSV as UTF-8 and upload it again.")
+    except csv.Error as error:
+        raise ScoreImportError(f"Line {reader.line_num} is not valid CSV: {error}.")
+
+
+def _read_xlsx(file):
+    try:
+        from openpyxl import load_workbook
+        from openpyxl.utils.exceptions import InvalidFileException
+    except ImportError:
+        raise ScoreImportError("XLSX import needs the openpyxl package; upload a CSV file instead.")
+
+    try:
+        workbook = load_workbook(file, read_only=True, data_only=True)
+    except (BadZipFile, InvalidFileException):
+        raise ScoreImportError("The file is not a valid XLSX workbook.")
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        try:
+            columns = _normalise_header(next(rows))
+        except StopIteration:
+            raise ScoreImportError("The workbook is empty.")
+        for line, values in enumerate(rows, start=2):
+            if any(value not in (None, '') for value in values):
+                yield line, dict(zip(columns, values))
+    finally:
+        workbook.close()
+
+
+def _whole_number(raw):
+    # Spreadsheets hand back 25.0 for 25; anything fractional is rejected
+    try:
+        number = float(str(raw).strip())
+    except ValueError:
+        return None
+    return int(number) if number.is_integer() else None
+
+
+# --- Importer ---
+class ScoreImporter:
+    """
+    Applies score rows to existing enrollments. Rows are matched on
+    (student_id, course_code) within the course's own semester; each row is
+    validated with the Enrollment field validators and failures are reported
+    per line without stopping the import.
+    """
+
+    def __init__(self, chunk_size=2000, dry_run=False, max_reported_errors=500):
+        self.chunk_size = chunk_size
+        self.dry_run = dry_run
+        self.max_reported_errors = max_reported_errors
+        self.fields = {name: Enrollment._meta.get_field(name) for name in SCORE_FIELDS}
+
+    def build_lookups(self):
+        self.students = dict(Student.objects.values_list('student_id', 'pk'))
+        self.courses = {code: (pk, semester_id) for code, pk, semester_id in Course.objects.values_list('course_code', 'pk', 'semester_id')}
+        # bulk_update bypasses Enrollment.save(), which refuses frozen semesters
+        self.frozen_semesters = set(Semester.objects.filter(results_frozen_at__isnull=False).values_list('pk', flat=True))
+
+    def run(self, rows):
+        self.build_lookups()
+        result = ScoreImportResult(dry_run=self.dry_run)
+        touched_students = set()
+
+        with transaction.atomic():
+            chunk = {}
+            for line, row in rows:
+                result.rows += 1
+                parsed = self.parse_row(line, row, result)
+                if parsed is not None:
+                    # A later row for the same enrollment wins
+                    key, values = parsed
+                    chunk[key] = (line, values)
+                if len(chunk) >= self.chunk_size:
+                    self.apply_chunk(chunk, result, touched_students)
+                    chunk = {}
+            if chunk:
+                self.apply_chunk(chunk, result, touched_students)
+
+            if touched_students and not self.dry_run:
+                # bulk_update skips the model signals, so refresh derived data here
+                rebuild_student_summaries(touched_students)
+        if touched_students and not self.dry_run:
+            bump_student_versions(touched_students)
+        return result
+
+    def parse_row(self, line, row, result):
+        student_id = str(row.get('student_id') or '').strip()
+        course_code = str(row.get('course_code') or '').strip()
+        student_pk = self.students.get(student_id)
+        if student_pk is None:
+            result.add_error(line, f"Unknown student_id '{student_id}'.", self.max_reported_errors)
+            return None
+        course = self.courses.get(course_code)
+        if course is None:
+            result.add_error(line, f"Unknown course_code '{course_code}'.", self.max_reported_errors)
+            return None
+        if course[1] in self.frozen_semesters:
+            result.add_error(line, f"The results of {course_code}'s semester are frozen.", self.max_reported_errors)
+            return None
+
+        values = {}
+        for name, model_field in self.fields.items():
+            raw = row.get(name)
+            if raw is None or str(raw).strip() == '':
+                if name in OPTIONAL_COLUMNS:
+                    continue
+                result.add_error(line, f"Missing {name}.", self.max_reported_errors)
+                return None
+            value = _whole_number(raw)
+            if value is None:
+                result.add_error(line, f"{name} must be a whole number, got '{raw}'.", self.max_reported_errors)
+                return None
+            try:
+                model_field.run_validators(value)
+            except ValidationError as error:
+                result.add_error(line, f"{name}: {' '.join(error.messages)}", self.max_reported_errors)
+                return None
+            values[name] = value
+
+        course_pk, semester_pk = course
+        return (student_pk, course_pk, semester_pk), values
+
+    def apply_chunk(self, chunk, result, touched_students):
+        student_pks = {key[0] for key in chunk}
+        course_pks = {key[1] for key in chunk}
+        enrollments = {
+            (e.student_id, e.course_id, e.semester_id): e
+            for e in Enrollment.objects.filter(student_id__in=student_pks, course_id__in=course_pks).only(
+                'pk', 'student_id', 'course_id', 'semester_id', *SCORE_FIELDS)
+        }
+
+        changed = []
+        for key, (line, values) in chunk.items():
+            enrollment = enrollments.get(key)
+            if enrollment is None:
+                result.add_error(line, "The student is not enrolled in this course.", self.max_reported_errors)
+                continue
+            if all(getattr(enrollment, name) == value for name, value in values.items()):
+                result.unchanged += 1
+                continue
+            for name, value in values.items():
+                setattr(enrollment, name, value)
+            changed.append(enrollment)
+            touched_students.add(enrollment.student_id)
+
+        result.updated += len(changed)
+        if changed and not self.dry_run:
+            # bulk_update doesn't apply auto_now; the dashboards' ETags rely on it
+            now = timezone.now()
+            for enrollment in changed:
+                enrollment.updated_at = now
+            Enrollment.objects.bulk_update(changed, (*SCORE_FIELDS, 'updated_at'), batch_size=500)
+
+
+def import_scores(file, filename, **options):
+    return ScoreImporter(**options).run(read_rows(file, filename))
@@ -0,0 +1,234 @@
+# performance_monitoring/jobs.py
+# A small database-backed job queue for work too slow for a request: bulk
+# enrollment, CGPA recomputation and large exports. enqueue() stores a Job
+# row and returns at once; `manage.py run_worker` claims due rows and runs
+# them in a process pool. There is no broker: a job is claimed with a
+# conditional UPDATE, which SQLite and Postgres both apply atomically, so
+# several workers can share one queue.
+import threading
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, connection
+from django.db.models import F, Q
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Job
+
+TASKS = {}
+
+# Seconds between progress writes, however often a task reports
+PROGRESS_INTERVAL = 1.0
+# Seconds between the heartbeats run_worker writes for the jobs it runs
+HEARTBEAT_INTERVAL = 30
+
+
+class JobAborted(Exception):
+    """Raised by a task that can't succeed however often it is retried."""
+
+
+def task(name):
+    """
+    Registers a function as a job task. It is called as
+    `func(progress, **job.params)` and its return value (JSON-serialisable)
+    is stored as Job.result.
+    """
+    def register(func):
+        TASKS[name] = func
+        return func
+    return register
+
+
+def enqueue(task_name, params=None, user=None, max_attempts=None, delay=0):
+    if task_name not in TASKS:
+        raise ValueError(f"Unknown job task '{task_name}'.")
+    return Job.objects.create(
+        task=task_name,
+        params=params or {},
+        created_by=user if user is not None and user.is_authenticated else None,
+        max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+        run_after=timezone.now() + timedelta(seconds=delay),
+    )
+
+
+def schedule_periodic(periodic=None):
+    """
+    Queues each PERIODIC_JOBS task that has no queued or running job and
+    hasn't been queued within its interval. Two workers racing may both
+    queue one, so periodic tasks must be harmless to run twice. Returns the
+    jobs queued.
+    """
+    periodic = settings.PERIODIC_JOBS if periodic is None else periodic
+    since = timezone.now()
+    queued = []
+    for task_name, interval in periodic.items():
+        if not interval:
+            continue
+        pending_or_recent = Job.objects.filter(task=task_name).filter(
+            Q(status__in=(Job.QUEUED, Job.RUNNING)) | Q(created_at__gte=since - timedelta(seconds=interval)),
+        )
+        if not pending_or_recent.exists():
+            # The next run comes round anyway; no point retrying this one
+            queued.append(enqueue(task_name, max_attempts=1))
+    return queued
+
+
+# --- Claiming ---
+def claim_next(worker):
+    """
+    Marks the next due job as running for `worker` and returns its pk, or
+    None when nothing is due. A job another worker claimed first is skipped.
+    """
+    now = timezone.now()
+    candidates = (
+        Job.objects.filter(status=Job.QUEUED, run_after__lte=now)
+        .order_by('run_after', 'pk').values_list('pk', flat=True)[:10]
+    )
+    for pk in candidates:
+        claimed = Job.objects.filter(pk=pk, status=Job.QUEUED).update(
+            status=Job.RUNNING, worker=worker, attempts=F('attempts') + 1,
+            started_at=now, heartbeat_at=now, finished_at=None,
+        )
+        if claimed:
+            return pk
+    return None
+
+
+def requeue_stale(stale_after, worker=None):
+    """
+    Fails (or retries) running jobs whose worker hasn't reported for
+    `stale_after` seconds, e.g. after the worker was killed. A worker passes
+    its own name to skip the jobs it is still running. Returns the number
+    of jobs recovered.
+    """
+    cutoff = timezone.now() - timedelta(seconds=stale_after)
+    stale = Job.objects.filter(status=Job.RUNNING, heartbeat_at__lt=cutoff)
+    if worker:
+        stale = stale.exclude(worker=worker)
+    recovered = 0
+    for pk, attempts, max_attempts, claimed_by in stale.values_list('pk', 'attempts', 'max_attempts', 'worker'):
+        recovered += record_failure(pk, attempts, max_attempts, f"Worker stopped reporting for {stale_after}s.", claimed_by)
+    return recovered
+
+
+def heartbeat(worker):
+    # The running jobs of `worker` are alive, whether or not their tasks report progress
+    return Job.objects.filter(status=Job.RUNNING, worker=worker).update(heartbeat_at=timezone.now())
+
+
+class Heartbeat(threading.Thread):
+    """
+    Calls heartbeat(worker) every `interval` seconds, on its own thread and
+    database connection, until stop(). run_worker keeps one going so a long
+    task that never calls progress() isn't taken for stale and run twice.
+    """
+
+    def __init__(self, worker, interval=HEARTBEAT_INTERVAL):
+        super().__init__(name=f'heartbeat-{worker}', daemon=True)
+        self.worker = worker
+        self.interval = interval
+        self.stopped = threading.Event()
+
+    def run(self):
+        try:
+            while not self.stopped.wait(self.interval):
+                try:
+                    heartbeat(self.worker)
+                except DatabaseError:
+                    # Try again next time; a few missed beats are within stale_after
+                    connection.close()
+        finally:
+            connection.close()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+# --- Running ---
+class JobProgress:
+    """
+    Handed to each task as its first argument. Calling it records progress
+    (and a heartbeat) on the Job row, at most every PROGRESS_INTERVAL
+    seconds unless the count is final.
+    """
+
+    def __init__(self, job):
+        self.job_id = job.pk
+        self.last_write = 0.0
+
+    def __call__(self, done, total=None, message=None):
+        now = time.monotonic()
+        if now - self.last_write < PROGRESS_INTERVAL and done != total:
+            return
+        self.last_write = now
+        values = {'progress_done': done, 'heartbeat_at': timezone.now()}
+        if total is not None:
+            values['progress_total'] = total
+        if message is not None:
+            values['message'] = message[:255]
+        Job.objects.filter(pk=self.job_id).update(**values)
+
+
+def _claimed(pk, attempts, worker):
+    # The job as `worker` claimed it for this attempt; a no-op once it was requeued, reclaimed or finished
+    return Job.objects.filter(pk=pk, status=Job.RUNNING, worker=worker, attempts=attempts)
+
+
+def record_failure(pk, attempts, max_attempts, error, worker):
+    """
+    Fails attempt `attempts` of the job `worker` is running, queueing a
+    retry if any are left. Returns 1, or 0 if that claim no longer holds.
+    """
+    # Retries back off exponentially: JOB_RETRY_DELAY, then twice that, ...
+    now = timezone.now()
+    if attempts < max_attempts:
+        delay = settings.JOB_RETRY_DELAY * 2 ** (attempts - 1)
+        return _claimed(pk, attempts, worker).update(
+            status=Job.QUEUED, error=error, run_after=now + timedelta(seconds=delay),
+            message=f"Attempt {attempts} of {max_attempts} failed; retrying in {delay}s.",
+        )
+    return _claimed(pk, attempts, worker).update(
+        status=Job.FAILED, error=error, finished_at=now,
+        message=f"Failed after {attempts} attempt{'s' if attempts != 1 else ''}.",
+    )
+
+
+def execute_job(pk):
+    """
+    Runs a claimed job in the current process and records the outcome.
+    Returns the job's new status.
+    """
+    job = Job.objects.get(pk=pk)
+    try:
+        func = TASKS[job.task]
+        result = func(JobProgress(job), **job.params)
+    except JobAborted as error:
+        # No retries: fail this attempt as if it were the last
+        record_failure(job.pk, job.attempts, job.attempts, str(error), job.worker)
+    except Exception:
+        record_failure(job.pk, job.attempts, job.max_attempts, traceback.format_exc(), job.worker)
+    else:
+        _claimed(job.pk, job.attempts, job.worker).update(
+            status=Job.SUCCEEDED, result=result, error='', message='Done.', finished_at=timezone.now(),
+            progress_done=Coalesce(F('progress_total'), F('progress_done')),
+        )
+    return Job.objects.values_list('status', flat=True).get(pk=pk)
+
+
+def run_pending(worker='inline', limit=None):
+    """
+    Runs due jobs one after another in this process until the queue is
+    empty (or `limit` jobs have run). Returns the number of jobs run.
+    """
+    ran = 0
+    while limit is None or ran < limit:
+        pk = claim_next(worker)
+        if pk is None:
+            break
+        execute_job(pk)
+        ran += 1
+    return ran
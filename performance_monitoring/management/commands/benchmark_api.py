@@ -0,0 +1,198 @@
+import http.client
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.urls import reverse
+
+from performance_monitoring.benchmarks import benchmark_database, seed_dataset
+from performance_monitoring.models import Department, Student
+
+SERVER_START_TIMEOUT = 30
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def database_url(settings_dict):
+    # Lets the server processes open the benchmark database the command created
+    if settings_dict['ENGINE'].endswith('sqlite3'):
+        return f"sqlite:///{settings_dict['NAME']}"
+    return "postgres://{USER}:{PASSWORD}@{HOST}:{PORT}/{NAME}".format(**settings_dict)
+
+
+@contextmanager
+def server(command, port, env):
+    process = subprocess.Popen(command, cwd=settings.BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    try:
+        deadline = time.monotonic() + SERVER_START_TIMEOUT
+        while True:
+            if process.poll() is not None:
+                raise CommandError(f"{command[2]} exited: {process.stderr.read().decode()[-2000:]}")
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=0.2).close()
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise CommandError(f"{command[2]} did not start within {SERVER_START_TIMEOUT}s.")
+                time.sleep(0.1)
+        yield
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def load_test(port, path, cookie, duration, concurrency):
+    """
+    `concurrency` threads each request `path` over a keep-alive connection
+    for `duration` seconds. Returns throughput and latency percentiles.
+    """
+    latencies, errors = [], []
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def worker():
+        client = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        local_latencies, local_errors = [], 0
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            try:
+                client.request('GET', path, headers={'Cookie': cookie})
+                response = client.getresponse()
+                response.read()
+                if response.status != 200:
+                    local_errors += 1
+            except (OSError, http.client.HTTPException):
+                local_errors += 1
+                client.close()
+                client = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+                continue
+            local_latencies.append((time.perf_counter() - started) * 1000)
+        client.close()
+        with lock:
+            latencies.extend(local_latencies)
+            errors.append(local_errors)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': sum(errors),
+        'rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(statistics.median(latencies), 2) if latencies else None,
+        'p95_ms': round(latencies[int(0.95 * (len(latencies) - 1))], 2) if latencies else None,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway database, serve it with uvicorn (ASGI) and gunicorn (WSGI) and compare "
+        "requests per second for the async JSON API and the template dashboards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--departments', type=int, default=2)
+        parser.add_argument('--students', type=int, default=200, help="Students per department.")
+        parser.add_argument('--duration', type=float, default=10, help="Seconds of load per target.")
+        parser.add_argument('--concurrency', type=int, default=16, help="Concurrent client connections.")
+        parser.add_argument('--workers', type=int, default=1, help="Server worker processes for each server.")
+        parser.add_argument('--json', dest='json_path', help="Also write the results to this JSON file.")
+
+    def handle(self, *args, **options):
+        for module in ('uvicorn', 'gunicorn'):
+            try:
+                __import__(module)
+            except ImportError:
+                raise CommandError(f"The benchmark needs {module} installed.")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            if connection.vendor == 'sqlite':
+                # The default in-memory test database can't be shared with the servers
+                connection.settings_dict.setdefault('TEST', {})['NAME'] = os.path.join(tmp, 'benchmark.sqlite3')
+            with benchmark_database():
+                dataset = seed_dataset(departments=options['departments'], students_per_department=options['students'])
+                self.stdout.write(f"Seeded {dataset}")
+                results = self.run_servers(options)
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"\n{options['concurrency']} connections, {options['workers']} worker(s), {options['duration']:g}s per target"
+        ))
+        for row in results:
+            self.stdout.write(
+                f"  {row['server']:<18} {row['target']:<28} {row['rps']:>8.1f} req/s  "
+                f"p50 {row['p50_ms'] or 0:>8.2f} ms  p95 {row['p95_ms'] or 0:>8.2f} ms  errors {row['errors']}"
+            )
+        if options['json_path']:
+            with open(options['json_path'], 'w') as output:
+                json.dump({'dataset': dataset, 'options': {k: options[k] for k in ('concurrency', 'workers', 'duration')}, 'results': results}, output, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"\nWrote {options['json_path']}"))
+
+    def cookies(self):
+        department = Department.objects.order_by('pk').first()
+        student = Student.objects.filter(department=department).order_by('pk').first()
+        cookies = {}
+        for role, values in (('student', {'student_id': student.student_id}), ('department', {'department_id': department.pk})):
+            session = SessionStore()
+            session.update(values)
+            session.create()
+            cookies[role] = f'{settings.SESSION_COOKIE_NAME}={session.session_key}'
+        return department, student, cookies
+
+    def run_servers(self, options):
+        department, student, cookies = self.cookies()
+        api_paths = [
+            ('api department summary', reverse('api_department_summary', args=[department.pk]), cookies['department']),
+            ('api student transcript', reverse('api_student_transcript', args=[student.student_id]), cookies['student']),
+        ]
+        template_paths = [
+            ('department dashboard', reverse('department_dashboard'), cookies['department']),
+            ('student dashboard', reverse('student_dashboard'), cookies['student']),
+        ]
+
+        env = {**os.environ, 'DATABASE_URL': database_url(connection.settings_dict)}
+        workers = str(options['workers'])
+        asgi_port, wsgi_port = free_port(), free_port()
+        servers = [
+            ('uvicorn (ASGI)', asgi_port, api_paths, [
+                sys.executable, '-m', 'uvicorn', 'student_performance_system.asgi:application',
+                '--port', str(asgi_port), '--workers', workers, '--log-level', 'warning', '--no-access-log',
+            ]),
+            # The WSGI server gets the API too, as a like-for-like baseline
+            ('gunicorn (WSGI)', wsgi_port, template_paths + api_paths, [
+                sys.executable, '-m', 'gunicorn', 'student_performance_system.wsgi',
+                '--bind', f'127.0.0.1:{wsgi_port}', '--workers', workers, '--log-level', 'warning',
+            ]),
+        ]
+
+        results = []
+        for name, port, paths, command in servers:
+            with server(command, port, env):
+                for target, path, cookie in paths:
+                    self.stdout.write(f"  {name}: {target}...")
+                    result = load_test(port, path, cookie, options['duration'], options['concurrency'])
+                    results.append({'server': name, 'target': target, 'path': path, **result})
+        return results
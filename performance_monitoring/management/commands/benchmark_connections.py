@@ -0,0 +1,136 @@
+import json
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.handlers.wsgi import WSGIRequest
+from django.core.management.base import BaseCommand
+from django.core.signals import request_finished, request_started
+from django.db import connection, connections
+from django.db.backends.signals import connection_created
+from django.test import RequestFactory, override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from performance_monitoring import views
+from performance_monitoring.benchmarks import benchmark_database, percentile, run_threads, seed_dataset
+from performance_monitoring.caching import get_cache
+from performance_monitoring.models import Student
+
+# (label, CONN_MAX_AGE, CONN_HEALTH_CHECKS, SQLite pragmas on)
+SCENARIOS = (
+    ('connection per request', 0, False, True),
+    ('persistent', 600, False, True),
+    ('persistent + health checks', 600, True, True),
+)
+SQLITE_SCENARIOS = (
+    ('persistent, no pragmas', 600, True, False),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway copy of the configured database and replay concurrent student report requests "
+        "under each connection setting (per-request vs persistent connections, health checks and, on "
+        "SQLite, the SQLITE_PRAGMAS). Point DATABASE_URL at a local Postgres to measure that instead."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8, help="Concurrent request threads (gunicorn workers x threads).")
+        parser.add_argument('--requests', type=int, default=50, help="Requests per thread per scenario.")
+        parser.add_argument('--students', type=int, default=200, help="Students per department.")
+        parser.add_argument('--json', dest='json_path', help="Also write the results to this JSON file.")
+
+    def handle(self, *args, **options):
+        self.opened = 0
+        self.lock = threading.Lock()
+        connection_created.connect(self.count_connection)
+        scenarios = SCENARIOS + (SQLITE_SCENARIOS if connection.vendor == 'sqlite' else ())
+        results = []
+        setup_test_environment()
+        try:
+            with tempfile.TemporaryDirectory() as directory, override_settings(
+                STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+            ), benchmark_database(sqlite_file=os.path.join(directory, 'benchmark.sqlite3')):
+                seed_dataset(departments=2, students_per_department=options['students'])
+                student_ids = list(Student.objects.values_list('student_id', flat=True))
+                # Every thread opens its own connection from here on
+                connections.close_all()
+                for scenario in scenarios:
+                    self.stdout.write(f"  {scenario[0]}...")
+                    results.append(self.run_scenario(scenario, student_ids, options))
+        finally:
+            teardown_test_environment()
+            connection_created.disconnect(self.count_connection)
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"\n{connection.vendor}: {options['threads']} threads x {options['requests']} student report requests"
+        ))
+        for row in results:
+            self.stdout.write(
+                f"  {row['scenario']:<28} {row['per_second']:>8.1f} req/s  p50 {row['p50_ms']:>7.2f} ms  "
+                f"p95 {row['p95_ms']:>7.2f} ms  connections opened {row['connections_opened']}"
+            )
+        if options['json_path']:
+            with open(options['json_path'], 'w') as output:
+                json.dump({
+                    'vendor': connection.vendor,
+                    'options': {k: options[k] for k in ('threads', 'requests', 'students')},
+                    'results': results,
+                }, output, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"\nWrote {options['json_path']}"))
+
+    def count_connection(self, sender, **kwargs):
+        with self.lock:
+            self.opened += 1
+
+    def run_scenario(self, scenario, student_ids, options):
+        label, max_age, health_checks, pragmas = scenario
+        # New connections in every thread are built from these settings
+        connections.settings['default'].update(CONN_MAX_AGE=max_age, CONN_HEALTH_CHECKS=health_checks)
+        get_cache().clear()
+        self.opened = 0
+        factory = RequestFactory()
+
+        def worker(index):
+            latencies = []
+            for number in range(options['requests']):
+                student_id = student_ids[(index * options['requests'] + number) % len(student_ids)]
+                started = time.perf_counter()
+                self.request(factory, student_id)
+                latencies.append((time.perf_counter() - started) * 1000)
+            return latencies
+
+        # The journal mode sticks to the database file, so turn WAL back off
+        overrides = {} if pragmas else {'SQLITE_PRAGMAS': {'journal_mode': 'DELETE'}}
+        with override_settings(**overrides):
+            started = time.perf_counter()
+            latencies = [value for thread in run_threads(options['threads'], worker) for value in thread]
+            elapsed = time.perf_counter() - started
+        return {
+            'scenario': label,
+            'conn_max_age': max_age,
+            'health_checks': health_checks,
+            'sqlite_pragmas': pragmas if connection.vendor == 'sqlite' else None,
+            'requests': len(latencies),
+            'per_second': round(len(latencies) / elapsed, 1),
+            'p50_ms': round(statistics.median(latencies), 2),
+            'p95_ms': round(percentile(latencies, 0.95), 2),
+            'connections_opened': self.opened,
+        }
+
+    def request(self, factory, student_id):
+        # The request_started / request_finished signals are what close or
+        # keep connections between requests, as under gunicorn
+        request = factory.get(f'/student_report/{student_id}/')
+        request.session = {}
+        request.user = AnonymousUser()
+        request_started.send(sender=WSGIRequest, environ=request.environ)
+        try:
+            response = views.student_performance_report(request, student_id)
+            if response.status_code != 200:
+                raise RuntimeError(f"HTTP {response.status_code} for {student_id}")
+        finally:
+            request_finished.send(sender=WSGIRequest)
@@ -0,0 +1,101 @@
+import json
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from performance_monitoring.aggregates import department_course_rows, summary_totals
+from performance_monitoring.benchmarks import benchmark_database, seed_dataset, time_call
+from performance_monitoring.models import Course, Department, Enrollment, Semester, Student
+from performance_monitoring.search import DEFAULT_PAGE_SIZE, search_queryset
+from performance_monitoring.transcripts import TranscriptService
+
+# Indexes added for the dashboard access paths (see the model Meta classes)
+BENCHMARKED_INDEXES = (
+    (Enrollment, 'enrollment_student_sem_idx'),
+    (Enrollment, 'enrollment_course_student_idx'),
+    (Enrollment, 'enrollment_sem_course_idx'),
+    (Course, 'course_dept_code_idx'),
+    (Course, 'course_dept_semester_idx'),
+    (Student, 'student_dept_matric_idx'),
+    (Student, 'student_dept_name_idx'),
+)
+
+
+def dashboard_queries():
+    # (label, queryset) pairs mirroring what the views and helpers run
+    department = Department.objects.order_by('pk').first()
+    student = Student.objects.filter(department=department).order_by('student_id').last()
+    semester = Semester.objects.order_by('pk').last()
+    course_ids = list(Course.objects.filter(department=department, semester=semester).values_list('pk', flat=True))
+    return [
+        ('student transcript', TranscriptService(student).enrollment_rows()),
+        ('department course counts', department_course_rows(department)),
+        ('student search page', search_queryset(department, query='Student 1-1')[:DEFAULT_PAGE_SIZE]),
+        ('semester summary refresh', Enrollment.objects.filter(student=student, semester=semester).values('student').annotate(**summary_totals(prefix=''))),
+        ('bulk enroll existing check', Enrollment.objects.filter(semester=semester, course_id__in=course_ids).values_list('student_id', 'course_id')),
+        ('semester courses per department', Course.objects.filter(department=department, semester=semester).values_list('pk', flat=True)),
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway database and compare EXPLAIN plans and timings for the "
+        "dashboard queries with and without the composite indexes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--departments', type=int, default=4)
+        parser.add_argument('--students', type=int, default=1000, help="Students per department.")
+        parser.add_argument('--courses', type=int, default=6, help="Courses per department per semester.")
+        parser.add_argument('--years', type=int, default=2, help="Academic years (two semesters each).")
+        parser.add_argument('--repeat', type=int, default=20, help="Timed runs per query (median is reported).")
+        parser.add_argument('--json', dest='json_path', help="Also write the results to this JSON file.")
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            counts = seed_dataset(
+                departments=options['departments'], students_per_department=options['students'],
+                courses_per_semester=options['courses'], academic_years=options['years'],
+            )
+            self.stdout.write(f"Seeded {counts}")
+
+            with_indexes = self.measure(options['repeat'])
+            with connection.schema_editor() as editor:
+                for model, name in BENCHMARKED_INDEXES:
+                    editor.remove_index(model, self.get_index(model, name))
+            without_indexes = self.measure(options['repeat'])
+
+        report = {'dataset': counts, 'vendor': connection.vendor, 'queries': []}
+        for label, (after_ms, after_plan) in with_indexes.items():
+            before_ms, before_plan = without_indexes[label]
+            report['queries'].append({
+                'query': label,
+                'without_indexes_ms': round(before_ms, 3),
+                'with_indexes_ms': round(after_ms, 3),
+                'plan_without_indexes': before_plan,
+                'plan_with_indexes': after_plan,
+            })
+            self.stdout.write(self.style.MIGRATE_HEADING(f"\n{label}: {before_ms:.2f} ms -> {after_ms:.2f} ms"))
+            self.stdout.write("  without indexes:\n" + self.indent(before_plan))
+            self.stdout.write("  with indexes:\n" + self.indent(after_plan))
+
+        if options['json_path']:
+            with open(options['json_path'], 'w') as output:
+                json.dump(report, output, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"\nWrote {options['json_path']}"))
+
+    def measure(self, repeat):
+        results = {}
+        for label, queryset in dashboard_queries():
+            plan = queryset.explain()
+            elapsed = time_call(lambda: list(queryset.all()), repeat=repeat)
+            results[label] = (elapsed, plan)
+        return results
+
+    @staticmethod
+    def get_index(model, name):
+        return next(index for index in model._meta.indexes if index.name == name)
+
+    @staticmethod
+    def indent(text):
+        return "\n".join(f"    {line}" for line in text.splitlines())
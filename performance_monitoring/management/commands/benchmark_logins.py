@@ -0,0 +1,157 @@
+import itertools
+import json
+import statistics
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from performance_monitoring.benchmarks import benchmark_database, seed_dataset
+from performance_monitoring.caching import get_cache
+from performance_monitoring.credentials import hash_credential
+from performance_monitoring.models import Student
+
+PASSWORD = 'correct horse'
+
+# Limits high enough that nothing is ever throttled
+UNTHROTTLED = {'LOGIN_THROTTLE_ACCOUNT_ATTEMPTS': 10 ** 9, 'LOGIN_THROTTLE_IP_ATTEMPTS': 10 ** 9}
+
+
+@contextmanager
+def count_queries():
+    counter = {'queries': 0}
+
+    def wrapper(execute, sql, params, many, context):
+        counter['queries'] += 1
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(wrapper):
+        yield counter
+
+
+def summarise(latencies, statuses, queries, elapsed):
+    latencies = sorted(latencies)
+    return {
+        'attempts': len(latencies),
+        'per_second': round(len(latencies) / elapsed, 1) if elapsed else None,
+        'p50_ms': round(statistics.median(latencies), 2),
+        'p95_ms': round(latencies[int(0.95 * (len(latencies) - 1))], 2),
+        'queries_per_attempt': round(queries / len(latencies), 2),
+        'statuses': dict(sorted(Counter(statuses).items())),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway database and measure student login throughput and latency for legitimate "
+        "logins, a brute-force burst and legitimate logins during the burst, with and without throttling."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=100, help="Students with passwords (one legitimate login each).")
+        parser.add_argument('--attempts', type=int, default=200, help="Wrong-password attempts in the burst.")
+        parser.add_argument('--targets', type=int, default=5, help="Matric numbers the burst cycles through.")
+        parser.add_argument('--attackers', type=int, default=1, help="Distinct IP addresses the burst comes from.")
+        parser.add_argument('--json', dest='json_path', help="Also write the results to this JSON file.")
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        results = []
+        try:
+            with override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage'), benchmark_database():
+                seed_dataset(departments=1, students_per_department=options['students'], courses_per_semester=1, academic_years=1)
+                # One hash for everyone keeps seeding quick; legacy plaintext rows are covered by the tests
+                Student.objects.update(custom_password=hash_credential(PASSWORD))
+                matric_numbers = list(Student.objects.order_by('pk').values_list('student_id', flat=True))
+                for throttled in (False, True):
+                    with override_settings(**({} if throttled else UNTHROTTLED)):
+                        results.extend(self.run_phases(matric_numbers, options, throttled))
+        finally:
+            teardown_test_environment()
+
+        self.stdout.write(self.style.MIGRATE_HEADING("\nLogin benchmark"))
+        for row in results:
+            self.stdout.write(
+                f"  {'throttled' if row['throttled'] else 'unthrottled':<12} {row['phase']:<26} {row['attempts']:>5} attempts "
+                f"{row['per_second'] or 0:>8.1f}/s  p50 {row['p50_ms']:>8.2f} ms  p95 {row['p95_ms']:>8.2f} ms  "
+                f"{row['queries_per_attempt']:>5.2f} queries/attempt  {row['statuses']}"
+            )
+        if options['json_path']:
+            with open(options['json_path'], 'w') as output:
+                json.dump({'options': {k: options[k] for k in ('students', 'attempts', 'targets', 'attackers')}, 'results': results}, output, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"\nWrote {options['json_path']}"))
+
+    def attempt(self, client, matric_number, password, ip):
+        started = time.perf_counter()
+        response = client.post(
+            reverse('student_login'), {'matriculation_number': matric_number, 'password': password}, REMOTE_ADDR=ip,
+        )
+        return (time.perf_counter() - started) * 1000, response.status_code
+
+    def run_phase(self, attempts):
+        """
+        Runs (client, matric, password, ip, recorded) attempts in order and
+        summarises the recorded ones.
+        """
+        latencies, statuses = [], []
+        with count_queries() as counter:
+            started = time.perf_counter()
+            queries_before = 0
+            recorded_queries = 0
+            for client, matric_number, password, ip, recorded in attempts:
+                latency, status = self.attempt(client, matric_number, password, ip)
+                if recorded:
+                    latencies.append(latency)
+                    statuses.append(status)
+                    recorded_queries += counter['queries'] - queries_before
+                queries_before = counter['queries']
+            elapsed = time.perf_counter() - started
+        return summarise(latencies, statuses, recorded_queries, elapsed)
+
+    def run_phases(self, matric_numbers, options, throttled):
+        label = 'throttled' if throttled else 'unthrottled'
+        targets = matric_numbers[:options['targets']]
+        attacker_ips = [f'10.66.{i // 250}.{i % 250 + 1}' for i in range(options['attackers'])]
+
+        def legitimate(recorded=True):
+            # A fresh client per student, each from their own address
+            return (
+                (Client(), matric_number, PASSWORD, f'10.1.{i // 250}.{i % 250 + 1}', recorded)
+                for i, matric_number in enumerate(matric_numbers)
+            )
+
+        def burst(recorded=True):
+            client = Client()
+            pairs = zip(itertools.cycle(targets), itertools.cycle(attacker_ips))
+            return (
+                (client, matric_number, f'guess-{i}', ip, recorded)
+                for i, (matric_number, ip) in zip(range(options['attempts']), pairs)
+            )
+
+        phases = []
+        get_cache().clear()
+        self.stdout.write(f"  {label}: legitimate logins...")
+        phases.append(('legitimate logins', self.run_phase(legitimate())))
+
+        get_cache().clear()
+        self.stdout.write(f"  {label}: brute-force burst...")
+        phases.append(('brute-force burst', self.run_phase(burst())))
+
+        # The burst keeps going; one legitimate login after every few guesses
+        get_cache().clear()
+        self.stdout.write(f"  {label}: legitimate during burst...")
+        every = max(options['attempts'] // max(len(matric_numbers), 1), 1)
+        mixed = []
+        legit = legitimate()
+        for i, guess in enumerate(burst(recorded=False)):
+            mixed.append(guess)
+            if i % every == every - 1:
+                mixed.extend(itertools.islice(legit, 1))
+        phases.append(('legitimate during burst', self.run_phase(mixed)))
+
+        return [{'throttled': throttled, 'phase': phase, **result} for phase, result in phases]
@@ -0,0 +1,96 @@
+import json
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from performance_monitoring.benchmarks import benchmark_database, profile_request, seed_dataset
+from performance_monitoring.caching import get_cache
+from performance_monitoring.credentials import hash_credential
+from performance_monitoring.models import Student
+
+PASSWORD = 'benchmark'
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway database and measure the per-request session overhead of student_dashboard "
+        "(time, django_session queries, cookie size) under each SESSION_BACKEND."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--backends', default=','.join(settings.SESSION_ENGINES), help="Comma-separated SESSION_BACKEND names.")
+        parser.add_argument('--students', type=int, default=200, help="Students per department.")
+        parser.add_argument('--repeat', type=int, default=50, help="Timed requests per backend (median is reported).")
+        parser.add_argument('--json', dest='json_path', help="Also write the results to this JSON file.")
+
+    def handle(self, *args, **options):
+        backends = [name.strip() for name in options['backends'].split(',') if name.strip()]
+        unknown = set(backends) - set(settings.SESSION_ENGINES)
+        if unknown:
+            raise CommandError(f"Unknown backend(s): {', '.join(sorted(unknown))}. Choose from {', '.join(settings.SESSION_ENGINES)}.")
+
+        results = []
+        setup_test_environment()
+        try:
+            # A cheap hasher so logins measure the session write, not the password hash
+            with override_settings(
+                STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+                PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'], CREDENTIAL_HASHER='md5',
+            ), benchmark_database():
+                seed_dataset(departments=1, students_per_department=options['students'])
+                student = Student.objects.order_by('pk').first()
+                Student.objects.filter(pk=student.pk).update(custom_password=hash_credential(PASSWORD))
+                for backend in backends:
+                    with override_settings(SESSION_ENGINE=settings.SESSION_ENGINES[backend]):
+                        self.stdout.write(f"  {backend}...")
+                        results.append({'backend': backend, **self.measure(student, options['repeat'])})
+        finally:
+            teardown_test_environment()
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f"\nstudent_dashboard, {options['repeat']} requests per backend (transcript cache warm)"))
+        for row in results:
+            self.stdout.write(
+                f"  {row['backend']:<15} login {row['login_ms']:>7.2f} ms  dashboard {row['dashboard_ms']:>7.2f} ms "
+                f"(min {row['dashboard_min_ms']:>7.2f})  session queries/request {row['session_queries']}  "
+                f"total queries {row['queries']}  cookie {row['cookie_bytes']} B"
+            )
+        if options['json_path']:
+            with open(options['json_path'], 'w') as output:
+                json.dump({'options': {k: options[k] for k in ('students', 'repeat')}, 'results': results}, output, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"\nWrote {options['json_path']}"))
+
+    def measure(self, student, repeat):
+        get_cache().clear()
+        client = Client()
+        logins = []
+        for _ in range(5):
+            client.cookies.clear()
+            started = time.perf_counter()
+            response = client.post(reverse('student_login'), {'matriculation_number': student.student_id, 'password': PASSWORD})
+            logins.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 302:
+                raise CommandError(f"Login failed with HTTP {response.status_code}.")
+
+        url = reverse('student_dashboard')
+        client.get(url)  # warm the transcript cache
+        metrics = profile_request(client, url, repeat=repeat)
+
+        reset_queries()
+        with CaptureQueriesContext(connection) as queries:
+            client.get(url)
+        session_queries = sum('django_session' in query['sql'] for query in queries.captured_queries)
+
+        return {
+            'login_ms': round(statistics.median(logins), 3),
+            'dashboard_ms': metrics['median_ms'],
+            'dashboard_min_ms': metrics['min_ms'],
+            'queries': metrics['queries'],
+            'session_queries': session_queries,
+            'cookie_bytes': len(client.cookies[settings.SESSION_COOKIE_NAME].value),
+        }
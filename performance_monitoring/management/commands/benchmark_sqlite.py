@@ -0,0 +1,128 @@
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections, transaction
+from django.test import override_settings
+
+from performance_monitoring.benchmarks import benchmark_database, percentile, run_threads, seed_dataset
+from performance_monitoring.models import Enrollment, Student
+from performance_monitoring.rankings import department_leaderboard
+from performance_monitoring.transcripts import TranscriptService
+
+# The journal mode sticks to the database file, so the baseline sets it back
+BASELINE_PRAGMAS = {'journal_mode': 'DELETE'}
+
+
+def summarise(samples, errors, elapsed):
+    return {
+        'ok': len(samples),
+        'errors': errors,
+        'per_second': round(len(samples) / elapsed, 1),
+        'p50_ms': round(statistics.median(samples), 2) if samples else None,
+        'p95_ms': round(percentile(samples, 0.95), 2) if samples else None,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway SQLite database file and run concurrent score edits (writers) and transcript "
+        "reads (readers) against Enrollment under each SQLITE_PROFILE, counting 'database is locked' errors."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profiles', default=','.join(reversed(list(settings.SQLITE_PROFILES))), help="Comma-separated SQLITE_PROFILES to compare.")
+        parser.add_argument('--writers', type=int, default=4, help="Threads editing scores.")
+        parser.add_argument('--readers', type=int, default=8, help="Threads reading transcripts and leaderboards.")
+        parser.add_argument('--seconds', type=float, default=5.0, help="Run time per profile.")
+        parser.add_argument('--students', type=int, default=200, help="Students per department.")
+        parser.add_argument('--json', dest='json_path', help="Also write the results to this JSON file.")
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError("The configured database is not SQLite.")
+        profiles = [name.strip() for name in options['profiles'].split(',') if name.strip()]
+        unknown = set(profiles) - set(settings.SQLITE_PROFILES)
+        if unknown:
+            raise CommandError(f"Unknown profile(s): {', '.join(sorted(unknown))}. Choose from {', '.join(settings.SQLITE_PROFILES)}.")
+
+        results = []
+        with tempfile.TemporaryDirectory() as directory, benchmark_database(sqlite_file=os.path.join(directory, 'benchmark.sqlite3')):
+            seed_dataset(departments=2, students_per_department=options['students'])
+            students = list(Student.objects.values_list('pk', 'department_id'))
+            enrollment_ids = list(Enrollment.objects.values_list('pk', flat=True))
+            for profile in profiles:
+                self.stdout.write(f"  {profile}...")
+                results.append({'profile': profile, **self.run_profile(profile, students, enrollment_ids, options)})
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"\n{options['writers']} writers + {options['readers']} readers, {options['seconds']:g} s per profile"
+        ))
+        for row in results:
+            for role in ('writes', 'reads'):
+                stats = row[role]
+                self.stdout.write(
+                    f"  {row['profile']:<10} {role:<6} {stats['ok']:>6} ok {stats['per_second']:>8.1f}/s  "
+                    f"p50 {stats['p50_ms'] or 0:>8.2f} ms  p95 {stats['p95_ms'] or 0:>8.2f} ms  "
+                    f"locked errors {stats['errors']}"
+                )
+        if options['json_path']:
+            with open(options['json_path'], 'w') as output:
+                json.dump({
+                    'options': {k: options[k] for k in ('writers', 'readers', 'seconds', 'students')},
+                    'results': results,
+                }, output, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"\nWrote {options['json_path']}"))
+
+    def run_profile(self, profile, students, enrollment_ids, options):
+        pragmas = settings.SQLITE_PROFILES[profile] or BASELINE_PRAGMAS
+        # Threads open new connections with this engine and these pragmas
+        connections.close_all()
+        connections.settings['default']['ENGINE'] = settings.SQLITE_ENGINES[profile]
+        deadline = time.perf_counter() + options['seconds']
+
+        def write(rng):
+            with transaction.atomic():
+                enrollment = Enrollment.objects.get(pk=rng.choice(enrollment_ids))
+                enrollment.exam_score = rng.randint(0, 70)
+                enrollment.save()  # and the summary / ranking refresh it triggers
+
+        def read(rng):
+            student_pk, department_id = rng.choice(students)
+            TranscriptService.for_student(Student(pk=student_pk))
+            department_leaderboard(department_id)
+
+        def worker(index):
+            is_writer = index < options['writers']
+            operation = write if is_writer else read
+            rng = random.Random(index)
+            samples, errors = [], 0
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    operation(rng)
+                except OperationalError as error:
+                    if 'locked' not in str(error):
+                        raise
+                    errors += 1
+                else:
+                    samples.append((time.perf_counter() - started) * 1000)
+            return is_writer, samples, errors
+
+        with override_settings(SQLITE_PRAGMAS=pragmas):
+            started = time.perf_counter()
+            outcome = run_threads(options['writers'] + options['readers'], worker)
+            elapsed = time.perf_counter() - started
+        connections.close_all()
+
+        result = {}
+        for role, is_writer in (('writes', True), ('reads', False)):
+            samples = [value for writer, thread_samples, _ in outcome if writer == is_writer for value in thread_samples]
+            errors = sum(thread_errors for writer, _, thread_errors in outcome if writer == is_writer)
+            result[role] = summarise(samples, errors, elapsed)
+        return result
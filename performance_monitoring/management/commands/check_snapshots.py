@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from performance_monitoring.models import Student
+from performance_monitoring.snapshots import check_snapshots, freeze_semester
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the snapshots of every frozen semester with the live enrollments and report students whose "
+        "snapshot is missing, orphaned, in an old format or different. Exits with an error if any are found."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--refreeze', action='store_true', help="Freeze the semesters with problems again from the live data.")
+
+    def handle(self, *args, **options):
+        report = check_snapshots()
+        if not report:
+            self.stdout.write(self.style.SUCCESS("All snapshots match the live data."))
+            return
+
+        student_ids = {student_id for problems in report.values() for student_id, _, _ in problems}
+        matric = dict(Student.objects.filter(pk__in=student_ids).values_list('pk', 'student_id'))
+        for semester, problems in report.items():
+            self.stdout.write(self.style.MIGRATE_HEADING(f"{semester}: {len(problems)} problem(s)"))
+            for student_id, problem, keys in problems:
+                detail = f" ({', '.join(keys)})" if keys else ''
+                self.stdout.write(f"  {matric.get(student_id, f'#{student_id}')}: {problem}{detail}")
+
+        if options['refreeze']:
+            for semester in report:
+                written = freeze_semester(semester)
+                self.stdout.write(self.style.SUCCESS(f"Refroze {semester}: {written} student snapshots."))
+            return
+        raise CommandError(f"{sum(len(problems) for problems in report.values())} snapshot problem(s) found.")
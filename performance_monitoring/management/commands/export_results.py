@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from performance_monitoring.exports import iter_csv, iter_export_rows, write_xlsx
+from performance_monitoring.models import Department
+
+
+class Command(BaseCommand):
+    help = "Export enrollment results (total, grade and student CGPA) as CSV or XLSX."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--department', type=int, help="Department id (default: all departments).")
+        parser.add_argument('--semester', help="Semester name, e.g. 'First'.")
+        parser.add_argument('--academic-year', type=int)
+        parser.add_argument('--format', choices=('csv', 'xlsx'), default='csv')
+        parser.add_argument('--output', help="Output file (default: stdout for CSV).")
+
+    def handle(self, *args, **options):
+        department = None
+        if options['department']:
+            try:
+                department = Department.objects.get(pk=options['department'])
+            except Department.DoesNotExist:
+                raise CommandError(f"Department {options['department']} does not exist.")
+
+        rows = iter_export_rows(department, options['semester'], options['academic_year'])
+
+        if options['format'] == 'xlsx':
+            if not options['output']:
+                raise CommandError("--output is required for XLSX exports.")
+            try:
+                source = write_xlsx(rows)
+            except ImportError:
+                raise CommandError("XLSX export needs the openpyxl package.")
+            with source, open(options['output'], 'wb') as target:
+                while chunk := source.read(64 * 1024):
+                    target.write(chunk)
+            return
+
+        if not options['output']:
+            for line in iter_csv(rows):
+                self.stdout.write(line, ending='')
+            return
+        with open(options['output'], 'w', newline='') as target:
+            target.writelines(iter_csv(rows))
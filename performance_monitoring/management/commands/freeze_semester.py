@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from performance_monitoring.jobs import enqueue
+from performance_monitoring.models import Semester
+from performance_monitoring.snapshots import freeze_semester, unfreeze_semester
+
+
+class Command(BaseCommand):
+    help = (
+        "Freeze (publish) a semester's results: store each enrolled student's semester table as a snapshot "
+        "that transcripts read instead of the live enrollments. Run it again to republish after corrections."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('academic_year', type=int)
+        parser.add_argument('semester_name')
+        parser.add_argument('--unfreeze', action='store_true', help="Delete the snapshots and go back to live results.")
+        parser.add_argument('--background', action='store_true', help="Queue it for run_worker and return.")
+
+    def handle(self, *args, **options):
+        try:
+            semester = Semester.objects.get(academic_year=options['academic_year'], name=options['semester_name'])
+        except Semester.DoesNotExist:
+            raise CommandError(f'Semester "{options["semester_name"]} {options["academic_year"]}" does not exist.')
+
+        if options['unfreeze']:
+            deleted = unfreeze_semester(semester)
+            self.stdout.write(self.style.SUCCESS(f"Unfroze {semester} ({deleted} snapshots deleted)."))
+        elif options['background']:
+            job = enqueue('freeze_semester', {'semester_id': semester.pk})
+            self.stdout.write(self.style.SUCCESS(f"Queued job {job.pk}."))
+        else:
+            written = freeze_semester(semester)
+            self.stdout.write(self.style.SUCCESS(f"Froze {semester}: {written} student snapshots."))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from performance_monitoring.imports import ScoreImportError, import_scores
+
+
+class Command(BaseCommand):
+    help = "Import CA/exam scores into existing enrollments from a CSV or XLSX file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV or XLSX file with student_id, course_code, ca_score, exam_score[, classes_attended].")
+        parser.add_argument('--dry-run', action='store_true', help="Validate and count changes without writing them.")
+        parser.add_argument('--chunk-size', type=int, default=2000, help="Rows resolved and written per batch.")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        try:
+            with open(path, 'rb') as file:
+                result = import_scores(file, path, chunk_size=options['chunk_size'], dry_run=options['dry_run'])
+        except (OSError, ScoreImportError) as error:
+            raise CommandError(str(error))
+
+        for line, message in result.errors:
+            self.stderr.write(f"Line {line}: {message}")
+        if result.error_count > len(result.errors):
+            self.stderr.write(f"... and {result.error_count - len(result.errors)} more errors.")
+
+        prefix = "[dry run] " if result.dry_run else ""
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix}{result.rows} rows read: {result.updated} updated, "
+            f"{result.unchanged} unchanged, {result.error_count} with errors."
+        ))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from performance_monitoring.db import optimize_database
+from performance_monitoring.jobs import enqueue
+
+
+class Command(BaseCommand):
+    help = (
+        "Refresh the query planner statistics (SQLite: PRAGMA optimize and a WAL checkpoint; "
+        "PostgreSQL: ANALYZE the app's tables). run_worker also does this on the PERIODIC_JOBS schedule."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help="SQLite: run a complete ANALYZE instead of PRAGMA optimize.")
+        parser.add_argument('--background', action='store_true', help="Queue it for run_worker and return.")
+
+    def handle(self, *args, **options):
+        if options['background']:
+            job = enqueue('optimize_database', {'full': options['full']})
+            self.stdout.write(self.style.SUCCESS(f"Queued job {job.pk}."))
+            return
+
+        result = optimize_database(full=options['full'])
+        for statement in result['statements']:
+            self.stdout.write(f"  {statement}")
+        self.stdout.write(self.style.SUCCESS(f"Optimized the {result['vendor']} database in {result['ms']} ms."))
@@ -0,0 +1,107 @@
+import json
+import statistics
+import sys
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+
+SORT_KEYS = ('p95', 'p50', 'max', 'total', 'queries', 'duplicates')
+
+
+def read_profiles(paths):
+    # Lines may carry a prefix (timestamps from the process manager); the JSON starts at the first '{'
+    for path in paths:
+        stream = sys.stdin if path == '-' else open(path)
+        try:
+            for line in stream:
+                start = line.find('{')
+                if start == -1:
+                    continue
+                try:
+                    record = json.loads(line[start:])
+                except ValueError:
+                    continue
+                if isinstance(record, dict) and 'total_ms' in record:
+                    yield record
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+
+def percentile(sorted_values, fraction):
+    index = min(int(round(fraction * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def summarise(profiles):
+    endpoints = defaultdict(list)
+    duplicates = defaultdict(lambda: {'executions': 0, 'requests': 0, 'views': set()})
+    for record in profiles:
+        endpoint = f"{record['method']} {record.get('view') or record['path']}"
+        endpoints[endpoint].append(record)
+        for duplicate in record.get('duplicates', ()):
+            entry = duplicates[duplicate['sql']]
+            entry['executions'] += duplicate['count']
+            entry['requests'] += 1
+            entry['views'].add(endpoint)
+
+    rows = []
+    for endpoint, records in endpoints.items():
+        timings = sorted(record['total_ms'] for record in records)
+        rows.append({
+            'endpoint': endpoint,
+            'requests': len(records),
+            'p50': percentile(timings, 0.5),
+            'p95': percentile(timings, 0.95),
+            'max': timings[-1],
+            'total': sum(timings),
+            'queries': statistics.mean(record['queries'] for record in records),
+            'db_ms': statistics.mean(record['db_ms'] for record in records),
+            'template_ms': statistics.mean(record['template_ms'] for record in records),
+            'duplicates': statistics.mean(record['duplicate_queries'] for record in records),
+        })
+    return rows, duplicates
+
+
+class Command(BaseCommand):
+    help = (
+        "Summarise request profiling logs (see performance_monitoring/middleware.py) into "
+        "the slowest endpoints and the most repeated queries."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('logs', nargs='+', help="Log files to read; '-' reads standard input.")
+        parser.add_argument('--top', type=int, default=10)
+        parser.add_argument('--sort', choices=SORT_KEYS, default='p95', help="Endpoint ordering (default: p95 wall time).")
+
+    def handle(self, *args, **options):
+        try:
+            rows, duplicates = summarise(read_profiles(options['logs']))
+        except OSError as exc:
+            raise CommandError(exc)
+        if not rows:
+            raise CommandError("No request profiles found in the given logs.")
+
+        top = options['top']
+        rows.sort(key=lambda row: row[options['sort']], reverse=True)
+        self.stdout.write(self.style.MIGRATE_HEADING(f"Slowest endpoints (by {options['sort']})"))
+        self.stdout.write(
+            f"  {'endpoint':<60} {'reqs':>6} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9} "
+            f"{'queries':>8} {'db ms':>8} {'tpl ms':>8} {'dup q':>6}"
+        )
+        for row in rows[:top]:
+            self.stdout.write(
+                f"  {row['endpoint'][:60]:<60} {row['requests']:>6} {row['p50']:>9.1f} {row['p95']:>9.1f} "
+                f"{row['max']:>9.1f} {row['queries']:>8.1f} {row['db_ms']:>8.1f} {row['template_ms']:>8.1f} "
+                f"{row['duplicates']:>6.1f}"
+            )
+
+        self.stdout.write(self.style.MIGRATE_HEADING("\nMost repeated queries"))
+        if not duplicates:
+            self.stdout.write("  None; no request ran the same statement twice.")
+        ranked = sorted(duplicates.items(), key=lambda item: item[1]['executions'], reverse=True)
+        for sql, entry in ranked[:top]:
+            self.stdout.write(
+                f"  {entry['executions']} executions in {entry['requests']} requests "
+                f"({', '.join(sorted(entry['views']))})\n    {sql}"
+            )
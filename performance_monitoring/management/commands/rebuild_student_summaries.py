@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from performance_monitoring.jobs import enqueue
+from performance_monitoring.models import Student
+from performance_monitoring.rankings import refresh_all_rankings, refresh_rankings
+from performance_monitoring.summaries import rebuild_student_summaries
+
+
+class Command(BaseCommand):
+    help = "Rebuild StudentSemesterSummary and StudentSummary rows from raw enrollments."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--department', type=int, help="Only rebuild students in this department (id).")
+        parser.add_argument('--chunk-size', type=int, default=500, help="Students rebuilt per transaction.")
+        parser.add_argument('--background', action='store_true', help="Queue the rebuild for run_worker and return.")
+        parser.add_argument('--rankings-only', action='store_true', help="Only recompute the class positions from the stored summaries.")
+
+    def handle(self, *args, **options):
+        if options['rankings_only']:
+            if options['department']:
+                updated = refresh_rankings([options['department']])
+            else:
+                updated = refresh_all_rankings()
+            self.stdout.write(self.style.SUCCESS(f"Updated {updated} class positions."))
+            return
+
+        if options['background']:
+            department_ids = [options['department']] if options['department'] else None
+            job = enqueue('rebuild_summaries', {'department_ids': department_ids})
+            self.stdout.write(self.style.SUCCESS(f"Queued job {job.pk}."))
+            return
+
+        student_ids = None
+        if options['department']:
+            student_ids = Student.objects.filter(department_id=options['department']).values_list('pk', flat=True)
+        rebuilt = rebuild_student_summaries(student_ids, chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt summaries for {rebuilt} students."))
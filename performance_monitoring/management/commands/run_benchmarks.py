@@ -0,0 +1,144 @@
+import datetime
+import json
+import subprocess
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from performance_monitoring.benchmarks import benchmark_database, profile_request, seed_dataset
+from performance_monitoring.caching import get_cache
+from performance_monitoring.models import Department, Student
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def logged_in_clients(department, student):
+    student_client = Client()
+    session = student_client.session
+    session['student_id'] = student.student_id
+    session['student_name'] = student.name
+    session.save()
+
+    department_client = Client()
+    session = department_client.session
+    session['department_id'] = department.pk
+    session['department_name'] = department.name
+    session.save()
+
+    admin_client = Client()
+    admin_client.force_login(User.objects.create_superuser('benchmark', 'benchmark@benchmark.invalid', 'benchmark'))
+    return student_client, department_client, admin_client
+
+
+def benchmark_targets(department, student):
+    student_client, department_client, admin_client = logged_in_clients(department, student)
+    return [
+        ('student_dashboard', student_client, reverse('student_dashboard')),
+        ('student_performance_report', department_client, reverse('student_performance_report', args=[student.student_id])),
+        ('department_dashboard', department_client, reverse('department_dashboard')),
+        ('department_student_search', department_client, reverse('department_student_search') + '?sort=cgpa&direction=desc'),
+        ('admin_enrollment_changelist', admin_client, reverse('admin:performance_monitoring_enrollment_changelist')),
+        ('admin_student_changelist', admin_client, reverse('admin:performance_monitoring_student_changelist')),
+        ('admin_course_changelist', admin_client, reverse('admin:performance_monitoring_course_changelist')),
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed throwaway databases at several sizes and measure wall time, query count and "
+        "peak memory for the dashboards and admin changelists. Writes a JSON report."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='50,200,1000', help="Comma-separated students per department.")
+        parser.add_argument('--departments', type=int, default=2)
+        parser.add_argument('--courses', type=int, default=6, help="Courses per department per semester.")
+        parser.add_argument('--years', type=int, default=2, help="Academic years (two semesters each).")
+        parser.add_argument('--repeat', type=int, default=5, help="Timed requests per target (median is reported).")
+        parser.add_argument('--warm-cache', action='store_true', help="Keep caches between requests instead of clearing them.")
+        parser.add_argument('--output', default='benchmark_report.json')
+        parser.add_argument('--compare', help="A previous report to print differences against.")
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options['sizes'].split(',') if size.strip()]
+        except ValueError:
+            raise CommandError("--sizes must be a comma-separated list of integers.")
+        before_each = None if options['warm_cache'] else get_cache().clear
+
+        report = {
+            'generated_at': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'git_commit': git_commit(),
+            'database': connection.vendor,
+            'repeat': options['repeat'],
+            'warm_cache': options['warm_cache'],
+            'runs': [],
+        }
+
+        setup_test_environment()
+        try:
+            # Templates use {% static %}; the manifest storage needs collectstatic output
+            with override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage'):
+                for size in sizes:
+                    report['runs'].append(self.run_size(size, options, before_each))
+        finally:
+            teardown_test_environment()
+
+        with open(options['output'], 'w') as output:
+            json.dump(report, output, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
+
+        if options['compare']:
+            self.compare(options['compare'], report)
+
+    def run_size(self, size, options, before_each):
+        with benchmark_database():
+            dataset = seed_dataset(
+                departments=options['departments'], students_per_department=size,
+                courses_per_semester=options['courses'], academic_years=options['years'],
+            )
+            department = Department.objects.order_by('pk').first()
+            student = Student.objects.filter(department=department).order_by('pk').first()
+
+            self.stdout.write(self.style.MIGRATE_HEADING(f"{size} students per department ({dataset['enrollments']} enrollments)"))
+            results = {}
+            for name, client, url in benchmark_targets(department, student):
+                results[name] = profile_request(client, url, repeat=options['repeat'], before_each=before_each)
+                metrics = results[name]
+                self.stdout.write(
+                    f"  {name:<30} {metrics['median_ms']:>9.2f} ms  {metrics['queries']:>4} queries  "
+                    f"{metrics['peak_kib']:>9.1f} KiB peak  (HTTP {metrics['status']})"
+                )
+        return {'students_per_department': size, 'dataset': dataset, 'results': results}
+
+    def compare(self, path, report):
+        with open(path) as baseline_file:
+            baseline = json.load(baseline_file)
+        previous = {
+            (run['students_per_department'], name): metrics
+            for run in baseline['runs'] for name, metrics in run['results'].items()
+        }
+        self.stdout.write(self.style.MIGRATE_HEADING(f"\nCompared with {path} ({baseline.get('git_commit') or 'unknown commit'})"))
+        for run in report['runs']:
+            for name, metrics in run['results'].items():
+                old = previous.get((run['students_per_department'], name))
+                if old is None:
+                    continue
+                change = ((metrics['median_ms'] - old['median_ms']) / old['median_ms'] * 100) if old['median_ms'] else 0
+                self.stdout.write(
+                    f"  {run['students_per_department']:>6} {name:<30} {old['median_ms']:>9.2f} -> {metrics['median_ms']:>9.2f} ms "
+                    f"({change:+.1f}%)  queries {old['queries']} -> {metrics['queries']}"
+                )
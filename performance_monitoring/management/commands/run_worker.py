@@ -0,0 +1,120 @@
+import multiprocessing
+import os
+import signal
+import socket
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from django.core.management.base import BaseCommand
+
+from performance_monitoring import worker
+from performance_monitoring.jobs import Heartbeat, claim_next, execute_job, record_failure, requeue_stale, schedule_periodic
+from performance_monitoring.models import Job
+
+# Seconds between checks for due periodic jobs (PERIODIC_JOBS)
+SCHEDULE_EVERY = 60
+
+
+class Command(BaseCommand):
+    help = (
+        "Run queued background jobs (bulk enrollment, summary rebuilds, exports) in a pool of worker "
+        "processes, and queue the PERIODIC_JOBS housekeeping tasks when they are due."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=2, help="Worker processes; 0 runs jobs in this process.")
+        parser.add_argument('--poll-interval', type=float, default=2.0, help="Seconds between queue checks when idle.")
+        parser.add_argument('--stale-after', type=int, default=600, help="Seconds without a heartbeat before a running job is retried.")
+        parser.add_argument('--burst', action='store_true', help="Exit once the queue is empty instead of waiting for work.")
+
+    def handle(self, *args, **options):
+        self.worker_id = f'{socket.gethostname()}:{os.getpid()}'
+        self.stopping = False
+        self.next_schedule = 0.0
+        previous_handlers = {signum: signal.signal(signum, self.stop) for signum in (signal.SIGTERM, signal.SIGINT)}
+        self.stdout.write(f"Worker {self.worker_id} started with {options['processes'] or 'no'} child processes.")
+        # Keeps this worker's running jobs from looking stale, however long they take
+        beat = Heartbeat(self.worker_id)
+        beat.start()
+        try:
+            if options['processes'] == 0:
+                self.run_inline(options)
+            else:
+                while not self.stopping and not self.run_pool(options):
+                    self.stderr.write("Worker pool broke; starting a new one.")
+        finally:
+            beat.stop()
+            for signum, handler in previous_handlers.items():
+                signal.signal(signum, handler)
+        self.stdout.write(self.style.SUCCESS("Worker stopped."))
+
+    def stop(self, signum, frame):
+        # Finish the running jobs, claim nothing new
+        self.stopping = True
+
+    def housekeeping(self, options):
+        requeue_stale(options['stale_after'], self.worker_id)
+        if time.monotonic() >= self.next_schedule:
+            for job in schedule_periodic():
+                self.stdout.write(f"Queued periodic job {job.pk}: {job.task}")
+            self.next_schedule = time.monotonic() + SCHEDULE_EVERY
+
+    def report(self, pk, status):
+        style = self.style.SUCCESS if status == Job.SUCCEEDED else self.style.WARNING
+        self.stdout.write(style(f"Job {pk}: {status}"))
+
+    def run_inline(self, options):
+        while not self.stopping:
+            self.housekeeping(options)
+            pk = claim_next(self.worker_id)
+            if pk is not None:
+                self.report(pk, execute_job(pk))
+            elif options['burst']:
+                return
+            else:
+                time.sleep(options['poll_interval'])
+
+    def run_pool(self, options):
+        """
+        Keeps up to --processes jobs running. Returns False if a child died
+        and took the pool with it, so the caller can start a new pool.
+        """
+        processes = options['processes']
+        running = {}
+        # spawn: children open their own connections instead of inheriting ours
+        with ProcessPoolExecutor(
+            max_workers=processes, mp_context=multiprocessing.get_context('spawn'), initializer=worker.initialize,
+        ) as pool:
+            while True:
+                if not self.stopping:
+                    self.housekeeping(options)
+                    while len(running) < processes and (pk := claim_next(self.worker_id)) is not None:
+                        running[pool.submit(worker.execute, pk)] = pk
+                if not running:
+                    if self.stopping or options['burst']:
+                        return True
+                    time.sleep(options['poll_interval'])
+                    continue
+
+                done, _ = wait(running, timeout=options['poll_interval'], return_when=FIRST_COMPLETED)
+                broken = False
+                for future in done:
+                    pk = running.pop(future)
+                    try:
+                        self.report(pk, future.result())
+                    except BrokenProcessPool as error:
+                        broken = True
+                        self.fail(pk, f"Worker process died: {error}")
+                    except Exception as error:
+                        self.fail(pk, repr(error))
+                if broken:
+                    # Every job still in the pool is lost with it
+                    for future, pk in running.items():
+                        self.fail(pk, "Worker process died.")
+                    return False
+
+    def fail(self, pk, error):
+        attempts, max_attempts = Job.objects.values_list('attempts', 'max_attempts').get(pk=pk)
+        record_failure(pk, attempts, max_attempts, error, self.worker_id)
+        self.report(pk, Job.objects.values_list('status', flat=True).get(pk=pk))
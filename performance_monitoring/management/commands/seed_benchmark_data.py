@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from performance_monitoring.benchmarks import BENCHMARK_DEPARTMENT_PREFIX, delete_seeded_data, seed_dataset
+from performance_monitoring.models import Department
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate synthetic departments, semesters, courses, students and enrollments "
+        "with realistic score distributions for benchmarking. Writes to the configured database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--departments', type=int, default=2)
+        parser.add_argument('--students', type=int, default=200, help="Students per department.")
+        parser.add_argument('--courses', type=int, default=6, help="Courses per department per semester.")
+        parser.add_argument('--years', type=int, default=2, help="Academic years (two semesters each).")
+        parser.add_argument('--seed', type=int, default=0, help="Random seed, for reproducible datasets.")
+        parser.add_argument('--flush', action='store_true', help="Delete previously seeded benchmark data first.")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            if options['flush']:
+                removed = delete_seeded_data()
+                self.stdout.write(f"Removed {removed} benchmark departments.")
+            elif Department.objects.filter(name__startswith=BENCHMARK_DEPARTMENT_PREFIX).exists():
+                raise CommandError("Benchmark data already exists; pass --flush to replace it.")
+
+            counts = seed_dataset(
+                departments=options['departments'], students_per_department=options['students'],
+                courses_per_semester=options['courses'], academic_years=options['years'], seed=options['seed'],
+            )
+        self.stdout.write(self.style.SUCCESS(
+            "Created " + ", ".join(f"{value} {name}" for name, value in counts.items()) + "."
+        ))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from performance_monitoring.caching import cache_stats, fragment_stats, reset_cache_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Show hit/miss counters for the cached student transcripts and semester tables. "
+        "With the default local-memory cache the counters are per process; "
+        "set CACHE_DIR to share them between workers."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help="Reset the counters after printing them.")
+
+    def handle(self, *args, **options):
+        stats = cache_stats()
+        self.stdout.write(f"Hits: {stats['hits']}")
+        self.stdout.write(f"Misses: {stats['misses']}")
+        self.stdout.write(f"Hit rate: {stats['hit_rate']:.1%}")
+        fragments = fragment_stats()
+        self.stdout.write("Semester tables (ended semesters):")
+        self.stdout.write(f"  Hits: {fragments['hits']}")
+        self.stdout.write(f"  Misses: {fragments['misses']}")
+        self.stdout.write(f"  Hit rate: {fragments['hit_rate']:.1%}")
+        self.stdout.write(f"  Average render on a miss: {fragments['average_render_ms']:.2f} ms")
+        self.stdout.write(f"  Render time saved: {fragments['saved_ms']:.1f} ms")
+        if options['reset']:
+            reset_cache_stats()
+            self.stdout.write(self.style.SUCCESS("Counters reset."))
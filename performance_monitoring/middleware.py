@@ -0,0 +1,183 @@
+# performance_monitoring/middleware.py
+# Per-request profiling: query count, DB time, repeated queries (the N+1
+# signature), template render time and the remaining Python time. Sampled
+# requests get a Server-Timing header and one JSON log line on the
+# 'performance_monitoring.requests' logger, which `manage.py profile_report`
+# aggregates. Unsampled requests pass straight through.
+import json
+import logging
+import random
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.template.backends.django import Template as DjangoBackendTemplate
+
+logger = logging.getLogger('performance_monitoring.requests')
+
+# A context variable rather than a thread-local: async requests share the
+# event loop thread, and the context follows them into sync_to_async threads
+_active_profile = ContextVar('request_profile', default=None)
+_IN_LIST = re.compile(r'IN \((?:%s, )*%s\)')
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+
+# Duplicate fingerprints kept per log line
+MAX_LOGGED_DUPLICATES = 5
+
+
+def fingerprint(sql):
+    """
+    Normalises a SQL string so that the same statement with different
+    parameters (or IN lists of different lengths) compares equal.
+    """
+    sql = _IN_LIST.sub('IN (...)', sql)
+    return _LITERALS.sub('?', sql)
+
+
+class RequestProfile:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_seconds = 0.0
+        self.template_seconds = 0.0
+        self.template_db_seconds = 0.0
+        self.queries = 0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper hook
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_seconds += time.perf_counter() - started
+            self.queries += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+    def duplicates(self):
+        return [(sql, count) for sql, count in self.fingerprints.most_common() if count > 1]
+
+    def summary(self, request, response):
+        total_ms = (time.perf_counter() - self.started) * 1000
+        db_ms = self.db_seconds * 1000
+        # Lazy querysets evaluated while rendering count as DB time, not template time
+        template_ms = max(self.template_seconds - self.template_db_seconds, 0) * 1000
+        duplicates = self.duplicates()
+        match = request.resolver_match
+        return {
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            'total_ms': round(total_ms, 2),
+            'db_ms': round(db_ms, 2),
+            'template_ms': round(template_ms, 2),
+            'python_ms': round(max(total_ms - db_ms - template_ms, 0), 2),
+            'queries': self.queries,
+            'duplicate_queries': sum(count - 1 for _, count in duplicates),
+            'duplicates': [{'sql': sql[:500], 'count': count} for sql, count in duplicates[:MAX_LOGGED_DUPLICATES]],
+        }
+
+
+def _timed_render(render):
+    def wrapper(self, *args, **kwargs):
+        profile = _active_profile.get()
+        if profile is None:
+            return render(self, *args, **kwargs)
+        started, db_before = time.perf_counter(), profile.db_seconds
+        try:
+            return render(self, *args, **kwargs)
+        finally:
+            profile.template_seconds += time.perf_counter() - started
+            profile.template_db_seconds += profile.db_seconds - db_before
+    wrapper.profiled = True
+    return wrapper
+
+
+def _install_template_timer():
+    # Only the backend-level render is wrapped, so {% include %} isn't double counted
+    if not getattr(DjangoBackendTemplate.render, 'profiled', False):
+        DjangoBackendTemplate.render = _timed_render(DjangoBackendTemplate.render)
+
+
+def server_timing(summary):
+    return ", ".join([
+        f'db;dur={summary["db_ms"]};desc="{summary["queries"]} queries"',
+        f'tpl;dur={summary["template_ms"]}',
+        f'app;dur={summary["python_ms"]}',
+        f'total;dur={summary["total_ms"]}',
+    ])
+
+
+class RequestProfilingMiddleware:
+    """
+    Profiles a REQUEST_PROFILING_SAMPLE_RATE fraction of requests. Put it
+    first in MIDDLEWARE so session and auth queries are included. Works in
+    both WSGI and ASGI chains, so async views aren't forced through a thread.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'REQUEST_PROFILING_SAMPLE_RATE', 0.0)
+        self.add_header = getattr(settings, 'REQUEST_PROFILING_HEADERS', settings.DEBUG)
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        _install_template_timer()
+
+    def sampled(self):
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+
+        profile = RequestProfile()
+        token = _active_profile.set(profile)
+        try:
+            with ExitStack() as stack:
+                self._wrap_connections(stack, profile)
+                response = self.get_response(request)
+        finally:
+            _active_profile.reset(token)
+        return self.finish(profile, request, response)
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+
+        # Async ORM calls run on the request's sync thread, whose connections
+        # are the ones to wrap
+        profile = RequestProfile()
+        token = _active_profile.set(profile)
+        stack = ExitStack()
+        try:
+            await sync_to_async(self._wrap_connections)(stack, profile)
+            try:
+                response = await self.get_response(request)
+            finally:
+                await sync_to_async(stack.close)()
+        finally:
+            _active_profile.reset(token)
+        return self.finish(profile, request, response)
+
+    @staticmethod
+    def _wrap_connections(stack, profile):
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(profile))
+
+    def finish(self, profile, request, response):
+        # Streaming bodies are produced after this point and aren't included
+        summary = profile.summary(request, response)
+        if self.add_header:
+            response['Server-Timing'] = server_timing(summary)
+        logger.info(json.dumps(summary, separators=(',', ':')))
+        return response
@@ -0,0 +1,82 @@
+# Generated by Django 5.0.7 on 2026-10-18 02:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def grade_point(total):
+    # Frozen copy of views.get_grade_point at the time of this migration
+    for low, high, point in ((70, 100, 5), (60, 69, 4), (50, 59, 3), (45, 49, 2), (40, 44, 1)):
+        if low <= total <= high:
+            return point
+    return 0
+
+
+def populate_summaries(apps, schema_editor):
+    Student = apps.get_model('performance_monitoring', 'Student')
+    Enrollment = apps.get_model('performance_monitoring', 'Enrollment')
+    StudentSemesterSummary = apps.get_model('performance_monitoring', 'StudentSemesterSummary')
+    StudentSummary = apps.get_model('performance_monitoring', 'StudentSummary')
+
+    fields = ('total_credit_units', 'weighted_grade_points', 'classes_attended_sum', 'num_courses')
+    semester_totals = {}
+    rows = Enrollment.objects.values_list('student_id', 'semester_id', 'ca_score', 'exam_score', 'classes_attended', 'course__credit_unit')
+    for student_id, semester_id, ca_score, exam_score, classes_attended, credit_unit in rows.iterator():
+        totals = semester_totals.setdefault((student_id, semester_id), dict.fromkeys(fields, 0))
+        if credit_unit > 0:
+            totals['total_credit_units'] += credit_unit
+            totals['weighted_grade_points'] += grade_point(ca_score + exam_score) * credit_unit
+        totals['classes_attended_sum'] += classes_attended
+        totals['num_courses'] += 1
+
+    overall = {student_id: dict.fromkeys(fields, 0) for student_id in Student.objects.values_list('pk', flat=True)}
+    for (student_id, semester_id), totals in semester_totals.items():
+        for field, value in totals.items():
+            overall[student_id][field] += value
+
+    StudentSemesterSummary.objects.bulk_create(
+        StudentSemesterSummary(student_id=student_id, semester_id=semester_id, **totals)
+        for (student_id, semester_id), totals in semester_totals.items()
+    )
+    StudentSummary.objects.bulk_create(StudentSummary(student_id=student_id, **totals) for student_id, totals in overall.items())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('performance_monitoring', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentSummary',
+            fields=[
+                ('total_credit_units', models.IntegerField(default=0)),
+                ('weighted_grade_points', models.IntegerField(default=0)),
+                ('classes_attended_sum', models.IntegerField(default=0)),
+                ('num_courses', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('student', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='summary', serialize=False, to='performance_monitoring.student')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='StudentSemesterSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_credit_units', models.IntegerField(default=0)),
+                ('weighted_grade_points', models.IntegerField(default=0)),
+                ('classes_attended_sum', models.IntegerField(default=0)),
+                ('num_courses', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('semester', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='student_summaries', to='performance_monitoring.semester')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='semester_summaries', to='performance_monitoring.student')),
+            ],
+            options={
+                'unique_together': {('student', 'semester')},
+            },
+        ),
+        migrations.RunPython(populate_summaries, migrations.RunPython.noop),
+    ]
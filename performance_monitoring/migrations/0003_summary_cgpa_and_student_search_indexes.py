@@ -0,0 +1,51 @@
+# Generated by Django 5.0.7 on 2026-10-18 02:27
+
+from django.db import migrations, models
+
+
+def fill_derived_columns(apps, schema_editor):
+    for model_name in ('StudentSemesterSummary', 'StudentSummary'):
+        model = apps.get_model('performance_monitoring', model_name)
+        for summary in model.objects.iterator():
+            summary.cgpa = (summary.weighted_grade_points / summary.total_credit_units) if summary.total_credit_units > 0 else 0
+            summary.average_attendance = (summary.classes_attended_sum / 10 * 100 / summary.num_courses) if summary.num_courses > 0 else 0
+            summary.save(update_fields=['cgpa', 'average_attendance'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('performance_monitoring', '0002_student_summaries'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studentsemestersummary',
+            name='average_attendance',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='studentsemestersummary',
+            name='cgpa',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='studentsummary',
+            name='average_attendance',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='studentsummary',
+            name='cgpa',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['department', 'student_id'], name='student_dept_matric_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['department', 'name'], name='student_dept_name_idx'),
+        ),
+        migrations.RunPython(fill_derived_columns, migrations.RunPython.noop),
+    ]
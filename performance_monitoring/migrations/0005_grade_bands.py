@@ -0,0 +1,29 @@
+# Generated by Django 5.0.7 on 2026-10-18 02:36
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('performance_monitoring', '0004_dashboard_access_path_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GradeBand',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('academic_year', models.IntegerField(blank=True, help_text='Leave blank to change the default scale for every year', null=True)),
+                ('letter', models.CharField(choices=[('A', 'A'), ('B', 'B'), ('C', 'C'), ('D', 'D'), ('E', 'E')], max_length=1)),
+                ('min_score', models.IntegerField(validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(100)])),
+                ('max_score', models.IntegerField(validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(100)])),
+                ('grade_point', models.IntegerField(validators=[django.core.validators.MinValueValidator(0)])),
+            ],
+            options={
+                'ordering': ['academic_year', '-min_score'],
+                'unique_together': {('academic_year', 'letter')},
+            },
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.0.7 on 2026-10-18 02:55
+
+from django.db import migrations, models
+from django.db.models import Count, F, Window
+from django.db.models.functions import DenseRank
+
+
+def rank_rows(model, partition_by):
+    # Frozen copy of rankings._rerank at the time of this migration
+    partition = [F(field) for field in partition_by]
+    ranked = model.objects.filter(total_credit_units__gt=0).annotate(
+        new_rank=Window(DenseRank(), partition_by=partition, order_by=F('cgpa').desc()),
+        new_total=Window(Count('pk'), partition_by=partition),
+    ).values_list('pk', 'new_rank', 'new_total')
+    rows = [model(pk=pk, rank=rank, rank_total=total) for pk, rank, total in ranked]
+    model.objects.bulk_update(rows, ['rank', 'rank_total'], batch_size=500)
+
+
+def populate_ranks(apps, schema_editor):
+    rank_rows(apps.get_model('performance_monitoring', 'StudentSummary'), ['student__department_id'])
+    rank_rows(apps.get_model('performance_monitoring', 'StudentSemesterSummary'), ['student__department_id', 'semester_id'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('performance_monitoring', '0007_jobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studentsemestersummary',
+            name='rank',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='studentsemestersummary',
+            name='rank_total',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='studentsummary',
+            name='rank',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='studentsummary',
+            name='rank_total',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.RunPython(populate_ranks, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.0.7 on 2026-10-18 03:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('performance_monitoring', '0008_summary_ranks'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='semester',
+            name='results_frozen_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='SemesterSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('format_version', models.PositiveSmallIntegerField()),
+                ('data', models.JSONField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('semester', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='performance_monitoring.semester')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='semester_snapshots', to='performance_monitoring.student')),
+            ],
+            options={
+                'unique_together': {('student', 'semester')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.7 on 2026-10-18 03:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('performance_monitoring', '0009_semester_snapshots'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studentsummary',
+            name='data_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
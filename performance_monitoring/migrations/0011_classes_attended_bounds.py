@@ -0,0 +1,19 @@
+# Generated by Django 5.0.7 on 2026-10-18 03:27
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('performance_monitoring', '0010_student_data_version'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='enrollment',
+            name='classes_attended',
+            field=models.IntegerField(default=0, help_text='Number of classes attended (out of 10)', validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(10)]),
+        ),
+    ]
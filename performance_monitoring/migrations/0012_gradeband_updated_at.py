@@ -0,0 +1,20 @@
+# Generated by Django 5.0.7 on 2026-10-18 04:02
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('performance_monitoring', '0011_classes_attended_bounds'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gradeband',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.0.7 on 2026-10-18 03:43
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('performance_monitoring', '0012_gradeband_updated_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='enrollment',
+            name='ca_score',
+            field=models.IntegerField(default=0, help_text='Continuous Assessment Score (max 30)', validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(30)]),
+        ),
+        migrations.AlterField(
+            model_name='enrollment',
+            name='exam_score',
+            field=models.IntegerField(default=0, help_text='Exam Score (max 70)', validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(70)]),
+        ),
+    ]
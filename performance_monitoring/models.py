@@ -1,7 +1,12 @@
+from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.db import models
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.utils import timezone # Important for default date values in migrations
 
+# letter_grade / get_grade_point are re-exported for existing imports
+from .grading import MAX_TOTAL, MIN_TOTAL, GradingScale, get_grade_point, get_grading_scales, letter_grade
+
 class Department(models.Model):
     name = models.CharField(max_length=100, unique=True)
 
@@ -13,6 +18,9 @@ class Semester(models.Model):
     academic_year = models.IntegerField()
     start_date = models.DateField(null=True, blank=True)
     end_date = models.DateField(null=True, blank=True)
+    # Set when the semester's results are published; transcripts then read
+    # them from SemesterSnapshot (see performance_monitoring/snapshots.py)
+    results_frozen_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         unique_together = ('name', 'academic_year')
@@ -21,6 +29,23 @@ class Semester(models.Model):
     def __str__(self):
         return f"{self.name} - {self.academic_year}"
 
+# A frozen semester's results are published from its snapshots, while the
+# summaries, rankings and exports are computed from its enrollments with the
+# current credit units and grading scale. So that the two never disagree,
+# changes to any of those inputs are refused while the semester is frozen:
+# enrollment writes (Enrollment.check_semester_open), credit unit changes and
+# deletes of its courses, grading scale changes for its year and moving it
+# to another year (signals.py). Bulk writers such as the score importer
+# check Semester.results_frozen_at themselves.
+def check_results_open(semesters, action):
+    """
+    Raises ValidationError if any of `semesters` (a Semester queryset) is
+    frozen; `action` completes "unfreeze the semester to ...".
+    """
+    semester = semesters.filter(results_frozen_at__isnull=False).first()
+    if semester is not None:
+        raise ValidationError(f"The results of {semester} are frozen; unfreeze the semester to {action}.")
+
 class Student(models.Model):
     student_id = models.CharField(max_length=20, unique=True)
     name = models.CharField(max_length=100)
@@ -28,6 +53,16 @@ class Student(models.Model):
     phone_number = models.CharField(max_length=15, blank=True, null=True)
     department = models.ForeignKey(Department, on_delete=models.CASCADE)
     custom_password = models.CharField(max_length=128, blank=True, null=True)
+    # Change marker for the department dashboard's ETag, whose leaderboard
+    # shows names; queryset update() callers must set it.
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Department dashboard search/paging by matric number or name prefix
+            models.Index(fields=['department', 'student_id'], name='student_dept_matric_idx'),
+            models.Index(fields=['department', 'name'], name='student_dept_name_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -39,22 +74,49 @@ class Course(models.Model):
     department = models.ForeignKey(Department, on_delete=models.CASCADE)
     semester = models.ForeignKey(Semester, on_delete=models.CASCADE)
 
+    class Meta:
+        indexes = [
+            # Department course lists (ordered by code) and per-semester course lookups
+            models.Index(fields=['department', 'course_code'], name='course_dept_code_idx'),
+            models.Index(fields=['department', 'semester'], name='course_dept_semester_idx'),
+        ]
+
     def __str__(self):
         return f"{self.course_code} - {self.course_title} ({self.semester})"
 
+    def check_results_open(self, action):
+        # The frozen semesters this course's credit units count towards
+        check_results_open(Semester.objects.filter(enrollment__course_id=self.pk), action)
+
+    def clean(self):
+        if self.pk and Course.objects.filter(pk=self.pk).exclude(credit_unit=self.credit_unit).exists():
+            self.check_results_open("change its courses' credit units")
+
 # This is the EXACT Enrollment model you provided without alteration.
 class Enrollment(models.Model):
     student = models.ForeignKey(Student, on_delete=models.CASCADE)
     course = models.ForeignKey(Course, on_delete=models.CASCADE)
     semester = models.ForeignKey(Semester, on_delete=models.CASCADE)
     enrollment_date = models.DateField(auto_now_add=True)
-    classes_attended = models.IntegerField(default=0, help_text="Number of classes attended (out of 10)")
-    ca_score = models.IntegerField(default=0, validators=[MaxValueValidator(30)], help_text="Continuous Assessment Score (max 30)")
-    exam_score = models.IntegerField(default=0, validators=[MaxValueValidator(70)], help_text="Exam Score (max 70)")
+    # Attendance percentages are classes_attended / 10, so keep it within 0-10
+    classes_attended = models.IntegerField(default=0, validators=[MinValueValidator(0), MaxValueValidator(10)], help_text="Number of classes attended (out of 10)")
+    ca_score = models.IntegerField(default=0, validators=[MinValueValidator(0), MaxValueValidator(30)], help_text="Continuous Assessment Score (max 30)")
+    exam_score = models.IntegerField(default=0, validators=[MinValueValidator(0), MaxValueValidator(70)], help_text="Exam Score (max 70)")
     # attendance_percentage is a property, not a database field
+    # Change marker for the dashboards' ETag / Last-Modified headers. auto_now
+    # covers save() and bulk_create(); bulk_update() callers must set it.
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ('student', 'course', 'semester')
+        indexes = [
+            # Per-student transcript and per-(student, semester) summary refreshes
+            models.Index(fields=['student', 'semester'], name='enrollment_student_sem_idx'),
+            # Distinct students per course on the department dashboard
+            models.Index(fields=['course', 'student'], name='enrollment_course_student_idx'),
+            # Semester-wide exports and bulk enrollment existence checks
+            models.Index(fields=['semester', 'course'], name='enrollment_sem_course_idx'),
+        ]
 
     def __str__(self):
         return f"{self.student.name} - {self.course.course_code} - {self.semester}"
@@ -65,25 +127,38 @@ class Enrollment(models.Model):
             return (self.classes_attended / 10) * 100
         return 0.0
 
+    # See check_results_open() above
+    def check_semester_open(self):
+        semesters = models.Q(pk=self.semester_id)
+        if self.pk:
+            # Moving an enrollment out of a frozen semester changes it too
+            semesters |= models.Q(enrollment__pk=self.pk)
+        check_results_open(Semester.objects.filter(semesters), "change them")
+
+    def clean(self):
+        self.check_semester_open()
+
+    def save(self, *args, **kwargs):
+        self.check_semester_open()
+        super().save(*args, **kwargs)
+
     @property
     def total_score(self):
         return self.ca_score + self.exam_score
 
     @property
     def grade(self):
-        total = self.total_score
-        if 40 <= total <= 44:
-            return 'E'
-        elif 45 <= total <= 49:
-            return 'D'
-        elif 50 <= total <= 59:
-            return 'C'
-        elif 60 <= total <= 69:
-            return 'B'
-        elif 70 <= total <= 100:
-            return 'A'
-        else:
-            return 'F' # You might want to adjust the default for scores outside the range
+        scales = get_grading_scales()
+        # Only look at the semester when some year has its own scale
+        academic_year = self.semester.academic_year if scales.by_year else None
+        return scales.letter(self.total_score, academic_year)
+
+    @property
+    def grade_point(self):
+        scales = get_grading_scales()
+        academic_year = self.semester.academic_year if scales.by_year else None
+        return scales.point(self.total_score, academic_year)
+
 
 # The AttendanceSession model has been REMOVED to synchronize with Enrollment's direct attendance tracking.
 # If you decide later to track individual sessions, you'd re-add this model and
@@ -101,9 +176,192 @@ class Enrollment(models.Model):
 #     def __str__(self):
 #         return f"{self.enrollment.student.name} - {self.enrollment.course.course_code} - Session {self.session_number} ({'Attended' if self.attended else 'Absent'}) on {self.date}"
 
+# --- Grading Scale Overrides ---
+# Optional. With no rows every year uses grading.DEFAULT_BANDS; rows with no
+# academic year replace the default, rows with a year apply to that year only.
+class GradeBand(models.Model):
+    LETTER_CHOICES = [(letter, letter) for letter in ('A', 'B', 'C', 'D', 'E')]
+
+    academic_year = models.IntegerField(null=True, blank=True, help_text="Leave blank to change the default scale for every year")
+    letter = models.CharField(max_length=1, choices=LETTER_CHOICES)
+    min_score = models.IntegerField(validators=[MinValueValidator(MIN_TOTAL), MaxValueValidator(MAX_TOTAL)])
+    max_score = models.IntegerField(validators=[MinValueValidator(MIN_TOTAL), MaxValueValidator(MAX_TOTAL)])
+    grade_point = models.IntegerField(validators=[MinValueValidator(0)])
+    # With the row count, how worker processes notice scale changes (grading.py)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('academic_year', 'letter')
+        ordering = ['academic_year', '-min_score']
+
+    def __str__(self):
+        return f"{self.academic_year or 'Default'}: {self.letter} ({self.min_score}-{self.max_score}) = {self.grade_point}"
+
+    def clean(self):
+        # The band must fit with the rest of its year's scale
+        siblings = GradeBand.objects.filter(academic_year=self.academic_year).exclude(pk=self.pk)
+        bands = [(b.min_score, b.max_score, b.letter, b.grade_point) for b in siblings]
+        bands.append((self.min_score, self.max_score, self.letter, self.grade_point))
+        try:
+            GradingScale(bands)
+        except ValueError as error:
+            raise ValidationError(str(error))
+        self.check_results_open()
+
+    @staticmethod
+    def graded_semesters(academic_year):
+        # The semesters graded on `academic_year`'s scale (None: the default one)
+        if academic_year is not None:
+            return Semester.objects.filter(academic_year=academic_year)
+        return Semester.objects.exclude(academic_year__in=list(get_grading_scales().by_year))
+
+    def check_results_open(self, deleting=False):
+        """
+        Refuses a change to this band (or its deletion) when it would regrade
+        a frozen semester. Saving an unchanged band is allowed.
+        """
+        fields = ('academic_year', 'letter', 'min_score', 'max_score', 'grade_point')
+        years = {self.academic_year}
+        if self.pk and not deleting:
+            previous = GradeBand.objects.filter(pk=self.pk).values_list(*fields).first()
+            if previous == tuple(getattr(self, field) for field in fields):
+                return
+            if previous is not None:
+                years.add(previous[0])
+        for year in years:
+            check_results_open(
+                GradeBand.graded_semesters(year).filter(enrollment__isnull=False),
+                "change the grading scale it uses",
+            )
+
+
 class DepartmentPassword(models.Model):
     department = models.OneToOneField(Department, on_delete=models.CASCADE, primary_key=True)
     password = models.CharField(max_length=128)
 
     def __str__(self):
-        return f"Password for {self.department.name}"
\ No newline at end of file
+        return f"Password for {self.department.name}"
+
+# --- Precomputed Transcript Summaries ---
+# Maintained by performance_monitoring/summaries.py from Enrollment signals so
+# dashboards can read a handful of rows instead of every enrollment.
+class TranscriptTotals(models.Model):
+    total_credit_units = models.IntegerField(default=0)
+    weighted_grade_points = models.IntegerField(default=0)
+    classes_attended_sum = models.IntegerField(default=0)
+    num_courses = models.IntegerField(default=0)
+    # Derived from the totals above and stored so they can be sorted/indexed
+    cgpa = models.FloatField(default=0)
+    average_attendance = models.FloatField(default=0)
+    # Dense class position by CGPA among the department's students (for the
+    # semester, on semester rows) and how many were ranked. Maintained by
+    # performance_monitoring/rankings.py; null without credit-bearing results.
+    rank = models.PositiveIntegerField(null=True, blank=True)
+    rank_total = models.PositiveIntegerField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        abstract = True
+
+    def compute_derived(self):
+        self.cgpa = (self.weighted_grade_points / self.total_credit_units) if self.total_credit_units > 0 else 0
+        # Same as averaging Enrollment.attendance_percentage (classes out of 10)
+        self.average_attendance = (self.classes_attended_sum / 10 * 100 / self.num_courses) if self.num_courses > 0 else 0
+        return self
+
+    def save(self, *args, **kwargs):
+        self.compute_derived()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            # update_or_create() saves only the fields it was given
+            kwargs['update_fields'] = {*update_fields, 'cgpa', 'average_attendance'}
+        super().save(*args, **kwargs)
+
+
+class StudentSemesterSummary(TranscriptTotals):
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='semester_summaries')
+    semester = models.ForeignKey(Semester, on_delete=models.CASCADE, related_name='student_summaries')
+
+    class Meta:
+        unique_together = ('student', 'semester')
+
+    def __str__(self):
+        return f"{self.student_id} - {self.semester_id} summary"
+
+
+class StudentSummary(TranscriptTotals):
+    student = models.OneToOneField(Student, on_delete=models.CASCADE, primary_key=True, related_name='summary')
+    # Bumped with every change to what the student's transcript shows; the
+    # transcript cache keys and chart URLs are built from it (caching.py).
+    # Carried over when the summaries are rebuilt, so it never goes back.
+    data_version = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.student_id} summary"
+
+
+# --- Frozen Results ---
+# One student's published results for one semester, as built when the
+# semester was frozen: the course rows with totals, grades and attendance,
+# and the semester totals. `data` is written and read by transcripts.py;
+# `format_version` lets a later layout ignore (and recompute) older rows.
+class SemesterSnapshot(models.Model):
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='semester_snapshots')
+    semester = models.ForeignKey(Semester, on_delete=models.CASCADE, related_name='snapshots')
+    format_version = models.PositiveSmallIntegerField()
+    data = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('student', 'semester')
+
+    def __str__(self):
+        return f"{self.student_id} - {self.semester_id} snapshot"
+
+
+# --- Background Jobs ---
+# Queued by performance_monitoring/jobs.py and run by `manage.py run_worker`.
+class Job(models.Model):
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    STATUS_CHOICES = [(QUEUED, 'Queued'), (RUNNING, 'Running'), (SUCCEEDED, 'Succeeded'), (FAILED, 'Failed')]
+
+    task = models.CharField(max_length=100)
+    params = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    # Not picked up before this time; retries back off by pushing it forward
+    run_after = models.DateTimeField(default=timezone.now)
+    progress_done = models.PositiveIntegerField(default=0)
+    progress_total = models.PositiveIntegerField(null=True, blank=True)
+    message = models.CharField(max_length=255, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    worker = models.CharField(max_length=100, blank=True)
+    # Refreshed with each progress report; a stale heartbeat means the worker died
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # The worker's "next due job" lookup
+            models.Index(fields=['status', 'run_after'], name='job_status_run_after_idx'),
+        ]
+
+    def __str__(self):
+        return f"#{self.pk} {self.task} ({self.status})"
+
+    @property
+    def progress_percent(self):
+        if self.status == self.SUCCEEDED:
+            return 100
+        if not self.progress_total:
+            return 0
+        return min(round(self.progress_done / self.progress_total * 100), 100)
@@ -0,0 +1,98 @@
+# performance_monitoring/rankings.py
+# Class positions by CGPA, stored on the summary rows so a dashboard reads
+# "position N of M" from a row it already loads. Ranks are dense (tied
+# CGPAs share a position) and computed in SQL with window functions over
+# the precomputed summaries: overall per department, and per department and
+# semester. summaries.py re-ranks the affected departments and semesters
+# after each rebuild, and once per transaction for single-row refreshes;
+# only rows whose position moved are written, and their updated_at moves
+# with them so cached pages revalidate. `rebuild_student_summaries
+# --rankings-only` re-ranks everything from the stored summaries.
+from django.db.models import Count, F, Window
+from django.db.models.functions import DenseRank
+from django.utils import timezone
+
+from .models import Student, StudentSemesterSummary, StudentSummary
+
+
+def _rerank(summaries, partition_by):
+    """
+    Recomputes rank/rank_total for the rows of `summaries`, partitioned by
+    `partition_by`. Returns the number of rows whose values changed.
+    """
+    model = summaries.model
+    partition = [F(field) for field in partition_by]
+    ranked = summaries.filter(total_credit_units__gt=0).annotate(
+        new_rank=Window(DenseRank(), partition_by=partition, order_by=F('cgpa').desc()),
+        new_total=Window(Count('pk'), partition_by=partition),
+    ).values_list('pk', 'rank', 'rank_total', 'new_rank', 'new_total')
+
+    now = timezone.now()
+    changed = [
+        model(pk=pk, rank=new_rank, rank_total=new_total, updated_at=now)
+        for pk, rank, rank_total, new_rank, new_total in ranked
+        if (rank, rank_total) != (new_rank, new_total)
+    ]
+    model.objects.bulk_update(changed, ['rank', 'rank_total', 'updated_at'], batch_size=500)
+    # Students whose last credit-bearing result went away drop out of the ranking
+    dropped = summaries.filter(total_credit_units=0, rank__isnull=False).update(rank=None, rank_total=None, updated_at=now)
+    return len(changed) + dropped
+
+
+def refresh_rankings(department_ids, semester_ids=None):
+    """
+    Re-ranks the overall summaries of `department_ids` and their semester
+    summaries (only `semester_ids`, if given). Returns the number of rows
+    updated.
+    """
+    department_ids = list(department_ids)
+    if not department_ids:
+        return 0
+    updated = _rerank(
+        StudentSummary.objects.filter(student__department_id__in=department_ids),
+        ['student__department_id'],
+    )
+    semester_summaries = StudentSemesterSummary.objects.filter(student__department_id__in=department_ids)
+    if semester_ids is not None:
+        semester_summaries = semester_summaries.filter(semester_id__in=list(semester_ids))
+    updated += _rerank(semester_summaries, ['student__department_id', 'semester_id'])
+    return updated
+
+
+def refresh_all_rankings():
+    return refresh_rankings(Student.objects.values_list('department_id', flat=True).distinct())
+
+
+# --- Reading ---
+LEADERBOARD_SIZE = 10
+
+
+def department_leaderboard(department, size=LEADERBOARD_SIZE):
+    """
+    The department's top `size` summaries by stored rank (ties by matric
+    number), with their students, in one query.
+    """
+    return list(
+        StudentSummary.objects.filter(student__department=department, rank__isnull=False)
+        .select_related('student').order_by('rank', 'student__student_id')[:size]
+    )
+
+
+def class_positions(student, semesters):
+    """
+    (overall, per_semester) for the dashboards: overall is the student's
+    (rank, rank_total) or None if unranked, per_semester a list of the same
+    aligned with `semesters`. The overall position comes from
+    student.summary (select it with the student); the semester positions
+    cost one query.
+    """
+    # A student without a summary row raises RelatedObjectDoesNotExist, an AttributeError
+    summary = getattr(student, 'summary', None)
+    overall = (summary.rank, summary.rank_total) if summary and summary.rank else None
+    by_semester = {
+        semester_id: (rank, rank_total)
+        for semester_id, rank, rank_total in StudentSemesterSummary.objects.filter(
+            student=student, rank__isnull=False,
+        ).values_list('semester_id', 'rank', 'rank_total')
+    }
+    return overall, [by_semester.get(semester.semester_id) for semester in semesters]
@@ -0,0 +1,101 @@
+# performance_monitoring/search.py
+# Keyset-paginated student search for the department dashboard. Pages are
+# addressed by an opaque cursor holding the last row's sort value and
+# student_id, so each request reads one page of rows whatever the offset.
+import base64
+import json
+
+from django.db.models import F, Q
+from django.db.models.functions import Coalesce
+
+from .models import Student
+
+# Public sort name -> column in the page rows
+SORT_FIELDS = {
+    'student_id': 'student_id',
+    'name': 'name',
+    'cgpa': 'cgpa',
+    'attendance': 'average_attendance',
+}
+# Sorts whose cursor values are numbers; the others are strings
+NUMERIC_SORTS = ('cgpa', 'attendance')
+DEFAULT_PAGE_SIZE = 25
+MAX_PAGE_SIZE = 100
+
+
+class InvalidSearch(ValueError):
+    pass
+
+
+def encode_cursor(sort_value, student_id):
+    payload = json.dumps([sort_value, student_id], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(payload).decode()
+
+
+def decode_cursor(cursor, sort):
+    # Cursors come back from the client, so the values are checked before they reach the ORM
+    try:
+        sort_value, student_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise InvalidSearch("Invalid cursor.")
+    if sort in NUMERIC_SORTS:
+        valid = isinstance(sort_value, (int, float)) and not isinstance(sort_value, bool)
+    else:
+        valid = isinstance(sort_value, str)
+    if not valid or not isinstance(student_id, str):
+        raise InvalidSearch("Invalid cursor.")
+    return sort_value, student_id
+
+
+def search_queryset(department, query='', sort='student_id', descending=False, cursor=None):
+    """
+    The ordered values() queryset for the page after `cursor`, without the
+    LIMIT applied.
+    """
+    if sort not in SORT_FIELDS:
+        raise InvalidSearch(f"Unknown sort '{sort}'.")
+
+    students = Student.objects.filter(department=department)
+    query = (query or '').strip()
+    if query:
+        students = students.filter(Q(student_id__istartswith=query) | Q(name__istartswith=query))
+
+    # Every student normally has a summary row; Coalesce covers bulk-loaded ones
+    students = students.annotate(
+        cgpa=Coalesce('summary__cgpa', 0.0),
+        average_attendance=Coalesce('summary__average_attendance', 0.0),
+        rank=F('summary__rank'),
+        rank_total=F('summary__rank_total'),
+    )
+    sort_field = SORT_FIELDS[sort]
+
+    if cursor:
+        last_value, last_student_id = decode_cursor(cursor, sort)
+        if sort == 'student_id':
+            after = Q(student_id__lt=last_student_id) if descending else Q(student_id__gt=last_student_id)
+        else:
+            direction = 'lt' if descending else 'gt'
+            after = Q(**{f'{sort_field}__{direction}': last_value}) | Q(**{sort_field: last_value, 'student_id__gt': last_student_id})
+        students = students.filter(after)
+
+    ordering = [f'-{sort_field}' if descending else sort_field]
+    if sort != 'student_id':
+        ordering.append('student_id')
+    return students.order_by(*ordering).values('student_id', 'name', 'cgpa', 'average_attendance', 'rank', 'rank_total')
+
+
+def search_department_students(department, query='', sort='student_id', descending=False, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    Returns (rows, next_cursor) for one page of the department's students,
+    filtered by a matric number or name prefix. Rows are dicts with the
+    student's precomputed CGPA and average attendance.
+    """
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    page = list(search_queryset(department, query, sort, descending, cursor)[:limit + 1])
+
+    next_cursor = None
+    if len(page) > limit:
+        page = page[:limit]
+        last = page[-1]
+        next_cursor = encode_cursor(last[SORT_FIELDS[sort]], last['student_id'])
+    return page, next_cursor
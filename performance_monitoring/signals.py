@@ -0,0 +1,178 @@
+# performance_monitoring/signals.py
+# Receivers are connected in PerformanceMonitoringConfig.ready().
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .caching import bump_student_versions
+from .grading import get_grading_scales, invalidate_grading_scales
+from .models import Course, Department, Enrollment, GradeBand, Semester, Student, StudentSummary, check_results_open
+from .summaries import mark_dirty, rebuild_student_summaries, refresh_student_semester, rerank_departments
+
+
+# --- Enrollment ---
+@receiver(pre_save, sender=Enrollment)
+def remember_enrollment_owner(sender, instance, raw=False, **kwargs):
+    # An edit can move an enrollment to another student/semester; keep the old key
+    instance._previous_summary_key = None
+    if instance.pk and not raw:
+        instance._previous_summary_key = (
+            Enrollment.objects.filter(pk=instance.pk).values_list('student_id', 'semester_id').first()
+        )
+
+
+@receiver(post_save, sender=Enrollment)
+def update_summaries_on_enrollment_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    current_key = (instance.student_id, instance.semester_id)
+    previous_key = getattr(instance, '_previous_summary_key', None)
+    refresh_student_semester(*current_key)
+    if previous_key and previous_key != current_key:
+        refresh_student_semester(*previous_key)
+
+
+@receiver(pre_delete, sender=Enrollment)
+def keep_frozen_enrollments(sender, instance, origin=None, **kwargs):
+    # Deleting a student, course or semester takes its enrollments along;
+    # only deletes of the enrollments themselves are refused
+    origin_model = getattr(origin, 'model', type(origin))
+    if origin_model is Enrollment:
+        instance.check_semester_open()
+
+
+@receiver(post_delete, sender=Enrollment)
+def update_summaries_on_enrollment_delete(sender, instance, origin=None, **kwargs):
+    # Cascading from a student (or their department): the student row still
+    # exists at this point, but their summaries may already be gone
+    origin_model = getattr(origin, 'model', type(origin))  # an instance or a queryset
+    if origin_model in (Student, Department):
+        return
+    refresh_student_semester(instance.student_id, instance.semester_id)
+
+
+@receiver(post_save, sender=Enrollment)
+@receiver(post_delete, sender=Enrollment)
+def invalidate_cached_transcripts(sender, instance, **kwargs):
+    student_pks = {instance.student_id}
+    previous_key = getattr(instance, '_previous_summary_key', None)
+    if previous_key:
+        student_pks.add(previous_key[0])
+    bump_student_versions(student_pks)
+
+
+# --- Course ---
+@receiver(pre_save, sender=Course)
+def remember_credit_unit(sender, instance, raw=False, **kwargs):
+    instance._previous_credit_unit = None
+    if instance.pk and not raw:
+        instance._previous_credit_unit = Course.objects.filter(pk=instance.pk).values_list('credit_unit', flat=True).first()
+        if instance._previous_credit_unit not in (None, instance.credit_unit):
+            instance.check_results_open("change its courses' credit units")
+
+
+@receiver(pre_delete, sender=Course)
+def keep_frozen_courses(sender, instance, origin=None, **kwargs):
+    # As for enrollments: only deletes that start from the course are refused
+    if getattr(origin, 'model', type(origin)) is Course:
+        instance.check_results_open("delete its courses")
+
+
+@receiver(post_save, sender=Course)
+def update_summaries_on_credit_unit_change(sender, instance, created=False, raw=False, **kwargs):
+    if created or raw or instance._previous_credit_unit == instance.credit_unit:
+        return
+    student_ids = Enrollment.objects.filter(course=instance).values_list('student_id', flat=True).distinct()
+    if not mark_dirty(student_ids):
+        rebuild_student_summaries(student_ids)
+
+
+# --- Course / Semester Catalog ---
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+@receiver(post_save, sender=Semester)
+@receiver(post_delete, sender=Semester)
+def invalidate_catalog(sender, instance, **kwargs):
+    # Titles, codes, credit units and semester names are baked into the
+    # transcripts of everyone enrolled (deletes cascade through Enrollment)
+    field = 'course' if sender is Course else 'semester'
+    bump_student_versions(Enrollment.objects.filter(**{field: instance}).values('student_id'))
+
+
+# --- Grading Scale ---
+def _rebuild_graded_students(enrollments):
+    student_ids = enrollments.values_list('student_id', flat=True).distinct()
+    if not mark_dirty(student_ids):
+        rebuild_student_summaries(student_ids)
+
+
+@receiver(pre_save, sender=GradeBand)
+def keep_frozen_scales(sender, instance, raw=False, **kwargs):
+    if not raw:
+        instance.check_results_open()
+
+
+@receiver(pre_delete, sender=GradeBand)
+def keep_frozen_scales_on_delete(sender, instance, **kwargs):
+    instance.check_results_open(deleting=True)
+
+
+@receiver(post_save, sender=GradeBand)
+@receiver(post_delete, sender=GradeBand)
+def regrade_on_scale_change(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    invalidate_grading_scales()
+    # A default-scale band can affect every year without its own override
+    enrollments = Enrollment.objects.all()
+    if instance.academic_year is not None:
+        enrollments = enrollments.filter(semester__academic_year=instance.academic_year)
+    _rebuild_graded_students(enrollments)
+    bump_student_versions(enrollments.values('student_id'))
+
+
+@receiver(pre_save, sender=Semester)
+def remember_academic_year(sender, instance, raw=False, **kwargs):
+    instance._previous_academic_year = None
+    if instance.pk and not raw:
+        instance._previous_academic_year = Semester.objects.filter(pk=instance.pk).values_list('academic_year', flat=True).first()
+        if instance._previous_academic_year not in (None, instance.academic_year):
+            check_results_open(Semester.objects.filter(pk=instance.pk), "move it to another academic year")
+
+
+@receiver(post_save, sender=Semester)
+def regrade_on_academic_year_change(sender, instance, created=False, raw=False, **kwargs):
+    # Moving a semester to another year can put it under a different scale
+    if created or raw or instance._previous_academic_year == instance.academic_year:
+        return
+    scales = get_grading_scales()
+    if scales.for_year(instance._previous_academic_year) is not scales.for_year(instance.academic_year):
+        _rebuild_graded_students(Enrollment.objects.filter(semester=instance))
+
+
+# --- Student ---
+@receiver(post_save, sender=Student)
+def create_empty_summary(sender, instance, created=False, raw=False, **kwargs):
+    # Every student has an overall row, even before their first enrollment
+    if created and not raw:
+        StudentSummary.objects.get_or_create(student=instance)
+
+
+@receiver(pre_save, sender=Student)
+def remember_department(sender, instance, raw=False, **kwargs):
+    instance._previous_department_id = None
+    if instance.pk and not raw:
+        instance._previous_department_id = Student.objects.filter(pk=instance.pk).values_list('department_id', flat=True).first()
+
+
+@receiver(post_save, sender=Student)
+def rerank_on_department_change(sender, instance, created=False, raw=False, **kwargs):
+    previous = getattr(instance, '_previous_department_id', None)
+    if created or raw or previous is None or previous == instance.department_id:
+        return
+    rerank_departments([previous, instance.department_id])
+
+
+@receiver(post_delete, sender=Student)
+def rerank_on_student_delete(sender, instance, **kwargs):
+    # The student's summaries cascade away; everyone below them moves up
+    rerank_departments([instance.department_id])
@@ -0,0 +1,105 @@
+# performance_monitoring/snapshots.py
+# Freezing a semester publishes its results: each enrolled student's
+# semester table is built once and stored as a SemesterSnapshot, and
+# transcripts read it from there instead of recomputing it from the live
+# enrollments. A snapshot is the published record, and the summaries,
+# rankings and exports still read the enrollments, so changes to anything
+# they are computed from (enrollments, credit units, the grading scale) are
+# refused while the semester is frozen (see check_results_open() in
+# models.py). Writes that go around the models, such as a queryset update()
+# or raw SQL, can still make the two drift apart; check_snapshots() reports
+# that, and freezing the semester again re-publishes the live results.
+from itertools import groupby
+from operator import itemgetter
+
+from django.db import transaction
+from django.utils import timezone
+
+from .grading import get_grading_scales
+from .models import Enrollment, Semester, SemesterSnapshot
+from .transcripts import ENROLLMENT_COLUMNS, SNAPSHOT_FORMAT, semester_results, snapshot_data
+
+SNAPSHOT_BATCH_SIZE = 500
+
+
+def live_semester_results(semester):
+    """
+    {student pk: SemesterResult} for everyone enrolled in `semester`,
+    computed from the live enrollments in one query.
+    """
+    rows = (
+        Enrollment.objects.filter(semester=semester)
+        .order_by('student_id', 'pk')
+        .values_list('student_id', *ENROLLMENT_COLUMNS)
+    )
+    scales = get_grading_scales()
+    results = {}
+    for student_id, student_rows in groupby(rows.iterator(chunk_size=2000), key=itemgetter(0)):
+        [results[student_id]] = semester_results((row[1:] for row in student_rows), scales)
+    return results
+
+
+def freeze_semester(semester):
+    """
+    (Re)writes the snapshots of `semester` from the live data and marks it
+    frozen. Returns the number of snapshots written.
+    """
+    with transaction.atomic():
+        results = live_semester_results(semester)
+        SemesterSnapshot.objects.filter(semester=semester).delete()
+        SemesterSnapshot.objects.bulk_create(
+            (
+                SemesterSnapshot(student_id=student_id, semester=semester, format_version=SNAPSHOT_FORMAT, data=snapshot_data(result))
+                for student_id, result in results.items()
+            ),
+            batch_size=SNAPSHOT_BATCH_SIZE,
+        )
+        # Saving the semester moves the data version of everyone enrolled, so cached
+        # transcripts are rebuilt
+        semester.results_frozen_at = timezone.now()
+        semester.save(update_fields=['results_frozen_at'])
+    return len(results)
+
+
+def unfreeze_semester(semester):
+    with transaction.atomic():
+        deleted = SemesterSnapshot.objects.filter(semester=semester).delete()[0]
+        semester.results_frozen_at = None
+        semester.save(update_fields=['results_frozen_at'])
+    return deleted
+
+
+# --- Consistency Check ---
+def check_semester(semester):
+    """
+    Compares the snapshots of a frozen `semester` with its live data.
+    Returns a list of (student pk, problem, differing keys) tuples; problem
+    is 'missing', 'orphaned', 'format' or 'changed'.
+    """
+    live = {student_id: snapshot_data(result) for student_id, result in live_semester_results(semester).items()}
+    problems = []
+    for student_id, format_version, data in SemesterSnapshot.objects.filter(semester=semester).values_list('student_id', 'format_version', 'data'):
+        expected = live.pop(student_id, None)
+        if expected is None:
+            problems.append((student_id, 'orphaned', []))
+        elif format_version != SNAPSHOT_FORMAT:
+            problems.append((student_id, 'format', []))
+        elif data != expected:
+            problems.append((student_id, 'changed', sorted(key for key in expected if data.get(key) != expected[key])))
+    problems.extend((student_id, 'missing', []) for student_id in live)
+    return sorted(problems)
+
+
+def check_snapshots(semesters=None):
+    """
+    {semester: problems} for the frozen semesters (or the given ones) whose
+    snapshots don't match the live data.
+    """
+    if semesters is None:
+        semesters = Semester.objects.filter(results_frozen_at__isnull=False)
+    report = {}
+    for semester in semesters:
+        problems = check_semester(semester)
+        if problems:
+            report[semester] = problems
+    return report
@@ -0,0 +1,204 @@
+# performance_monitoring/summaries.py
+# Keeps StudentSemesterSummary / StudentSummary in step with Enrollment.
+# Single-row changes recompute just the affected (student, semester) row and
+# then re-sum that student's semester rows; bulk work goes through
+# rebuild_student_summaries(), which does everything set-based. Either way
+# the affected class rankings are refreshed afterwards (see rankings.py);
+# for single-row changes that happens once per transaction, so an admin
+# form or action touching many enrollments re-ranks each department once.
+import threading
+from contextlib import contextmanager
+
+from django.db import transaction
+
+from .aggregates import summary_totals
+from .models import Enrollment, Student, StudentSemesterSummary, StudentSummary
+from .rankings import refresh_rankings
+
+TOTAL_FIELDS = ('total_credit_units', 'weighted_grade_points', 'classes_attended_sum', 'num_courses')
+
+_batch_state = threading.local()
+
+
+# --- Batch Mode ---
+@contextmanager
+def summary_batch():
+    """
+    Suspends per-row signal updates for the current thread. Students touched
+    while inside the block are rebuilt in one pass when the outermost block
+    exits, so bulk imports don't pay for a summary refresh per row.
+    """
+    outermost = getattr(_batch_state, 'dirty', None) is None
+    if outermost:
+        _batch_state.dirty = set()
+        _batch_state.dirty_departments = set()
+    try:
+        yield
+    finally:
+        if outermost:
+            dirty, departments = _batch_state.dirty, _batch_state.dirty_departments
+            _batch_state.dirty = _batch_state.dirty_departments = None
+            if dirty:
+                rebuild_student_summaries(dirty)
+            if departments:
+                refresh_rankings(departments)
+
+
+def in_batch_mode():
+    return getattr(_batch_state, 'dirty', None) is not None
+
+
+def mark_dirty(student_ids):
+    # Queue students for the end-of-batch rebuild; returns False outside batch mode
+    if not in_batch_mode():
+        return False
+    _batch_state.dirty.update(student_ids)
+    return True
+
+
+def rerank_departments(department_ids):
+    # Rankings only (e.g. a student left); deferred to the end of a batch
+    if in_batch_mode():
+        _batch_state.dirty_departments.update(department_ids)
+    else:
+        schedule_rankings(department_ids)
+
+
+# --- Deferred Re-ranking ---
+def schedule_rankings(department_ids, semester_ids=None):
+    """
+    Re-ranks `department_ids` (their `semester_ids`, or all their semesters
+    if None) when the current transaction commits, or right away outside
+    one. Requests made before the commit are merged into one refresh.
+    """
+    pending = getattr(_batch_state, 'pending_rankings', None)
+    if pending is None:
+        pending = _batch_state.pending_rankings = {}
+    for department_id in department_ids:
+        if semester_ids is None or pending.get(department_id, ()) is None:
+            pending[department_id] = None
+        else:
+            pending.setdefault(department_id, set()).update(semester_ids)
+    # Every request registers a callback (the first to run takes everything),
+    # so requests after a rolled-back transaction are never stranded
+    transaction.on_commit(_flush_rankings)
+
+
+def _flush_rankings():
+    pending = getattr(_batch_state, 'pending_rankings', None)
+    _batch_state.pending_rankings = None
+    if not pending:
+        return
+    everything = [department_id for department_id, semester_ids in pending.items() if semester_ids is None]
+    if everything:
+        refresh_rankings(everything)
+    some = {department_id: semester_ids for department_id, semester_ids in pending.items() if semester_ids is not None}
+    if some:
+        refresh_rankings(some, set().union(*some.values()))
+
+
+# --- Incremental Updates ---
+def _totals_from_row(row):
+    return {
+        'total_credit_units': row['total_credit_units'],
+        'weighted_grade_points': row['weighted_grade_points'],
+        'classes_attended_sum': row['classes_attended_sum'],
+        'num_courses': row['num_enrollments'],
+    }
+
+
+def refresh_student_semester(student_id, semester_id):
+    """
+    Recomputes one (student, semester) row from its enrollments and then the
+    student's overall row from their semester rows.
+    """
+    if mark_dirty([student_id]):
+        return
+    department_id = Student.objects.filter(pk=student_id).values_list('department_id', flat=True).first()
+    if department_id is None:
+        # The student is being deleted; their summaries cascade with them
+        return
+
+    with transaction.atomic():
+        row = Enrollment.objects.filter(student_id=student_id, semester_id=semester_id).aggregate(**summary_totals(prefix=''))
+        if row['num_enrollments']:
+            StudentSemesterSummary.objects.update_or_create(
+                student_id=student_id, semester_id=semester_id, defaults=_totals_from_row(row),
+            )
+        else:
+            StudentSemesterSummary.objects.filter(student_id=student_id, semester_id=semester_id).delete()
+        _refresh_overall(student_id)
+        schedule_rankings([department_id], [semester_id])
+
+
+def _refresh_overall(student_id):
+    totals = dict.fromkeys(TOTAL_FIELDS, 0)
+    for values in StudentSemesterSummary.objects.filter(student_id=student_id).values_list(*TOTAL_FIELDS):
+        for field, value in zip(TOTAL_FIELDS, values):
+            totals[field] += value
+    StudentSummary.objects.update_or_create(student_id=student_id, defaults=totals)
+
+
+# --- Full / Set-based Rebuild ---
+def rebuild_student_summaries(student_ids=None, chunk_size=500, progress=None):
+    """
+    Rebuilds summaries from raw enrollments. With student_ids=None every
+    student is rebuilt; students are processed in chunks so memory stays
+    bounded. `progress(rebuilt)` is called after each chunk if given.
+    Returns the number of students rebuilt.
+    """
+    if student_ids is None:
+        student_ids = Student.objects.order_by('pk').values_list('pk', flat=True).iterator(chunk_size=chunk_size)
+    else:
+        student_ids = sorted(set(student_ids))
+
+    rebuilt = 0
+    departments = set()
+    chunk = []
+    for student_id in student_ids:
+        chunk.append(student_id)
+        if len(chunk) >= chunk_size:
+            rebuilt += _rebuild_chunk(chunk, departments)
+            chunk = []
+            if progress:
+                progress(rebuilt)
+    if chunk:
+        rebuilt += _rebuild_chunk(chunk, departments)
+    # Once at the end: ranks compare students across chunks
+    refresh_rankings(departments)
+    if chunk and progress:
+        progress(rebuilt)
+    return rebuilt
+
+
+def _rebuild_chunk(student_ids, departments):
+    # Only students that still exist get rows (ids may come from deleted rows)
+    students = dict(Student.objects.filter(pk__in=student_ids).values_list('pk', 'department_id'))
+    student_ids = list(students)
+    departments.update(students.values())
+    rows = (
+        Enrollment.objects.filter(student_id__in=student_ids)
+        .values('student_id', 'semester_id')
+        .annotate(**summary_totals(prefix=''))
+        .order_by()
+    )
+
+    semester_summaries = []
+    overall = {student_id: dict.fromkeys(TOTAL_FIELDS, 0) for student_id in student_ids}
+    for row in rows:
+        totals = _totals_from_row(row)
+        semester_summaries.append(StudentSemesterSummary(student_id=row['student_id'], semester_id=row['semester_id'], **totals).compute_derived())
+        for field, value in totals.items():
+            overall[row['student_id']][field] += value
+
+    with transaction.atomic():
+        # The recreated rows continue (and move) each student's data version
+        versions = dict(StudentSummary.objects.filter(student_id__in=student_ids).values_list('student_id', 'data_version'))
+        StudentSemesterSummary.objects.filter(student_id__in=student_ids).delete()
+        StudentSummary.objects.filter(student_id__in=student_ids).delete()
+        StudentSemesterSummary.objects.bulk_create(semester_summaries)
+        StudentSummary.objects.bulk_create(
+            StudentSummary(student_id=student_id, data_version=versions.get(student_id, 0) + 1, **totals).compute_derived()
+            for student_id, totals in overall.items()
+        )
+    return len(student_ids)
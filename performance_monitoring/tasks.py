@@ -0,0 +1,122 @@
+# performance_monitoring/tasks.py
+# Background job tasks (see jobs.py), registered when the app loads. Each
+# takes the JobProgress reporter first and JSON-serialisable keyword
+# arguments. A failed attempt may be retried from the start, so every task
+# is safe to run twice: enrollment skips existing rows, rebuilds replace
+# rows (snapshots included) and exports overwrite their file.
+import os
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+
+from . import db
+from .enrollments import bulk_enroll
+from .exports import export_queryset, iter_csv, iter_export_rows, write_xlsx
+from .jobs import JobAborted, task
+from .models import Department, Semester, Student
+from .snapshots import freeze_semester as freeze_semester_results
+from .summaries import rebuild_student_summaries
+
+# Rows between progress reports for exports
+EXPORT_PROGRESS_EVERY = 1000
+# Expired session rows deleted per statement
+SESSION_DELETE_CHUNK = 5000
+
+
+@task('enroll_in_semester')
+def enroll_in_semester(progress, student_ids, semester_id, chunk_size=500):
+    semester = Semester.objects.get(pk=semester_id)
+    created = skipped = 0
+    for start in range(0, len(student_ids), chunk_size):
+        chunk = student_ids[start:start + chunk_size]
+        try:
+            chunk_created, chunk_skipped = bulk_enroll(Student.objects.filter(pk__in=chunk), semester)
+        except ValidationError as error:
+            # The semester was frozen after the job was queued
+            raise JobAborted(' '.join(error.messages))
+        created += chunk_created
+        skipped += chunk_skipped
+        progress(start + len(chunk), len(student_ids), f"{created} enrollments created")
+    return {'semester': str(semester), 'created': created, 'skipped': skipped}
+
+
+@task('rebuild_summaries')
+def rebuild_summaries(progress, department_ids=None):
+    # Recomputes summaries (and so CGPAs) for the given departments, or everyone
+    students = Student.objects.order_by('pk')
+    if department_ids:
+        students = students.filter(department_id__in=department_ids)
+    student_ids = list(students.values_list('pk', flat=True))
+    total = len(student_ids)
+    progress(0, total)
+    rebuilt = rebuild_student_summaries(student_ids, progress=lambda done: progress(done, total))
+    return {'students': rebuilt}
+
+
+@task('freeze_semester')
+def freeze_semester(progress, semester_id):
+    # Rewrites every snapshot of the semester, so a retry starts over cleanly
+    semester = Semester.objects.get(pk=semester_id)
+    return {'semester': str(semester), 'snapshots': freeze_semester_results(semester)}
+
+
+@task('export_results')
+def export_results(progress, department_id=None, semester_name=None, academic_year=None, format='csv'):
+    """
+    Writes a result sheet to JOB_FILES_DIR; the admin serves it from the
+    job's page.
+    """
+    department = Department.objects.get(pk=department_id) if department_id else None
+    total = export_queryset(department, semester_name, academic_year).count()
+    progress(0, total)
+
+    def counted(rows):
+        for written, row in enumerate(rows, 1):
+            if written % EXPORT_PROGRESS_EVERY == 0:
+                progress(written, total)
+            yield row
+
+    rows = counted(iter_export_rows(department, semester_name, academic_year))
+    os.makedirs(settings.JOB_FILES_DIR, exist_ok=True)
+    filename = f'results-job-{progress.job_id}.{format}'
+    path = os.path.join(settings.JOB_FILES_DIR, filename)
+    if format == 'xlsx':
+        with write_xlsx(rows) as source, open(path, 'wb') as target:
+            while chunk := source.read(64 * 1024):
+                target.write(chunk)
+    else:
+        with open(path, 'w', newline='') as target:
+            target.writelines(iter_csv(rows))
+    return {'file': filename, 'rows': total}
+
+
+@task('clear_expired_sessions')
+def clear_expired_sessions(progress):
+    """
+    Deletes expired sessions. The table-backed engines are purged in
+    chunks so a results-week backlog never holds one long delete lock;
+    other engines get their own clear_expired() (a no-op for cookies).
+    """
+    if settings.SESSION_ENGINE not in ('django.contrib.sessions.backends.db', 'django.contrib.sessions.backends.cached_db'):
+        import_module(settings.SESSION_ENGINE).SessionStore.clear_expired()
+        return {'deleted': None}
+
+    now = timezone.now()
+    expired = Session.objects.filter(expire_date__lt=now)
+    total = expired.count()
+    progress(0, total)
+    deleted = 0
+    while keys := list(expired.values_list('session_key', flat=True)[:SESSION_DELETE_CHUNK]):
+        deleted += Session.objects.filter(session_key__in=keys).delete()[0]
+        progress(deleted, max(total, deleted))
+    return {'deleted': deleted}
+
+
+@task('optimize_database')
+def optimize_database(progress, full=False):
+    # Short and read-mostly; SQLite takes the write lock only for the
+    # statistics it rewrites and the checkpoint
+    return db.optimize_database(full=full)
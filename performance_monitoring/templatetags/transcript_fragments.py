@@ -0,0 +1,37 @@
+# performance_monitoring/templatetags/transcript_fragments.py
+# {% semester_fragment variant student semester %} ... {% endsemester_fragment %}
+# caches the enclosed markup for semesters that have ended, keyed by the
+# student's data version (see caching.get_cached_fragment).
+# Anything that changes between requests for the same data, such as class
+# positions, must stay outside the block.
+from django import template
+
+from ..caching import get_cached_fragment
+
+register = template.Library()
+
+
+class SemesterFragmentNode(template.Node):
+    def __init__(self, nodelist, variant, student, semester):
+        self.nodelist = nodelist
+        self.variant = variant
+        self.student = student
+        self.semester = semester
+
+    def render(self, context):
+        student = self.student.resolve(context)
+        semester = self.semester.resolve(context)
+        return get_cached_fragment(
+            self.variant.resolve(context), student, semester, lambda: self.nodelist.render(context),
+        )
+
+
+@register.tag
+def semester_fragment(parser, token):
+    bits = token.split_contents()
+    if len(bits) != 4:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' takes a variant, a student and a semester.")
+    nodelist = parser.parse(('endsemester_fragment',))
+    parser.delete_first_token()
+    variant, student, semester = (parser.compile_filter(bit) for bit in bits[1:])
+    return SemesterFragmentNode(nodelist, variant, student, semester)
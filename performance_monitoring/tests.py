@@ -1,3 +1,1453 @@
-from django.test import TestCase
+import base64
+import csv
+import gzip
+import io
+import json
+import tempfile
+import time
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.sessions.backends.db import SessionStore as DatabaseSessionStore
+from django.contrib.sessions.models import Session
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .aggregates import department_course_rows
+from .analytics import cohort_analytics, grade_points, letter_grades, load_cohort, student_cgpas
+from .benchmarks import delete_seeded_data, profile_request, seed_dataset
+from .caching import cache_stats, fragment_stats, get_cache, get_cached_transcript
+from .credentials import is_hashed
+from .enrollments import bulk_enroll
+from .grading import DEFAULT_SCALE, RECHECK_SECONDS, GradingScale, get_grading_scales, invalidate_grading_scales, letter_grade_expression
+from .imports import ScoreImportError, import_scores
+from .jobs import TASKS, claim_next, enqueue, heartbeat, record_failure, requeue_stale, run_pending, schedule_periodic
+from .middleware import fingerprint
+from .models import (
+    Course, Department, DepartmentPassword, Enrollment, GradeBand, Job, Semester, SemesterSnapshot, Student,
+    StudentSemesterSummary, StudentSummary, get_grade_point, letter_grade,
+)
+from .rankings import refresh_rankings
+from .snapshots import check_snapshots, freeze_semester, unfreeze_semester
+from .summaries import rebuild_student_summaries, summary_batch
+from .transcripts import TranscriptService
+
+# The manifest storage needs collectstatic output, which tests don't have
+plain_static_storage = override_settings(
+    STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+)
+
+
+class PerformanceTestCase(TestCase):
+    def setUp(self):
+        # Cached transcripts are keyed by pk, which the test database reuses
+        get_cache().clear()
+        # Rolled-back GradeBand rows don't fire signals; reload the scales now
+        # so the first lookup in a test doesn't add a query
+        invalidate_grading_scales()
+        get_grading_scales()
+
+
+def make_department_fixture(num_students=6):
+    # Class rankings are refreshed on commit, which the test transaction never does
+    with TestCase.captureOnCommitCallbacks(execute=True):
+        department = Department.objects.create(name="Computer Science")
+        DepartmentPassword.objects.create(department=department, password="secret")
+        first = Semester.objects.create(name="First", academic_year=2023)
+        second = Semester.objects.create(name="Second", academic_year=2023)
+        courses = [
+            Course.objects.create(course_code="CSC101", course_title="Intro", credit_unit=3, department=department, semester=first),
+            Course.objects.create(course_code="CSC102", course_title="Logic", credit_unit=2, department=department, semester=first),
+            Course.objects.create(course_code="CSC201", course_title="Data", credit_unit=4, department=department, semester=second),
+            Course.objects.create(course_code="GST100", course_title="Seminar", credit_unit=0, department=department, semester=second),
+        ]
+        scores = [(30, 70), (25, 40), (10, 35), (12, 30), (0, 5), (20, 29), (15, 50), (28, 33)]
+        students = []
+        for i in range(num_students):
+            student = Student.objects.create(
+                student_id=f"U2023/{i:04d}", name=f"Student {i}", email=f"s{i}@example.com",
+                department=department, custom_password="pass",
+            )
+            students.append(student)
+            # The last student has no enrollments at all
+            if i == num_students - 1:
+                continue
+            for j, course in enumerate(courses[: 2 + i % 3]):
+                ca, exam = scores[(i + j) % len(scores)]
+                Enrollment.objects.create(
+                    student=student, course=course, semester=course.semester,
+                    ca_score=ca, exam_score=exam, classes_attended=(i + j) % 11,
+                )
+    return department, students, courses
+
+
+def reload(student):
+    # As the views load a student: the cache version comes from the summary row
+    return Student.objects.select_related('summary').get(pk=student.pk)
+
+
+def reference_student_metrics(student):
+    # The per-student Python loop the dashboards were originally built on
+    credits = weighted = attendance = count = 0
+    for enrollment in student.enrollment_set.select_related('course'):
+        if enrollment.course.credit_unit > 0:
+            credits += enrollment.course.credit_unit
+            weighted += get_grade_point(enrollment.total_score) * enrollment.course.credit_unit
+        attendance += enrollment.attendance_percentage
+        count += 1
+    cgpa = weighted / credits if credits else 0
+    return cgpa, (attendance / count if count else 0), credits > 0
+
+
+@plain_static_storage
+class DepartmentAggregatesTests(PerformanceTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.department, cls.students, cls.courses = make_department_fixture()
+
+    def test_course_rows_count_distinct_students(self):
+        for course in department_course_rows(self.department):
+            expected = Enrollment.objects.filter(course=course).values('student').distinct().count()
+            self.assertEqual(course.enrolled_students_count, expected)
+
+    def test_dashboard_query_count_is_constant(self):
+        session = self.client.session
+        session['department_id'] = self.department.pk
+        session['department_name'] = self.department.name
+        session.save()
+        # Session, ETag fingerprint, department, student count, average CGPA,
+        # course rows, leaderboard
+        with self.assertNumQueries(7):
+            response = self.client.get(reverse('department_dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['total_students_in_dept'], len(self.students))
+        cgpas = [cgpa for cgpa, _, has_cgpa in map(reference_student_metrics, self.students) if has_cgpa]
+        self.assertAlmostEqual(response.context['avg_department_cgpa'], sum(cgpas) / len(cgpas))
+
+
+class StudentSummaryTests(PerformanceTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.department, cls.students, cls.courses = make_department_fixture()
+
+    def assertSummariesMatchEnrollments(self):
+        for student in self.students:
+            cgpa, attendance, _ = reference_student_metrics(student)
+            summary = StudentSummary.objects.get(student=student)
+            self.assertAlmostEqual(summary.cgpa, cgpa)
+            self.assertAlmostEqual(summary.average_attendance, attendance)
+
+    def test_signals_keep_summaries_current(self):
+        self.assertSummariesMatchEnrollments()
+
+        enrollment = Enrollment.objects.filter(student=self.students[0]).first()
+        enrollment.exam_score = 10
+        enrollment.save()
+        Enrollment.objects.filter(student=self.students[1]).first().delete()
+        course = self.courses[0]
+        course.credit_unit = 5
+        course.save()
+        self.assertSummariesMatchEnrollments()
+
+    def test_semester_rows_track_enrollments(self):
+        student = self.students[2]
+        semester_ids = set(student.enrollment_set.values_list('semester_id', flat=True))
+        self.assertEqual(set(student.semester_summaries.values_list('semester_id', flat=True)), semester_ids)
+        student.enrollment_set.filter(semester=self.courses[2].semester).delete()
+        self.assertFalse(student.semester_summaries.filter(semester=self.courses[2].semester).exists())
+
+    def test_batch_mode_defers_to_one_rebuild(self):
+        student = self.students[0]
+        with summary_batch():
+            for enrollment in student.enrollment_set.all():
+                enrollment.ca_score = 0
+                enrollment.save()
+            # Nothing is refreshed until the batch ends
+            self.assertNotEqual(StudentSummary.objects.get(student=student).weighted_grade_points, 0)
+        self.assertSummariesMatchEnrollments()
+
+    def test_rebuild_matches_incremental_updates(self):
+        before = list(StudentSemesterSummary.objects.order_by('student', 'semester').values(
+            'student', 'semester', 'total_credit_units', 'weighted_grade_points', 'classes_attended_sum', 'num_courses'))
+        rebuild_student_summaries()
+        after = list(StudentSemesterSummary.objects.order_by('student', 'semester').values(
+            'student', 'semester', 'total_credit_units', 'weighted_grade_points', 'classes_attended_sum', 'num_courses'))
+        self.assertEqual(before, after)
+        self.assertEqual(StudentSummary.objects.count(), len(self.students))
+
+
+@plain_static_storage
+class TranscriptServiceTests(PerformanceTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.department, cls.students, cls.courses = make_department_fixture()
+
+    def test_transcript_matches_enrollments(self):
+        for student in self.students:
+            transcript = TranscriptService.for_student(student)
+            cgpa, attendance, _ = reference_student_metrics(student)
+            self.assertAlmostEqual(transcript.overall_cgpa, cgpa)
+            self.assertAlmostEqual(transcript.overall_average_attendance, attendance)
+            enrollments = list(student.enrollment_set.select_related('course'))
+            self.assertEqual(sum(len(semester.courses) for semester in transcript.semesters), len(enrollments))
+            self.assertEqual(len(transcript.chart.course_codes), len(enrollments))
+            grades = {e.course.course_code: e.grade for e in enrollments}
+            for semester in transcript.semesters:
+                for course in semester.courses:
+                    self.assertEqual(course.grade, grades[course.course_code])
+
+    def test_transcript_is_fetched_in_two_queries(self):
+        # Frozen semesters' snapshots, then the other semesters' enrollments
+        with self.assertNumQueries(2):
+            TranscriptService.for_student(self.students[2])
+
+    def test_student_dashboard_query_budget(self):
+        student = self.students[2]
+        session = self.client.session
+        session['student_id'] = student.student_id
+        session.save()
+        # Session, ETag fingerprint, student + department + summary, snapshots,
+        # enrollments, semester positions
+        with self.assertNumQueries(6):
+            response = self.client.get(reverse('student_dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, self.courses[0].course_code)
+
+    def test_student_report_query_budget(self):
+        student = self.students[2]
+        # ETag fingerprint, student + department + summary, snapshots, enrollments,
+        # semester positions
+        with self.assertNumQueries(5):
+            response = self.client.get(reverse('student_performance_report', args=[student.student_id]))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, self.courses[0].course_title)
+
+
+class TranscriptCacheTests(PerformanceTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.department, cls.students, cls.courses = make_department_fixture()
+
+    def test_second_read_is_a_hit(self):
+        student = reload(self.students[1])
+        first = get_cached_transcript(student)
+        with self.assertNumQueries(0):
+            second = get_cached_transcript(student)
+        self.assertEqual(first, second)
+        self.assertEqual(cache_stats()['hits'], 1)
+        self.assertEqual(cache_stats()['misses'], 1)
+
+    def test_enrollment_change_invalidates_only_that_student(self):
+        student, other = reload(self.students[0]), reload(self.students[1])
+        before = get_cached_transcript(student)
+        get_cached_transcript(other)
+        enrollment = student.enrollment_set.first()
+        enrollment.ca_score = 0
+        enrollment.exam_score = 0
+        # Writers only move the version in the database, so a change made
+        # by another process (worker, command) is seen here too
+        with mock.patch('performance_monitoring.caching.get_cache', side_effect=AssertionError):
+            enrollment.save()
+        after = get_cached_transcript(reload(student))
+        self.assertNotEqual(before.overall_cgpa, after.overall_cgpa)
+        self.assertEqual(after, TranscriptService.for_student(student))
+        with self.assertNumQueries(0):
+            get_cached_transcript(other)
+
+    def test_course_change_invalidates_transcripts(self):
+        student = self.students[0]
+        get_cached_transcript(reload(student))
+        course = self.courses[0]
+        course.course_title = "Renamed"
+        course.save()
+        titles = [c.course_title for s in get_cached_transcript(reload(student)).semesters for c in s.courses]
+        self.assertIn("Renamed", titles)
+
+
+@plain_static_storage
+class SemesterFragmentTests(PerformanceTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.department, cls.students, cls.courses = make_department_fixture()
+        # The first semester is over, the second still open
+        cls.ended = cls.courses[0].semester
+        Semester.objects.filter(pk=cls.ended.pk).update(end_date=timezone.localdate() - timedelta(days=1))
+
+    def report(self, student):
+        return self.client.get(reverse('student_performance_report', args=[student.student_id]))
+
+    def test_only_ended_semesters_are_cached(self):
+        student = self.students[2]
+        first = self.report(student)
+        second = self.report(student)
+        self.assertEqual(first.content, second.content)
+        stats = fragment_stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+        self.assertGreater(stats['saved_ms'], 0)
+
+    def test_result_change_rerenders_the_ended_semester(self):
+        student = self.students[0]
+        self.report(student)
+        enrollment = Enrollment.objects.get(student=student, course=self.courses[0])
+        enrollment.ca_score, enrollment.exam_score = 0, 0
+        enrollment.save()
+        response = self.report(student)
+        self.assertContains(response, 'class="grade-F"')
+        self.assertEqual(fragment_stats()['misses'], 2)
+
+    def test_pages_cache_their_own_markup(self):
+        student = self.students[2]
+        session = self.client.session
+        session['student_id'] = student.student_id
+        session.save()
+        self.report(student)
+        self.client.get(reverse('student_dashboard'))
+        self.assertEqual(fragment_stats()['misses'], 2)
+
+
+@plain_static_storage
+class ChartDataTests(PerformanceTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.department, cls.students, cls.courses = make_department_fixture()
+
+    def login(self, **values):
+        session = self.client.session
+        session.update(values)
+        session.save()
+
+    def test_pages_link_a_versioned_columnar_payload(self):
+        student = self.students[2]
+        # Enough courses for the payload to be worth compressing
+        semester = self.courses[2].semester
+        for i in range(20):
+            course = Course.objects.create(
+                course_code=f"ELE{i:03d}", course_title="Elective", credit_unit=1, department=self.department, semester=semester,
+            )
+            Enrollment.objects.create(student=student, course=course, semester=semester, ca_score=20, exam_score=40, classes_attended=7)
+        self.login(student_id=student.student_id)
+        page = self.client.get(reverse('student_dashboard'))
+        self.assertNotContains(page, 'course_performance_data')
+        url = page.context['chart_data_url']
+        report = self.client.get(reverse('student_performance_report', args=[student.student_id]))
+        self.assertEqual(report.context['chart_data_url'], url)
+
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('private', response['Cache-Control'])
+        data = json.loads(gzip.decompress(response.content))
+        chart = TranscriptService.for_student(student).chart
+        self.assertEqual(data['course_codes'], list(chart.course_codes))
+        self.assertEqual(data['total_scores'], list(chart.total_scores))
+        self.assertEqual(len(data['attendance']), len(chart.attendance))
+
+    def test_regrade_changes_the_url_and_revalidates_the_old_one(self):
+        student = self.students[0]
+        self.login(student_id=student.student_id)
+        url = self.client.get(reverse('student_dashboard')).context['chart_data_url']
+        etag = self.client.get(url)['ETag']
+        # Session, student + summary
+        with self.assertNumQueries(2):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        enrollment = Enrollment.objects.filter(student=student).first()
+        enrollment.exam_score -= 1
+        enrollment.save()
+        new_url = self.client.get(reverse('student_dashboard')).context['chart_data_url']
+        self.assertNotEqual(new_url, url)
+        stale = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(stale.status_code, 200)
+        self.assertIn('no-cache', stale['Cache-Control'])
+
+    def test_other_students_are_forbidden(self):
+        self.login(student_id=self.students[0].student_id)
+        response = self.client.get(reverse('student_chart_data', args=[self.students[1].student_id]))
+        self.assertEqual(response.status_code, 403)
+        self.login(student_id=None, department_id=self.department.pk)
+        response = self.client.get(reverse('student_chart_data', args=[self.students[1].student_id]))
+        self.assertEqual(response.status_code, 200)
+
+    def test_older_department_sessions_are_normalised(self):
+        url = reverse('student_chart_data', args=[self.students[1].student_id])
+        self.login(department_id=str(self.department.pk))
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.login(department_id='Computer Science')
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+    def test_url_version_is_shared_between_processes(self):
+        # Another worker has its own (empty) cache; it must link the same URL
+        self.login(student_id=self.students[0].student_id)
+        url = self.client.get(reverse('student_dashboard')).context['chart_data_url']
+        get_cache().clear()
+        invalidate_grading_scales()
+        self.assertEqual(self.client.get(reverse('student_dashboard')).context['chart_data_url'], url)
+        self.assertIn('immutable', self.client.get(url)['Cache-Control'])
+
+
+class BulkEnrollTests(PerformanceTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.department, cls.students, cls.courses = make_department_fixture()
+
+    def test_creates_only_missing_enrollments(self):
+        semester = self.courses[2].semester
+        semester_courses = Course.objects.filter(department=self.department, semester=semester).count()
+        students = Student.objects.filter(department=self.department)
+        existing = Enrollment.objects.filter(semester=semester).count()
+
+        created, skipped = bulk_enroll(students, semester)
+        self.assertEqual(skipped, existing)
+        self.assertEqual(created, len(self.students) * semester_courses - existing)
+        self.assertEqual(Enrollment.objects.filter(semester=semester).count(), len(self.students) * semester_courses)
+
+        # Derived data is refreshed even though bulk_create skips signals
+        for student in self.students:
+            cgpa, _, _ = reference_student_metrics(student)
+            self.assertAlmostEqual(StudentSummary.objects.get(student=student).cgpa, cgpa)
+
+        self.assertEqual(bulk_enroll(students, semester), (0, len(self.students) * semester_courses))
+
+
+@plain_static_storage
+class ScoreImportTests(PerformanceTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.department, cls.students, cls.courses = make_department_fixture()
+
+    def csv_file(self, lines):
+        return io.BytesIO(("student_id,course_code,ca_score,exam_score,classes_attended\n" + "\n".join(lines)).encode())
+
+    def test_valid_rows_are_applied_and_errors_reported(self):
+        first = self.students[0]
+        lines = [
+            f"{first.student_id},CSC101,20,50,9",
+            f"{first.student_id},CSC102,31,50,9",
+            f"UNKNOWN,CSC101,10,10,1",
+            f"{first.student_id},CSC201,abc,10,1",
+            f"{self.students[-1].student_id},CSC101,10,10,1",
+        ]
+        result = import_scores(self.csv_file(lines), "scores.csv")
+        self.assertEqual((result.rows, result.updated, result.error_count), (5, 1, 4))
+        self.assertEqual([line for line, _ in result.errors], [3, 4, 5, 6])
+
+        enrollment = Enrollment.objects.get(student=first, course__course_code="CSC101")
+        self.assertEqual((enrollment.ca_score, enrollment.exam_score, enrollment.classes_attended), (20, 50, 9))
+        cgpa, _, _ = reference_student_metrics(first)
+        self.assertAlmostEqual(StudentSummary.objects.get(student=first).cgpa, cgpa)
+
+    def test_classes_attended_must_be_out_of_ten(self):
+        first = self.students[0]
+        lines = [
+            f"{first.student_id},CSC101,20,50,11",
+            f"{first.student_id},CSC102,20,50,-1",
+        ]
+        before = list(Enrollment.objects.values_list('classes_attended', flat=True))
+        result = import_scores(self.csv_file(lines), "scores.csv")
+        self.assertEqual((result.updated, result.error_count), (0, 2))
+        self.assertTrue(all(message.startswith('classes_attended:') for _, message in result.errors))
+        self.assertEqual(list(Enrollment.objects.values_list('classes_attended', flat=True)), before)
+
+    def test_scores_cannot_be_negative(self):
+        first = self.students[0]
+        lines = [
+            f"{first.student_id},CSC101,-5,50,9",
+            f"{first.student_id},CSC102,20,-1,9",
+        ]
+        result = import_scores(self.csv_file(lines), "scores.csv")
+        self.assertEqual((result.updated, result.error_count), (0, 2))
+        self.assertEqual([message.split(':')[0] for _, message in result.errors], ['ca_score', 'exam_score'])
+
+    def test_unreadable_files_are_import_errors(self):
+        latin1 = io.BytesIO(f"student_id,course_code,ca_score,exam_score\n{self.students[0].student_id},CSC101,1,2\nJos\xe9,CSC101,1,2\n".encode('latin-1'))
+        with self.assertRaisesMessage(ScoreImportError, "UTF-8"):
+            import_scores(latin1, "scores.csv")
+        with self.assertRaisesMessage(ScoreImportError, "not a valid XLSX"):
+            import_scores(io.BytesIO(b"not a zip file"), "scores.xlsx")
+        # Nothing from before the bad line was kept
+        self.assertFalse(Enrollment.objects.filter(ca_score=1, exam_score=2).exists())
+
+        admin_user = User.objects.create_superuser("registry", "registry@example.com", "password")
+        self.client.force_login(admin_user)
+        upload = SimpleUploadedFile("scores.xlsx", b"not a zip file")
+        response = self.client.post(reverse('admin:performance_monitoring_enrollment_import_scores'), {'file': upload})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("not a valid XLSX", str(response.context['form'].errors))
+
+    def test_dry_run_writes_nothing(self):
+        first = self.students[0]
+        before = list(Enrollment.objects.values_list('ca_score', 'exam_score'))
+        result = import_scores(self.csv_file([f"{first.student_id},CSC101,1,2,3"]), "scores.csv", dry_run=True)
+        self.assertEqual(result.updated, 1)
+        self.assertEqual(list(Enrollment.objects.values_list('ca_score', 'exam_score')), before)
+
+    def test_admin_upload(self):
+        admin_user = User.objects.create_superuser("registry", "registry@example.com", "password")
+        self.client.force_login(admin_user)
+        first = self.students[0]
+        upload = SimpleUploadedFile("scores.csv", self.csv_file([f"{first.student_id},CSC101,5,6,7"]).read())
+        response = self.client.post(reverse('admin:performance_monitoring_enrollment_import_scores'), {'file': upload})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Enrollment.objects.get(student=first, course__course_code="CSC101").total_score, 11)
+
+
+class ResultExportTests(PerformanceTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.department, cls.students, cls.courses = make_department_fixture()
+        other = Department.objects.create(name="Physics")
+        Student.objects.create(student_id="P/0001", name="Other", email="p@example.com", department=other)
+
+    def login_department(self):
+        session = self.client.session
+        session['department_id'] = self.department.pk
+        session.save()
+
+    def test_csv_export_streams_department_rows(self):
+        self.login_department()
+        response = self.client.get(reverse('export_results'), {'semester': 'First'})
+        self.assertTrue(response.streaming)
+        rows = list(csv.DictReader(io.StringIO(b"".join(response.streaming_content).decode())))
+        enrollments = Enrollment.objects.filter(student__department=self.department, semester__name='First')
+        self.assertEqual(len(rows), enrollments.count())
+        for enrollment in enrollments.select_related('student', 'course'):
+            row = next(r for r in rows if r['student_id'] == enrollment.student.student_id and r['course_code'] == enrollment.course.course_code)
+            self.assertEqual(row['grade'], enrollment.grade)
+            self.assertEqual(int(row['total_score']), enrollment.total_score)
+            cgpa, _, _ = reference_student_metrics(enrollment.student)
+            self.assertEqual(row['cgpa'], str(round(cgpa, 2)))
+
+    def test_export_requires_login(self):
+        response = self.client.get(reverse('export_results'))
+        self.assertRedirects(response, reverse('admin_department_login'), fetch_redirect_response=False)
+
+
+class DepartmentStudentSearchTests(PerformanceTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.department, cls.students, cls.courses = make_department_fixture(num_students=12)
+
+    def setUp(self):
+        super().setUp()
+        session = self.client.session
+        session['department_id'] = self.department.pk
+        session.save()
+
+    def fetch_all(self, **params):
+        results, cursor = [], None
+        while True:
+            query = {**params, 'limit': 5}
+            if cursor:
+                query['cursor'] = cursor
+            data = self.client.get(reverse('department_student_search'), query).json()
+            results.extend(data['results'])
+            cursor = data['next_cursor']
+            if not cursor:
+                return results
+
+    def test_pages_cover_every_student_once(self):
+        results = self.fetch_all()
+        self.assertEqual([r['student_id'] for r in results], sorted(s.student_id for s in self.students))
+
+    def test_sort_by_cgpa_descending(self):
+        results = self.fetch_all(sort='cgpa', direction='desc')
+        self.assertEqual(len(results), len(self.students))
+        expected = sorted(
+            ((-reference_student_metrics(s)[0], s.student_id) for s in self.students),
+        )
+        self.assertEqual([r['student_id'] for r in results], [student_id for _, student_id in expected])
+
+    def test_prefix_filter(self):
+        results = self.fetch_all(q='student 1')
+        self.assertEqual({r['name'] for r in results}, {'Student 1', 'Student 10', 'Student 11'})
+
+    def test_bad_sort_is_rejected(self):
+        response = self.client.get(reverse('department_student_search'), {'sort': 'email'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_crafted_cursors_are_rejected(self):
+        for sort, payload in [('cgpa', [[1], 'a']), ('cgpa', ['3.5', 'a']), ('name', [1, 'a']), ('student_id', ['a', 2])]:
+            cursor = base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+            response = self.client.get(reverse('department_student_search'), {'sort': sort, 'cursor': cursor})
+            self.assertEqual(response.status_code, 400, (sort, payload))
+
+
+@plain_static_storage
+class BenchmarkSeedTests(PerformanceTestCase):
+    def test_seeded_data_has_matching_summaries(self):
+        counts = seed_dataset(departments=2, students_per_department=5, courses_per_semester=2, academic_years=1)
+        self.assertEqual(counts, {'departments': 2, 'semesters': 2, 'courses': 8, 'students': 10, 'enrollments': 40})
+        for student in Student.objects.select_related('summary'):
+            cgpa, attendance, _ = reference_student_metrics(student)
+            self.assertAlmostEqual(student.summary.cgpa, cgpa)
+            self.assertAlmostEqual(student.summary.average_attendance, attendance)
+
+        self.assertEqual(delete_seeded_data(), 2)
+        self.assertFalse(Student.objects.exists())
+        self.assertFalse(StudentSummary.objects.exists())
+
+    def test_profile_request_counts_queries(self):
+        seed_dataset(departments=1, students_per_department=3, courses_per_semester=2, academic_years=1)
+        student = Student.objects.first()
+        session = self.client.session
+        session['student_id'] = student.student_id
+        session.save()
+        metrics = profile_request(self.client, reverse('student_dashboard'), repeat=2, before_each=get_cache().clear)
+        self.assertEqual(metrics['status'], 200)
+        self.assertEqual(metrics['queries'], 6)
+        self.assertGreater(metrics['peak_kib'], 0)
+
+
+@plain_static_storage
+@override_settings(REQUEST_PROFILING_SAMPLE_RATE=1.0, REQUEST_PROFILING_HEADERS=True)
+class RequestProfilingTests(PerformanceTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.department, cls.students, cls.courses = make_department_fixture()
+
+    def test_fingerprint_ignores_parameters(self):
+        self.assertEqual(
+            fingerprint("SELECT * FROM t WHERE id IN (%s, %s, %s) AND name = 'x' LIMIT 21"),
+            fingerprint("SELECT * FROM t WHERE id IN (%s) AND name = 'y' LIMIT 21"),
+        )
+
+    def test_profiled_request_logs_and_sets_server_timing(self):
+        session = self.client.session
+        session['student_id'] = self.students[0].student_id
+        session.save()
+        with self.assertLogs('performance_monitoring.requests', 'INFO') as logs:
+            response = self.client.get(reverse('student_dashboard'))
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['view'], 'student_dashboard')
+        self.assertEqual(record['queries'], 6)
+        self.assertGreater(record['template_ms'], 0)
+        self.assertIn('db;dur=', response['Server-Timing'])
+
+        with tempfile.NamedTemporaryFile('w', suffix='.log') as log_file:
+            log_file.write("2024-01-01T00:00:00 app[web]: " + logs.records[0].getMessage() + "\n")
+            log_file.flush()
+            output = io.StringIO()
+            call_command('profile_report', log_file.name, stdout=output)
+        self.assertIn('GET student_dashboard', output.getvalue())
+
+    @override_settings(REQUEST_PROFILING_SAMPLE_RATE=0)
+    def test_unsampled_requests_are_untouched(self):
+        with self.assertNoLogs('performance_monitoring.requests', 'INFO'):
+            response = self.client.get(reverse('student_login'))
+        self.assertNotIn('Server-Timing', response)
+
+
+@plain_static_storage
+class CohortAnalyticsTests(PerformanceTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.department, cls.students, cls.courses = make_department_fixture(num_students=10)
+
+    def test_vectorised_grades_match_scalar_functions(self):
+        totals = np.arange(-5, 111)
+        self.assertEqual(grade_points(totals).tolist(), [get_grade_point(int(t)) for t in totals])
+        self.assertEqual(letter_grades(totals).tolist(), [letter_grade(int(t)) for t in totals])
+
+    def test_cgpas_and_pass_rates_match_enrollments(self):
+        student_ids, cgpas = student_cgpas(load_cohort(self.department))
+        for pk, cgpa in zip(student_ids.tolist(), cgpas.tolist()):
+            self.assertAlmostEqual(cgpa, reference_student_metrics(Student.objects.get(pk=pk))[0])
+
+        analytics = cohort_analytics(self.department)
+        enrollments = list(Enrollment.objects.filter(student__department=self.department))
+        self.assertEqual(analytics.enrollments, len(enrollments))
+        expected = {letter: 0 for letter in analytics.grade_distribution}
+        for enrollment in enrollments:
+            expected[enrollment.grade] += 1
+        self.assertEqual(analytics.grade_distribution, expected)
+        for course in analytics.courses:
+            results = [e for e in enrollments if e.course_id == course.course_id]
+            self.assertEqual(course.enrolled, len(results))
+            self.assertEqual(course.passed, sum(e.grade != 'F' for e in results))
+
+    def test_semester_filter_and_page(self):
+        first = Semester.objects.get(name="First")
+        analytics = cohort_analytics(self.department, first)
+        self.assertEqual(analytics.enrollments, Enrollment.objects.filter(student__department=self.department, semester=first).count())
+
+        session = self.client.session
+        session['department_id'] = self.department.pk
+        session.save()
+        response = self.client.get(reverse('department_analytics'), {'semester': first.pk})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "CSC101")
+        self.assertEqual(response.context['selected_semester'], first)
+
+
+class GradingScaleTests(PerformanceTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.department, cls.students, cls.courses = make_department_fixture(num_students=10)
+
+    def test_default_scale_boundaries(self):
+        expected = {-1: ('F', 0), 0: ('F', 0), 39: ('F', 0), 40: ('E', 1), 44: ('E', 1), 45: ('D', 2), 49: ('D', 2),
+                    50: ('C', 3), 59: ('C', 3), 60: ('B', 4), 69: ('B', 4), 70: ('A', 5), 100: ('A', 5), 101: ('F', 0)}
+        for total, (letter, point) in expected.items():
+            self.assertEqual((DEFAULT_SCALE.letter(total), DEFAULT_SCALE.point(total)), (letter, point), total)
+            self.assertEqual((letter_grade(total), get_grade_point(total)), (letter, point), total)
+
+    def test_other_processes_pick_up_scale_changes(self):
+        self.assertEqual(letter_grade(65), 'B')
+        # As written by another process: no signal reaches this one
+        GradeBand.objects.bulk_create([
+            GradeBand(letter='A', min_score=60, max_score=100, grade_point=5),
+            GradeBand(letter='B', min_score=50, max_score=59, grade_point=4),
+        ])
+        self.assertEqual(letter_grade(65), 'B')  # until the next recheck
+        with mock.patch('performance_monitoring.grading.time.monotonic', return_value=time.monotonic() + RECHECK_SECONDS):
+            self.assertEqual(letter_grade(65), 'A')
+
+    def test_invalid_scales_are_rejected(self):
+        with self.assertRaises(ValueError):
+            GradingScale([(50, 100, 'A', 5), (40, 60, 'B', 4)])
+        with self.assertRaises(ValueError):
+            GradingScale([(70, 101, 'A', 5)])
+
+    def test_sql_expression_matches_python(self):
+        rows = Enrollment.objects.annotate(letter=letter_grade_expression()).select_related('semester')
+        for enrollment in rows:
+            self.assertEqual(enrollment.letter, enrollment.grade)
+
+    def test_year_override_regrades_summaries_and_transcripts(self):
+        # Someone with a result the stricter scale grades lower
+        student = next(
+            s for s in self.students
+            if any(70 <= e.total_score < 80 or 40 <= e.total_score < 45 for e in s.enrollment_set.all())
+        )
+        before = get_cached_transcript(reload(student)).overall_cgpa
+        # A stricter 2023 scale: an A needs 80, and there is no E
+        for letter, low, high, point in (('A', 80, 100, 5), ('B', 60, 79, 4), ('C', 50, 59, 3), ('D', 45, 49, 2)):
+            GradeBand.objects.create(academic_year=2023, letter=letter, min_score=low, max_score=high, grade_point=point)
+
+        for enrollment in Enrollment.objects.select_related('semester'):
+            total = enrollment.total_score
+            expected = 'A' if total >= 80 else 'B' if total >= 60 else 'C' if total >= 50 else 'D' if total >= 45 else 'F'
+            self.assertEqual(enrollment.grade, expected)
+
+        for other in self.students:
+            transcript = get_cached_transcript(reload(other))
+            summary = StudentSummary.objects.get(student=other)
+            self.assertAlmostEqual(summary.cgpa, transcript.overall_cgpa)
+        self.assertLess(get_cached_transcript(reload(student)).overall_cgpa, before)
+
+
+class AsyncApiTests(PerformanceTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.department, cls.students, cls.courses = make_department_fixture()
+
+    def login(self, **values):
+        session = self.client.session
+        session.update(values)
+        session.save()
+        self.async_client.cookies[settings.SESSION_COOKIE_NAME] = session.session_key
+
+    async def test_student_transcript_matches_service(self):
+        student = self.students[1]
+        await sync_to_async(self.login)(student_id=student.student_id)
+        response = await self.async_client.get(reverse('api_student_transcript', args=[student.student_id]))
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        expected = await sync_to_async(TranscriptService.for_student)(student)
+        self.assertAlmostEqual(data['overall_cgpa'], expected.overall_cgpa)
+        self.assertEqual(len(data['semesters']), len(expected.semesters))
+        self.assertEqual(data['semesters'][0]['courses'][0]['grade'], expected.semesters[0].courses[0].grade)
+
+        # Another student's transcript is off limits
+        other = await self.async_client.get(reverse('api_student_transcript', args=[self.students[2].student_id]))
+        self.assertEqual(other.status_code, 403)
+
+    async def test_department_summary(self):
+        await sync_to_async(self.login)(department_id=self.department.pk)
+        response = await self.async_client.get(reverse('api_department_summary', args=[self.department.pk]))
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['student_count'], len(self.students))
+        expected_counts = await sync_to_async(lambda: {c.course_code: c.enrolled_students_count for c in department_course_rows(self.department)})()
+        self.assertEqual({c['course_code']: c['enrolled_students_count'] for c in data['courses']}, expected_counts)
+
+    async def test_requires_login(self):
+        response = await self.async_client.get(reverse('api_department_summary', args=[self.department.pk]))
+        self.assertEqual(response.status_code, 403)
+
+
+@plain_static_storage
+class ConditionalDashboardTests(PerformanceTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.department, cls.students, cls.courses = make_department_fixture()
+
+    def login(self, **values):
+        session = self.client.session
+        session.update(values)
+        session.save()
+
+    def test_unchanged_student_dashboard_is_not_modified(self):
+        student = self.students[1]
+        self.login(student_id=student.student_id)
+        first = self.client.get(reverse('student_dashboard'))
+        self.assertTrue(first.has_header('ETag'))
+        self.assertTrue(first.has_header('Last-Modified'))
+        self.assertIn('private', first['Cache-Control'])
+
+        # The session and the fingerprint; no transcript work
+        with self.assertNumQueries(2):
+            second = self.client.get(reverse('student_dashboard'), HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 304)
+
+        enrollment = Enrollment.objects.filter(student=student).first()
+        enrollment.exam_score -= 1
+        enrollment.save()
+        third = self.client.get(reverse('student_dashboard'), HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(third.status_code, 200)
+        self.assertNotEqual(third['ETag'], first['ETag'])
+
+    def test_etags_do_not_depend_on_the_process_cache(self):
+        # Another worker has its own (empty) cache; it must agree on the ETags
+        student = self.students[1]
+        report = reverse('student_performance_report', args=[student.student_id])
+        self.login(department_id=self.department.pk)
+        etags = [self.client.get(report)['ETag'], self.client.get(reverse('department_dashboard'))['ETag']]
+        get_cache().clear()
+        self.assertEqual(self.client.get(report, HTTP_IF_NONE_MATCH=etags[0]).status_code, 304)
+        self.assertEqual(self.client.get(reverse('department_dashboard'), HTTP_IF_NONE_MATCH=etags[1]).status_code, 304)
+
+    def test_new_course_changes_department_etag(self):
+        self.login(department_id=self.department.pk)
+        url = reverse('department_dashboard')
+        etag = self.client.get(url)['ETag']
+        Course.objects.create(course_code="CSC301", course_title="Compilers", credit_unit=3, department=self.department, semester=self.courses[0].semester)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_renaming_a_leaderboard_student_changes_department_etag(self):
+        self.login(department_id=self.department.pk)
+        url = reverse('department_dashboard')
+        response = self.client.get(url)
+        top = response.context['leaderboard'][0].student
+        top.name = "Renamed Student"
+        top.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Renamed Student")
+
+    def test_deleting_an_enrollment_changes_the_etag(self):
+        student = self.students[1]
+        url = reverse('student_performance_report', args=[student.student_id])
+        etag = self.client.get(url)['ETag']
+        Enrollment.objects.filter(student=student).first().delete()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_score_import_changes_department_etag(self):
+        self.login(department_id=self.department.pk)
+        url = reverse('department_dashboard')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        first = self.students[0]
+        enrollment = Enrollment.objects.filter(student=first, course__course_code="CSC101").get()
+        rows = f"student_id,course_code,ca_score,exam_score\n{first.student_id},CSC101,{enrollment.ca_score},{enrollment.exam_score - 1}\n"
+        import_scores(io.BytesIO(rows.encode()), "scores.csv")
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+@plain_static_storage
+@override_settings(JOB_RETRY_DELAY=0)
+class BackgroundJobTests(PerformanceTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.department, cls.students, cls.courses = make_department_fixture()
+
+    def test_worker_runs_queued_enrollment(self):
+        semester = self.courses[2].semester
+        student_ids = [student.pk for student in self.students]
+        job = enqueue('enroll_in_semester', {'student_ids': student_ids, 'semester_id': semester.pk, 'chunk_size': 4})
+        existing = Enrollment.objects.filter(semester=semester).count()
+
+        call_command('run_worker', processes=0, burst=True, stdout=io.StringIO())
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.SUCCEEDED)
+        self.assertEqual((job.progress_done, job.progress_total, job.progress_percent), (6, 6, 100))
+        self.assertEqual(job.result['created'] + job.result['skipped'], len(self.students) * 2)
+        self.assertEqual(job.result['skipped'], existing)
+        self.assertEqual(Enrollment.objects.filter(semester=semester).count(), len(self.students) * 2)
+
+    def test_enrollment_in_a_semester_frozen_since_queueing_fails_at_once(self):
+        semester = self.courses[2].semester
+        job = enqueue('enroll_in_semester', {'student_ids': [self.students[0].pk], 'semester_id': semester.pk})
+        freeze_semester(semester)
+        run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 1))
+        self.assertIn('frozen', job.error)
+
+    def test_failed_attempts_are_retried_then_marked_failed(self):
+        calls = {}
+
+        def flaky(progress, fail_times):
+            calls[fail_times] = calls.get(fail_times, 0) + 1
+            if calls[fail_times] <= fail_times:
+                raise RuntimeError("boom")
+            return {'calls': calls[fail_times]}
+
+        with mock.patch.dict(TASKS, {'flaky': flaky}):
+            recovered = enqueue('flaky', {'fail_times': 1})
+            doomed = enqueue('flaky', {'fail_times': 10}, max_attempts=2)
+            run_pending()
+
+        recovered.refresh_from_db()
+        self.assertEqual((recovered.status, recovered.attempts, recovered.result), (Job.SUCCEEDED, 2, {'calls': 2}))
+        doomed.refresh_from_db()
+        self.assertEqual((doomed.status, doomed.attempts), (Job.FAILED, 2))
+        self.assertIn('RuntimeError: boom', doomed.error)
+
+    def test_claims_are_exclusive_and_stale_jobs_are_recovered(self):
+        job = enqueue('rebuild_summaries')
+        self.assertEqual(claim_next('a'), job.pk)
+        self.assertIsNone(claim_next('b'))
+
+        Job.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(requeue_stale(600, worker='a'), 0)
+        self.assertEqual(requeue_stale(600), 1)
+        self.assertEqual(claim_next('b'), job.pk)
+
+    def test_heartbeats_keep_long_jobs_from_being_requeued(self):
+        job = enqueue('freeze_semester', {'semester_id': self.courses[0].semester_id})
+        claim_next('a')
+        Job.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(heartbeat('a'), 1)
+        self.assertEqual(requeue_stale(600), 0)
+
+    def test_failures_only_touch_the_claim_they_belong_to(self):
+        job = enqueue('rebuild_summaries', max_attempts=3)
+        claim_next('a')
+        Job.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(requeue_stale(600), 1)
+        self.assertEqual(claim_next('b'), job.pk)
+        # Worker a's late report about its attempt changes nothing
+        self.assertEqual(record_failure(job.pk, 1, 3, "late", 'a'), 0)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.worker, job.attempts), (Job.RUNNING, 'b', 2))
+
+    def test_admin_actions_queue_large_work(self):
+        admin = User.objects.create_superuser('root', 'root@example.com', 'pw')
+        self.client.force_login(admin)
+        semester = self.courses[2].semester
+        before = Enrollment.objects.count()
+
+        with override_settings(BACKGROUND_JOB_THRESHOLD=2):
+            response = self.client.post(reverse('admin:performance_monitoring_student_changelist'), {
+                'action': 'enroll_in_semester', '_selected_action': [student.pk for student in self.students],
+                'academic_year': semester.academic_year, 'semester_name': semester.name, 'select_across': '1',
+            }, follow=True)
+        self.assertContains(response, 'was queued as')
+        job = Job.objects.get(task='enroll_in_semester')
+        self.assertEqual(job.created_by, admin)
+        self.assertEqual(Enrollment.objects.count(), before)
+
+        with tempfile.TemporaryDirectory() as tmp, override_settings(JOB_FILES_DIR=tmp):
+            self.client.post(reverse('admin:performance_monitoring_department_changelist'), {
+                'action': 'export_department_results', '_selected_action': [self.department.pk],
+            })
+            run_pending()
+            export = Job.objects.get(task='export_results')
+            self.assertEqual(export.status, Job.SUCCEEDED)
+            response = self.client.get(reverse('admin:performance_monitoring_job_download', args=[export.pk]))
+            body = b''.join(response.streaming_content).decode()
+            response.close()
+        self.assertEqual(len(body.strip().splitlines()) - 1, export.result['rows'])
+        self.assertEqual(export.result['rows'], Enrollment.objects.filter(student__department=self.department).count())
+
+
+@plain_static_storage
+class AdminChangelistTests(PerformanceTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.department, cls.students, cls.courses = make_department_fixture()
+        cls.admin = User.objects.create_superuser('root', 'root@example.com', 'pw')
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.admin)
+
+    def changelist_queries(self, name, params=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse(f'admin:performance_monitoring_{name}_changelist'), params or {})
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response
+
+    def test_changelists_run_a_fixed_number_of_queries(self):
+        before = {name: self.changelist_queries(name)[0] for name in ('enrollment', 'course', 'student')}
+        # Double the rows on every page
+        for i, student in enumerate(self.students):
+            clone = Student.objects.create(
+                student_id=f"U2024/{i:04d}", name=f"Clone {i}", email=f"c{i}@example.com", department=self.department,
+            )
+            for enrollment in Enrollment.objects.filter(student=student):
+                Enrollment.objects.create(
+                    student=clone, course=enrollment.course, semester=enrollment.semester,
+                    ca_score=enrollment.ca_score, exam_score=enrollment.exam_score,
+                )
+            Course.objects.create(
+                course_code=f"XTR{i:03d}", course_title="Extra", credit_unit=1,
+                department=self.department, semester=self.courses[0].semester,
+            )
+        after = {name: self.changelist_queries(name)[0] for name in ('enrollment', 'course', 'student')}
+        self.assertEqual(after, before)
+
+    def test_computed_columns_sort_in_sql(self):
+        _, response = self.changelist_queries('enrollment', {'o': '-10'})
+        totals = [enrollment._total for enrollment in response.context['cl'].result_list]
+        self.assertEqual(totals, sorted(totals, reverse=True))
+        for enrollment in response.context['cl'].result_list:
+            self.assertEqual(enrollment._grade, enrollment.grade)
+            self.assertEqual(enrollment._attendance, enrollment.attendance_percentage)
+
+    def test_course_filter_is_scoped(self):
+        _, response = self.changelist_queries('enrollment')
+        titles = [spec.title for spec in response.context['cl'].filter_specs if spec.has_output()]
+        self.assertNotIn('course', titles)
+
+        first = self.courses[0].semester
+        _, response = self.changelist_queries('enrollment', {'semester__name': first.name, 'course': self.courses[0].pk})
+        course_filter = next(spec for spec in response.context['cl'].filter_specs if spec.title == 'course')
+        self.assertEqual([code for _, code in course_filter.lookup_choices], ['CSC101', 'CSC102'])
+        self.assertEqual(
+            {enrollment.course_id for enrollment in response.context['cl'].result_list}, {self.courses[0].pk},
+        )
+
+
+# A cheap hasher keeps the login tests fast; the mechanics are the same
+@plain_static_storage
+@override_settings(
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'], CREDENTIAL_HASHER='md5',
+    LOGIN_THROTTLE_ACCOUNT_ATTEMPTS=3, LOGIN_THROTTLE_ACCOUNT_TOTAL_ATTEMPTS=6, LOGIN_THROTTLE_IP_ATTEMPTS=10,
+)
+class LoginCredentialTests(PerformanceTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.department, cls.students, cls.courses = make_department_fixture(num_students=2)
+
+    def student_login(self, password, student_id=None, ip='10.0.0.1'):
+        return self.client.post(reverse('student_login'), {
+            'matriculation_number': student_id or self.students[0].student_id, 'password': password,
+        }, REMOTE_ADDR=ip)
+
+    def test_plaintext_passwords_are_hashed_on_first_login(self):
+        response = self.student_login('pass')
+        self.assertRedirects(response, reverse('student_dashboard'), fetch_redirect_response=False)
+        stored = Student.objects.values_list('custom_password', flat=True).get(pk=self.students[0].pk)
+        self.assertTrue(is_hashed(stored))
+        self.assertNotEqual(stored, 'pass')
+
+        self.client.session.flush()
+        self.assertEqual(self.student_login('pass').status_code, 302)
+        self.assertEqual(self.student_login('wrong').status_code, 200)
+
+        response = self.client.post(reverse('admin_department_login'), {'department': self.department.pk, 'password': 'secret'})
+        self.assertRedirects(response, reverse('department_dashboard'), fetch_redirect_response=False)
+        self.assertEqual(self.client.session['department_id'], self.department.pk)
+        self.assertTrue(is_hashed(DepartmentPassword.objects.get(pk=self.department.pk).password))
+
+    def test_failed_attempts_are_throttled_before_the_database(self):
+        for _ in range(3):
+            self.assertEqual(self.student_login('wrong').status_code, 200)
+        # Only the session save touches the database; no student lookup
+        with CaptureQueriesContext(connection) as queries:
+            response = self.student_login('pass')
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response['Retry-After']), 0)
+        self.assertFalse(any('performance_monitoring_student' in query['sql'] for query in queries))
+
+        # The same account from another address, and other accounts from
+        # this one (a shared NAT), are unaffected
+        self.assertEqual(self.student_login('pass', ip='10.0.0.2').status_code, 302)
+        self.assertEqual(self.student_login('pass', self.students[1].student_id).status_code, 302)
+
+        # ... until the address sprays enough accounts
+        for i in range(7):
+            self.student_login('wrong', f'NOBODY/{i}')
+        self.assertEqual(self.student_login('pass', self.students[1].student_id).status_code, 429)
+        self.assertEqual(self.student_login('pass', self.students[1].student_id, ip='10.0.0.2').status_code, 302)
+
+    def test_guessing_one_account_from_many_addresses_is_throttled(self):
+        for i in range(6):
+            self.student_login('wrong', ip=f'10.0.1.{i}')
+        self.assertEqual(self.student_login('pass', ip='10.0.2.1').status_code, 429)
+
+    @override_settings(LOGIN_THROTTLE_IP_HEADER='HTTP_X_FORWARDED_FOR')
+    def test_client_address_comes_from_the_proxy_entry(self):
+        # The client made up the first entry; the proxy appended the real address
+        for _ in range(3):
+            self.client.post(reverse('student_login'), {
+                'matriculation_number': self.students[0].student_id, 'password': 'wrong',
+            }, HTTP_X_FORWARDED_FOR=f'1.2.3.{_}, 10.0.0.7')
+        response = self.client.post(reverse('student_login'), {
+            'matriculation_number': self.students[0].student_id, 'password': 'pass',
+        }, HTTP_X_FORWARDED_FOR='9.9.9.9, 10.0.0.7')
+        self.assertEqual(response.status_code, 429)
+
+    def test_success_clears_the_account_counter(self):
+        for _ in range(2):
+            self.student_login('wrong')
+        self.assertEqual(self.student_login('pass').status_code, 302)
+        for _ in range(2):
+            self.assertEqual(self.student_login('wrong').status_code, 200)
+        self.assertEqual(self.student_login('pass').status_code, 302)
+
+    def test_admin_stores_new_passwords_hashed(self):
+        self.client.force_login(User.objects.create_superuser('root', 'root@example.com', 'pw'))
+        url = reverse('admin:performance_monitoring_departmentpassword_change', args=[self.department.pk])
+        self.client.post(url, {'department': self.department.pk, 'password': 'new-secret'})
+        stored = DepartmentPassword.objects.get(pk=self.department.pk).password
+        self.assertTrue(is_hashed(stored))
+        self.client.post(url, {'department': self.department.pk, 'password': stored})
+        self.assertEqual(DepartmentPassword.objects.get(pk=self.department.pk).password, stored)
+
+
+@plain_static_storage
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'], CREDENTIAL_HASHER='md5')
+class SessionStorageTests(PerformanceTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.department, cls.students, cls.courses = make_department_fixture(num_students=2)
+
+    def test_cookie_sessions_never_touch_the_session_table(self):
+        with override_settings(SESSION_ENGINE=settings.SESSION_ENGINES['signed_cookies']):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(reverse('student_login'), {
+                    'matriculation_number': self.students[0].student_id, 'password': 'pass',
+                })
+                self.assertRedirects(response, reverse('student_dashboard'), fetch_redirect_response=False)
+                response = self.client.get(reverse('student_dashboard'))
+        self.assertContains(response, self.students[0].name)
+        self.assertFalse(any('django_session' in query['sql'] for query in queries))
+
+    def test_periodic_cleanup_deletes_only_expired_sessions(self):
+        live = DatabaseSessionStore()
+        live['student_id'] = self.students[0].student_id
+        live.create()
+        for _ in range(3):
+            expired = DatabaseSessionStore()
+            expired.create()
+        Session.objects.exclude(session_key=live.session_key).update(expire_date=timezone.now() - timedelta(days=1))
+
+        with override_settings(PERIODIC_JOBS={'clear_expired_sessions': 3600}):
+            [job] = schedule_periodic()
+            # Not again while one is pending or within the interval
+            self.assertEqual(schedule_periodic(), [])
+            run_pending()
+            self.assertEqual(schedule_periodic(), [])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.result), (Job.SUCCEEDED, {'deleted': 3}))
+        self.assertEqual(list(Session.objects.values_list('session_key', flat=True)), [live.session_key])
+
+
+@plain_static_storage
+class ClassRankingTests(PerformanceTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.department, cls.students, cls.courses = make_department_fixture()
+
+    def expected_ranks(self, summaries):
+        # Dense ranks by CGPA, straight from the summary rows
+        cgpas = {summary.pk: summary.cgpa for summary in summaries if summary.total_credit_units > 0}
+        distinct = sorted(set(cgpas.values()), reverse=True)
+        return {pk: (distinct.index(cgpa) + 1, len(cgpas)) for pk, cgpa in cgpas.items()}
+
+    def assertRanksConsistent(self):
+        summaries = list(StudentSummary.objects.filter(student__department=self.department))
+        expected = self.expected_ranks(summaries)
+        self.assertEqual({s.pk: (s.rank, s.rank_total) for s in summaries if s.rank is not None}, expected)
+        for semester in Semester.objects.all():
+            rows = list(StudentSemesterSummary.objects.filter(semester=semester))
+            expected = self.expected_ranks(rows)
+            self.assertEqual({s.pk: (s.rank, s.rank_total) for s in rows if s.rank is not None}, expected)
+
+    def test_ranks_follow_cgpa(self):
+        self.assertRanksConsistent()
+        # The student without results is not ranked
+        self.assertIsNone(StudentSummary.objects.get(student=self.students[-1]).rank)
+
+    def test_regrade_reranks_and_ties_share_a_position(self):
+        first, second = self.students[:2]
+        with self.captureOnCommitCallbacks(execute=True):
+            for enrollment in Enrollment.objects.filter(student=second):
+                match = Enrollment.objects.filter(student=first, course=enrollment.course).first()
+                if match:
+                    enrollment.ca_score, enrollment.exam_score = match.ca_score, match.exam_score
+                    enrollment.save()
+            Enrollment.objects.filter(student=second).exclude(course__in=Enrollment.objects.filter(student=first).values('course')).delete()
+        self.assertRanksConsistent()
+        ranks = dict(StudentSummary.objects.filter(student__in=[first, second]).values_list('student_id', 'rank'))
+        self.assertEqual(ranks[first.pk], ranks[second.pk])
+
+    def test_rebuild_and_batch_keep_ranks(self):
+        StudentSummary.objects.update(rank=None, rank_total=None)
+        rebuild_student_summaries()
+        self.assertRanksConsistent()
+
+        with summary_batch():
+            for enrollment in Enrollment.objects.filter(student=self.students[3]):
+                enrollment.exam_score = 70 - enrollment.ca_score
+                enrollment.save()
+        self.assertEqual(StudentSummary.objects.get(student=self.students[3]).rank, 1)
+        self.assertRanksConsistent()
+
+    def test_deleting_a_student_reranks_the_department(self):
+        top = StudentSummary.objects.get(student__department=self.department, rank=1).student
+        with self.captureOnCommitCallbacks(execute=True):
+            top.delete()
+        self.assertRanksConsistent()
+        ranked = StudentSummary.objects.filter(student__department=self.department).exclude(rank=None)
+        self.assertEqual(set(ranked.values_list('rank_total', flat=True)), {ranked.count()})
+
+    def test_dashboards_show_positions(self):
+        student = self.students[1]
+        summary = StudentSummary.objects.get(student=student)
+        session = self.client.session
+        session['student_id'] = student.student_id
+        session.save()
+        response = self.client.get(reverse('student_dashboard'))
+        self.assertEqual(response.context['class_position'], (summary.rank, summary.rank_total))
+        self.assertContains(response, f"Class position {summary.rank} of {summary.rank_total}")
+
+        session['department_id'] = self.department.pk
+        session.save()
+        response = self.client.get(reverse('department_dashboard'))
+        leaderboard = response.context['leaderboard']
+        self.assertEqual([entry.rank for entry in leaderboard], sorted(entry.rank for entry in leaderboard))
+        self.assertEqual(leaderboard[0].rank, 1)
+
+    def test_classmate_regrade_changes_student_etag(self):
+        student = self.students[1]
+        url = reverse('student_performance_report', args=[student.student_id])
+        etag = self.client.get(url)['ETag']
+        # Move someone ranked below this student to the top
+        below = StudentSummary.objects.filter(
+            student__department=self.department, rank__gt=StudentSummary.objects.get(student=student).rank,
+        ).first().student
+        with self.captureOnCommitCallbacks(execute=True):
+            for enrollment in Enrollment.objects.filter(student=below):
+                enrollment.exam_score = 70 - enrollment.ca_score
+                enrollment.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_edits_in_one_transaction_rerank_once(self):
+        enrollments = list(Enrollment.objects.filter(student__department=self.department))
+        with mock.patch('performance_monitoring.summaries.refresh_rankings', wraps=refresh_rankings) as rerank:
+            with self.captureOnCommitCallbacks(execute=True):
+                for enrollment in enrollments:
+                    enrollment.exam_score = 70 - enrollment.ca_score
+                    enrollment.save()
+                rerank.assert_not_called()
+        rerank.assert_called_once()
+        self.assertEqual(set(rerank.call_args.args[1]), {course.semester_id for course in self.courses})
+        self.assertRanksConsistent()
+
+    def test_rankings_only_command(self):
+        StudentSummary.objects.update(rank=None, rank_total=None)
+        StudentSemesterSummary.objects.update(rank=None, rank_total=None)
+        output = io.StringIO()
+        call_command('rebuild_student_summaries', '--rankings-only', stdout=output)
+        self.assertIn('class positions', output.getvalue())
+        self.assertRanksConsistent()
+
+
+class DatabaseConnectionTests(TestCase):
+    def test_sqlite_connections_get_the_configured_pragmas(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest("SQLite only")
+        connection.ensure_connection()
+        raw = connection.connection
+        self.assertEqual(raw.execute('PRAGMA synchronous').fetchone()[0], 1)  # NORMAL
+        self.assertEqual(raw.execute('PRAGMA cache_size').fetchone()[0], settings.SQLITE_PRAGMAS['cache_size'])
+
+    def test_new_file_databases_switch_to_wal_without_logged_queries(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest("SQLite only")
+        with tempfile.TemporaryDirectory() as directory:
+            wrapper = connection.copy()
+            wrapper.settings_dict = {**connection.settings_dict, 'NAME': f'{directory}/pragmas.sqlite3'}
+            try:
+                with CaptureQueriesContext(wrapper) as queries:
+                    wrapper.ensure_connection()
+                    mode = wrapper.connection.execute('PRAGMA journal_mode').fetchone()[0]
+            finally:
+                wrapper.close()
+        self.assertEqual(mode, 'wal')
+        self.assertEqual(len(queries), 0)
+
+    def test_transactions_take_the_write_lock_up_front(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest("SQLite only")
+        with tempfile.TemporaryDirectory() as directory:
+            wrapper = connection.copy()
+            wrapper.settings_dict = {**connection.settings_dict, 'NAME': f'{directory}/locks.sqlite3'}
+            try:
+                with CaptureQueriesContext(wrapper) as queries:
+                    wrapper.set_autocommit(True)
+                    wrapper._start_transaction_under_autocommit()
+                wrapper.connection.rollback()
+            finally:
+                wrapper.close()
+        self.assertEqual(queries[0]['sql'], 'BEGIN IMMEDIATE')
+
+    def test_optimize_database_task(self):
+        job = enqueue('optimize_database')
+        run_pending()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.SUCCEEDED)
+        self.assertEqual(job.result['vendor'], connection.vendor)
+        if connection.vendor == 'sqlite':
+            self.assertIn('PRAGMA optimize', job.result['statements'])
+
+
+@plain_static_storage
+class SemesterSnapshotTests(PerformanceTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.department, cls.students, cls.courses = make_department_fixture()
+        cls.first = Semester.objects.get(name="First")
+
+    def test_frozen_transcript_matches_the_live_one(self):
+        live = {student.pk: TranscriptService.for_student(student) for student in self.students}
+        # The last fixture student has no enrollments, so no snapshot
+        self.assertEqual(freeze_semester(self.first), len(self.students) - 1)
+        for student in self.students:
+            self.assertEqual(TranscriptService.for_student(student), live[student.pk])
+
+    def test_frozen_semester_is_read_from_the_snapshot(self):
+        student = self.students[1]  # enrolled in both semesters
+        freeze_semester(self.first)
+        before = TranscriptService.for_student(student)
+        # Written around Enrollment.save(), which refuses frozen semesters
+        Enrollment.objects.filter(student=student).update(exam_score=0)
+        after = TranscriptService.for_student(student)
+        self.assertEqual(after.semesters[0], before.semesters[0])
+        # The open semester is still computed live
+        self.assertNotEqual(after.semesters[1], before.semesters[1])
+
+    def test_frozen_enrollments_cannot_be_changed(self):
+        freeze_semester(self.first)
+        enrollment = Enrollment.objects.filter(student=self.students[1], semester=self.first).first()
+        enrollment.exam_score = 0
+        with self.assertRaises(ValidationError):
+            enrollment.full_clean()
+        with self.assertRaises(ValidationError):
+            enrollment.save()
+        # Nor moved out of the semester, or deleted
+        enrollment.refresh_from_db()
+        enrollment.semester = Semester.objects.get(name="Second")
+        with self.assertRaises(ValidationError):
+            enrollment.save()
+        with self.assertRaises(ValidationError), transaction.atomic():
+            Enrollment.objects.filter(pk=enrollment.pk).delete()
+        with self.assertRaises(ValidationError):
+            bulk_enroll(Student.objects.all(), self.first)
+
+        result = import_scores(io.BytesIO(
+            f"student_id,course_code,ca_score,exam_score\n{self.students[1].student_id},CSC101,1,2\n".encode()
+        ), "scores.csv")
+        self.assertEqual((result.updated, result.error_count), (0, 1))
+        self.assertIn('frozen', result.errors[0][1])
+        self.assertEqual(check_snapshots(), {})
+
+        admin_user = User.objects.create_superuser('root', 'root@example.com', 'pw')
+        self.client.force_login(admin_user)
+        page = self.client.get(reverse('admin:performance_monitoring_enrollment_change', args=[enrollment.pk]))
+        self.assertEqual(page.status_code, 200)
+        self.assertFalse(page.context['has_change_permission'])
+
+        # The open semester, and the frozen one once unfrozen, can be changed again
+        Enrollment.objects.filter(student=self.students[1]).exclude(semester=self.first).first().save()
+        unfreeze_semester(self.first)
+        Enrollment.objects.get(pk=enrollment.pk).save()
+
+    def test_inputs_of_frozen_results_cannot_be_changed(self):
+        freeze_semester(self.first)
+        summaries = list(StudentSummary.objects.order_by('pk').values_list('cgpa', flat=True))
+        frozen_course = self.courses[0]
+        frozen_course.credit_unit = 10
+        with self.assertRaises(ValidationError):
+            frozen_course.full_clean()
+        with self.assertRaises(ValidationError):
+            frozen_course.save()
+        with self.assertRaises(ValidationError), transaction.atomic():
+            Course.objects.get(pk=frozen_course.pk).delete()
+        # Both the year's own scale and the default one it falls back on
+        for academic_year in (self.first.academic_year, None):
+            with self.assertRaises(ValidationError):
+                GradeBand.objects.create(academic_year=academic_year, letter='A', min_score=60, max_score=100, grade_point=5)
+        self.first.academic_year += 1
+        with self.assertRaises(ValidationError):
+            self.first.save()
+        self.assertEqual(list(StudentSummary.objects.order_by('pk').values_list('cgpa', flat=True)), summaries)
+        self.assertEqual(check_snapshots(), {})
+
+        # Open semesters, and other years' scales, are unaffected
+        open_course = self.courses[2]
+        open_course.credit_unit = 10
+        open_course.save()
+        GradeBand.objects.create(academic_year=self.first.academic_year + 5, letter='A', min_score=60, max_score=100, grade_point=5)
+        Course.objects.create(course_code="CSC199", course_title="Unused", credit_unit=1, department=self.department, semester=self.first).delete()
+
+    def test_dashboard_reads_snapshots(self):
+        freeze_semester(self.first)
+        student = self.students[0]
+        Enrollment.objects.filter(student=student, semester=self.first).update(exam_score=0)
+        session = self.client.session
+        session['student_id'] = student.student_id
+        session.save()
+        response = self.client.get(reverse('student_dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['transcript'].semesters[0], TranscriptService.for_student(student).semesters[0])
+        self.assertNotEqual(response.context['transcript'].semesters[0].cgpa, 0)
+
+    def test_checker_reports_drift_until_refrozen(self):
+        freeze_semester(self.first)
+        self.assertEqual(check_snapshots(), {})
+        student = self.students[0]
+        Enrollment.objects.filter(student=student, semester=self.first).update(exam_score=0)
+        SemesterSnapshot.objects.filter(student=self.students[1]).delete()
+        problems = {student_id: (problem, keys) for student_id, problem, keys in check_snapshots()[self.first]}
+        self.assertEqual(problems[student.pk][0], 'changed')
+        self.assertIn('courses', problems[student.pk][1])
+        self.assertEqual(problems[self.students[1].pk], ('missing', []))
+        self.assertEqual(len(problems), 2)
+        freeze_semester(self.first)
+        self.assertEqual(check_snapshots(), {})
+
+    def test_unfreeze_goes_back_to_live_results(self):
+        student = self.students[0]
+        freeze_semester(self.first)
+        Enrollment.objects.filter(student=student, semester=self.first).update(exam_score=0)
+        unfreeze_semester(self.first)
+        self.assertFalse(SemesterSnapshot.objects.filter(semester=self.first).exists())
+        self.assertTrue(all(course.total_score == course_row.ca_score for course, course_row in zip(
+            TranscriptService.for_student(student).semesters[0].courses,
+            Enrollment.objects.filter(student=student, semester=self.first).order_by('pk'),
+        )))
+
+    def test_freeze_semester_task(self):
+        job = enqueue('freeze_semester', {'semester_id': self.first.pk})
+        run_pending()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.SUCCEEDED)
+        self.assertEqual(job.result['snapshots'], SemesterSnapshot.objects.filter(semester=self.first).count())
+        self.first.refresh_from_db()
+        self.assertIsNotNone(self.first.results_frozen_at)
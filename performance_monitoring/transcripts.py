@@ -0,0 +1,233 @@
+# performance_monitoring/transcripts.py
+# The one place a student's transcript (semester tables, CGPA, attendance and
+# chart series) is computed. Views and APIs call TranscriptService instead of
+# walking Enrollment instances themselves.
+#
+# Semesters whose results are frozen (snapshots.py) are read back from the
+# student's SemesterSnapshot rows; only the other semesters' enrollment rows
+# are fetched and computed.
+import datetime
+from dataclasses import dataclass
+
+from asgiref.sync import sync_to_async
+
+from .grading import get_grading_scales
+from .models import Enrollment, SemesterSnapshot
+
+SEMESTER_COLUMNS = ('semester_id', 'semester__name', 'semester__academic_year', 'semester__start_date', 'semester__end_date')
+# Columns fetched per enrollment; the course and semester come from the join
+ENROLLMENT_COLUMNS = (
+    *SEMESTER_COLUMNS,
+    'course_id', 'course__course_code', 'course__course_title', 'course__credit_unit',
+    'ca_score', 'exam_score', 'classes_attended',
+)
+# Layout of SemesterSnapshot.data written by snapshot_data(); snapshots in
+# any other layout are ignored and the semester is computed live
+SNAPSHOT_FORMAT = 1
+
+
+@dataclass(frozen=True, slots=True)
+class CourseResult:
+    course_id: int
+    course_code: str
+    course_title: str
+    credit_unit: int
+    total_score: int
+    grade: str
+    grade_point: int
+    attendance_percentage: float
+
+
+@dataclass(frozen=True, slots=True)
+class SemesterResult:
+    semester_id: int
+    name: str
+    academic_year: int
+    start_date: datetime.date | None
+    end_date: datetime.date | None
+    courses: tuple
+    total_credit_units: int
+    weighted_grade_points: int
+    total_attendance: float
+    cgpa: float
+    average_attendance: float
+
+
+@dataclass(frozen=True, slots=True)
+class ChartSeries:
+    course_codes: tuple
+    total_scores: tuple
+    attendance: tuple
+
+    def as_columns(self):
+        # Parallel arrays, the shape Chart.js datasets take; attendance is
+        # rounded to what the chart can show, which keeps the payload short
+        return {
+            'course_codes': list(self.course_codes),
+            'total_scores': list(self.total_scores),
+            'attendance': [round(value, 1) for value in self.attendance],
+        }
+
+
+@dataclass(frozen=True, slots=True)
+class Transcript:
+    semesters: tuple
+    overall_cgpa: float
+    overall_average_attendance: float
+    total_unique_courses: int
+    chart: ChartSeries
+
+
+def semester_results(rows, scales=None):
+    """
+    SemesterResults from ENROLLMENT_COLUMNS tuples ordered by semester.
+    Only courses with a positive credit unit count towards the CGPA.
+    """
+    scales = scales or get_grading_scales()
+    semesters = {}
+
+    for (semester_id, semester_name, academic_year, start_date, end_date,
+         course_id, course_code, course_title, credit_unit,
+         ca_score, exam_score, classes_attended) in rows:
+        total_score = ca_score + exam_score
+        scale = scales.for_year(academic_year)
+        grade_point = scale.point(total_score)
+        attendance = (classes_attended / 10) * 100 if classes_attended is not None else 0.0
+
+        data = semesters.get(semester_id)
+        if data is None:
+            data = semesters[semester_id] = {
+                'name': semester_name, 'academic_year': academic_year,
+                'start_date': start_date, 'end_date': end_date,
+                'courses': [], 'total_credit_units': 0, 'weighted_grade_points': 0, 'total_attendance': 0,
+            }
+        data['courses'].append(CourseResult(
+            course_id, course_code, course_title, credit_unit,
+            total_score, scale.letter(total_score), grade_point, attendance,
+        ))
+        if credit_unit > 0:
+            data['total_credit_units'] += credit_unit
+            data['weighted_grade_points'] += grade_point * credit_unit
+        data['total_attendance'] += attendance
+
+    results = []
+    for semester_id, data in semesters.items():
+        num_courses = len(data['courses'])
+        results.append(SemesterResult(
+            semester_id=semester_id,
+            name=data['name'],
+            academic_year=data['academic_year'],
+            start_date=data['start_date'],
+            end_date=data['end_date'],
+            courses=tuple(data['courses']),
+            total_credit_units=data['total_credit_units'],
+            weighted_grade_points=data['weighted_grade_points'],
+            total_attendance=data['total_attendance'],
+            cgpa=(data['weighted_grade_points'] / data['total_credit_units']) if data['total_credit_units'] > 0 else 0,
+            average_attendance=(data['total_attendance'] / num_courses) if num_courses > 0 else 0,
+        ))
+    return results
+
+
+def build_transcript(rows, scales=None, frozen=()):
+    """
+    Builds a Transcript from ENROLLMENT_COLUMNS tuples ordered by semester,
+    plus the already built SemesterResults in `frozen`.
+    """
+    semesters = sorted(
+        [*semester_results(rows, scales), *frozen],
+        key=lambda s: (s.academic_year, s.start_date or datetime.date.min, s.name),
+    )
+    courses = [course for semester in semesters for course in semester.courses]
+
+    total_credit_units = sum(s.total_credit_units for s in semesters)
+    weighted_grade_points = sum(s.weighted_grade_points for s in semesters)
+    total_attendance = sum(s.total_attendance for s in semesters)
+
+    return Transcript(
+        semesters=tuple(semesters),
+        overall_cgpa=(weighted_grade_points / total_credit_units) if total_credit_units > 0 else 0,
+        overall_average_attendance=(total_attendance / len(courses)) if courses else 0,
+        total_unique_courses=len({course.course_id for course in courses}),
+        chart=ChartSeries(
+            tuple(course.course_code for course in courses),
+            tuple(float(course.total_score) for course in courses),
+            tuple(float(course.attendance_percentage) for course in courses),
+        ),
+    )
+
+
+# --- Snapshots ---
+def snapshot_data(result):
+    # The results only; names and dates are read from the Semester row
+    return {
+        'courses': [
+            [c.course_id, c.course_code, c.course_title, c.credit_unit, c.total_score, c.grade, c.grade_point, c.attendance_percentage]
+            for c in result.courses
+        ],
+        'total_credit_units': result.total_credit_units,
+        'weighted_grade_points': result.weighted_grade_points,
+        'total_attendance': result.total_attendance,
+        'cgpa': result.cgpa,
+        'average_attendance': result.average_attendance,
+    }
+
+
+def semester_from_snapshot(semester_id, name, academic_year, start_date, end_date, data):
+    return SemesterResult(
+        semester_id=semester_id,
+        name=name,
+        academic_year=academic_year,
+        start_date=start_date,
+        end_date=end_date,
+        courses=tuple(CourseResult(*course) for course in data['courses']),
+        total_credit_units=data['total_credit_units'],
+        weighted_grade_points=data['weighted_grade_points'],
+        total_attendance=data['total_attendance'],
+        cgpa=data['cgpa'],
+        average_attendance=data['average_attendance'],
+    )
+
+
+class TranscriptService:
+    """
+    Computes a student's transcript from two queries: the usable snapshots
+    of their frozen semesters, then a joined query over the enrollments of
+    every other semester. Returns immutable result objects.
+    """
+
+    def __init__(self, student):
+        self.student = student
+
+    def snapshot_rows(self):
+        return (
+            SemesterSnapshot.objects.filter(
+                student=self.student, semester__results_frozen_at__isnull=False, format_version=SNAPSHOT_FORMAT,
+            )
+            .values_list(*SEMESTER_COLUMNS, 'data')
+        )
+
+    def enrollment_rows(self, exclude_semesters=()):
+        # Semesters without a usable snapshot fall back to their live rows
+        return (
+            Enrollment.objects.filter(student=self.student)
+            .exclude(semester_id__in=list(exclude_semesters))
+            .order_by('semester__academic_year', 'semester__name', 'pk')
+            .values_list(*ENROLLMENT_COLUMNS)
+        )
+
+    def build(self):
+        snapshots = [semester_from_snapshot(*row) for row in self.snapshot_rows()]
+        rows = self.enrollment_rows(semester.semester_id for semester in snapshots)
+        return build_transcript(rows, frozen=snapshots)
+
+    async def abuild(self):
+        # The scales may need a (sync) reload; the rows come from async iteration
+        scales = await sync_to_async(get_grading_scales)()
+        snapshots = [semester_from_snapshot(*row) async for row in self.snapshot_rows()]
+        rows = [row async for row in self.enrollment_rows(semester.semester_id for semester in snapshots)]
+        return build_transcript(rows, scales, snapshots)
+
+    @classmethod
+    def for_student(cls, student):
+        return cls(student).build()
@@ -2,28 +2,23 @@
 from django.shortcuts import get_object_or_404, render, redirect
 from django.contrib.auth import authenticate, login as auth_login, logout as auth_logout
 from django.contrib.auth.forms import AuthenticationForm
-from .models import Student, Enrollment, DepartmentPassword, Department, Semester, Course
+from .models import Student, DepartmentPassword, Department, Semester, StudentSummary
+from .aggregates import department_course_rows
+from .analytics import cohort_analytics
+from .search import DEFAULT_PAGE_SIZE, InvalidSearch, search_department_students
+from .caching import data_version, get_cached_transcript
+from .conditional import conditional_dashboard, department_fingerprint, student_fingerprint
+from .credentials import LoginThrottle, check_department_password, check_student_password, session_department_id
+from .rankings import class_positions, department_leaderboard
+from .exports import iter_csv, iter_export_rows, write_xlsx
 from django.urls import reverse
+from django.http import FileResponse, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+from django.db.models import Avg
+from django.conf import settings
+from django.utils.cache import get_conditional_response, patch_cache_control, quote_etag
+from django.views.decorators.gzip import gzip_page
+from django.utils.text import slugify
 from django.contrib import messages
-import json
-from django.db.models import Avg, Sum, F
-
-# --- Utility Functions ---
-def get_grade_point(total_score):
-    if total_score is None:
-        return 0
-    if 70 <= total_score <= 100:
-        return 5
-    elif 60 <= total_score <= 69:
-        return 4
-    elif 50 <= total_score <= 59:
-        return 3
-    elif 45 <= total_score <= 49:
-        return 2
-    elif 40 <= total_score <= 44:
-        return 1
-    else:
-        return 0
 
 # --- Core Views ---
 def home(request):
@@ -75,47 +70,63 @@ def admin_login(request):
         form = AuthenticationForm()
     return render(request, 'performance_monitoring/admin_login.html', {'form': form})
 
+def throttled_login(request, template, context, retry_after):
+    # Answered from the cache alone: no database query, no password hash
+    minutes = -(-retry_after // 60)
+    messages.error(request, f"Too many login attempts. Please try again in {minutes} minute{'s' if minutes != 1 else ''}.")
+    response = render(request, template, context, status=429)
+    response['Retry-After'] = str(retry_after)
+    return response
+
 def student_login(request):
+    template = 'performance_monitoring/student_login.html'
     if request.method == 'POST':
-        matriculation_number = request.POST.get('matriculation_number')
+        matriculation_number = (request.POST.get('matriculation_number') or '').strip()
         password = request.POST.get('password')
-        try:
-            student = Student.objects.get(student_id=matriculation_number)
-            # NOTE: Using plaintext password check as per original models/views context
-            if student.custom_password == password:
-                request.session['student_id'] = student.student_id
-                request.session['student_name'] = student.name # Store name for base template
-                return redirect('student_dashboard')
-            else:
-                messages.error(request, "Invalid Matriculation Number or Password.")
-        except Student.DoesNotExist:
-            messages.error(request, "Invalid Matriculation Number or Password.")
-        return render(request, 'performance_monitoring/student_login.html')
-    return render(request, 'performance_monitoring/student_login.html')
+        throttle = LoginThrottle(request, 'student', matriculation_number)
+        retry_after = throttle.retry_after()
+        if retry_after:
+            return throttled_login(request, template, {}, retry_after)
+
+        student = Student.objects.filter(student_id=matriculation_number).only('student_id', 'name', 'custom_password').first()
+        # Unknown students still go through a hash so they can't be told apart by timing
+        if check_student_password(student, password):
+            throttle.succeeded()
+            request.session['student_id'] = student.student_id
+            request.session['student_name'] = student.name # Store name for base template
+            return redirect('student_dashboard')
+        throttle.failed()
+        messages.error(request, "Invalid Matriculation Number or Password.")
+    return render(request, template)
 
 def admin_department_login(request):
+    template = 'performance_monitoring/admin_department_login.html'
     departments = Department.objects.all()
     if request.method == 'POST':
         department_id = request.POST.get('department')
         password = request.POST.get('password')
-        try:
-            department_password = DepartmentPassword.objects.get(department_id=department_id)
-            # NOTE: Using plaintext password check as per original models/views context
-            if department_password.password == password:
-                department = department_password.department
-                request.session['department_id'] = department_id
-                request.session['department_name'] = department.name # Store name for base template
-                return redirect('department_dashboard')
-            else:
-                messages.error(request, "Invalid Department or Password.")
-        except DepartmentPassword.DoesNotExist:
-            messages.error(request, "Invalid Department or Password.")
-        return render(request, 'performance_monitoring/admin_department_login.html', {'departments': departments})
-    else:
-        return render(request, 'performance_monitoring/admin_department_login.html', {'departments': departments})
+        throttle = LoginThrottle(request, 'department', department_id)
+        retry_after = throttle.retry_after()
+        if retry_after:
+            return throttled_login(request, template, {'departments': departments}, retry_after)
+
+        department_password = None
+        if (department_id or '').isdigit():
+            department_password = DepartmentPassword.objects.select_related('department').filter(department_id=department_id).first()
+        if check_department_password(department_password, password):
+            throttle.succeeded()
+            department = department_password.department
+            request.session['department_id'] = department.pk
+            request.session['department_name'] = department.name # Store name for base template
+            return redirect('department_dashboard')
+        throttle.failed()
+        messages.error(request, "Invalid Department or Password.")
+    return render(request, template, {'departments': departments})
 
 
 # --- Dashboard Views ---
+# Reloads of unchanged dashboards get a 304 before any transcript work
+@conditional_dashboard(student_fingerprint)
 def student_dashboard(request, student_id=None):
     # Determine the student to display based on URL param (for admin/dept) or session (for student)
     
@@ -123,7 +134,7 @@ def student_dashboard(request, student_id=None):
     if student_id:
         # Admin or Dept viewing a report (should use student_performance_report, but kept here for flexibility)
         try:
-            student = Student.objects.get(student_id=student_id)
+            student = Student.objects.select_related('department', 'summary').get(student_id=student_id)
         except Student.DoesNotExist:
             messages.error(request, f"Student with ID {student_id} not found.")
             return redirect('department_dashboard')
@@ -135,104 +146,34 @@ def student_dashboard(request, student_id=None):
             messages.error(request, "Please log in to view your dashboard.")
             return redirect('student_login')
         try:
-            student = Student.objects.get(student_id=session_student_id)
+            student = Student.objects.select_related('department', 'summary').get(student_id=session_student_id)
         except Student.DoesNotExist:
             messages.error(request, "Student not found. Please log in again.")
             return redirect('student_login')
 
-    # 2. Fetch Enrollments
-    # Use prefetch_related if possible, but basic filter is safe
-    enrollments = Enrollment.objects.filter(student=student).order_by('semester__academic_year', 'semester__name')
-
-    # 3. Initialize Calculation Variables
-    semester_data_raw = {}
-    course_performance_data = [] # For the Chart (JSON)
-    overall_total_credit_units = 0
-    overall_weighted_grade_points = 0
-    overall_total_attendance_percentage_sum = 0
-    total_enrollments_for_attendance_avg = 0
-    total_unique_courses = set() # For Total Courses Count
-
-    # 4. Process Enrollments (Combines Overall, Semester, and Chart Data Generation)
-    for enrollment in enrollments:
-        semester = enrollment.semester
-        current_total_score = enrollment.total_score
-        grade_point = get_grade_point(current_total_score)
-        
-        # Initialize semester data structure if it's the first time seeing this semester
-        if semester not in semester_data_raw:
-            semester_data_raw[semester] = {
-                'enrollments': [],
-                'total_credit_units': 0,
-                'weighted_grade_points': 0,
-                'total_attendance': 0,
-                'num_courses': 0,
-            }
-
-        semester_data_raw[semester]['enrollments'].append(enrollment)
-        
-        # CGPA calculation logic
-        if current_total_score is not None and enrollment.course.credit_unit > 0:
-            semester_data_raw[semester]['total_credit_units'] += enrollment.course.credit_unit
-            semester_data_raw[semester]['weighted_grade_points'] += grade_point * enrollment.course.credit_unit
-            
-            # Overall totals (only count valid CGPA courses)
-            overall_total_credit_units += enrollment.course.credit_unit
-            overall_weighted_grade_points += grade_point * enrollment.course.credit_unit
-            
-        # Attendance calculation logic
-        semester_data_raw[semester]['total_attendance'] += enrollment.attendance_percentage
-        semester_data_raw[semester]['num_courses'] += 1
-        
-        # Overall totals (count all enrollments for overall average attendance)
-        overall_total_attendance_percentage_sum += enrollment.attendance_percentage
-        total_enrollments_for_attendance_avg += 1
-        
-        # Total Unique Courses
-        total_unique_courses.add(enrollment.course.pk)
-
-        # Prepare JSON data for Chart.js
-        course_performance_data.append({
-            'course_code': enrollment.course.course_code,
-            # Ensure data is float for JSON dump compatibility
-            'total_score': float(current_total_score) if current_total_score is not None else 0.0, 
-            'attendance_percentage': float(enrollment.attendance_percentage),
-        })
-
-
-    # 5. Finalize Semester Data (CGPA and Avg Attendance)
-    processed_semester_data = {}
-    sorted_semesters = sorted(semester_data_raw.keys(), key=lambda s: (s.academic_year, s.start_date if s.start_date else 0))
-
-    for semester in sorted_semesters:
-        data = semester_data_raw[semester]
-        processed_semester_data[semester] = {
-            'enrollments': data['enrollments'],
-            'cgpa': (data['weighted_grade_points'] / data['total_credit_units']) if data['total_credit_units'] > 0 else 0,
-            'average_attendance': (data['total_attendance'] / data['num_courses']) if data['num_courses'] > 0 else 0,
-        }
-
-    # 6. Finalize Overall Metrics
-    overall_cgpa = (overall_weighted_grade_points / overall_total_credit_units) if overall_total_credit_units > 0 else 0
-    overall_average_attendance = (overall_total_attendance_percentage_sum / total_enrollments_for_attendance_avg) if total_enrollments_for_attendance_avg > 0 else 0
-
-    # 7. Build Context
+    # 2. Fetch the transcript (cached; recomputed only after the student's data changes)
+    transcript = get_cached_transcript(student)
+    # Positions move when classmates' results change, so they are read live rather than cached
+    class_position, semester_positions = class_positions(student, transcript.semesters)
+
+    # 3. Build Context
     context = {
         'student': student,
-        'semester_data': processed_semester_data,
-        'overall_cgpa': overall_cgpa,
-        'overall_average_attendance': overall_average_attendance,
-        # *** THESE ARE THE FIXED/ADDED VARIABLES ***
-        'total_unique_courses': len(total_unique_courses), 
-        'course_performance_data_json': json.dumps(course_performance_data),
-        # *****************************************
-        'is_admin_view': student_id and request.session.get('department_id') # Flag for showing 'Back to Dashboard' etc.
+        'transcript': transcript,
+        'overall_cgpa': transcript.overall_cgpa,
+        'overall_average_attendance': transcript.overall_average_attendance,
+        'total_unique_courses': transcript.total_unique_courses,
+        'chart_data_url': chart_data_url(student),
+        'class_position': class_position,
+        'semesters_with_positions': list(zip(transcript.semesters, semester_positions)),
+        'is_admin_view': student_id and session_department_id(request) # Flag for showing 'Back to Dashboard' etc.
     }
     return render(request, 'performance_monitoring/student_dashboard.html', context)
 
 
+@conditional_dashboard(department_fingerprint)
 def department_dashboard(request):
-    department_id = request.session.get('department_id')
+    department_id = session_department_id(request)
     if not department_id:
         messages.error(request, "Please log in as a department admin to view this page.")
         return redirect('admin_department_login')
@@ -240,147 +181,164 @@ def department_dashboard(request):
     department = get_object_or_404(Department, pk=department_id)
 
     # --- Department-wide Metrics ---
+    # The student table is paged in through department_student_search; only
+    # department totals are computed here, from precomputed summaries.
     total_students_in_dept = Student.objects.filter(department=department).count()
-    total_courses_in_dept = Course.objects.filter(department=department).count()
-
-    students_in_department = Student.objects.filter(department=department).prefetch_related('enrollment_set__course')
-
-    department_overall_cgpa_sum = 0
-    students_with_valid_cgpa = 0
-    students_data_for_table = [] 
-
-    for student in students_in_department:
-        student_enrollments = student.enrollment_set.all()
-
-        student_total_credit_units = 0
-        student_weighted_grade_points = 0
-        student_total_attendance_percentage_sum = 0
-        student_courses_for_attendance_avg = 0 
-
-        for enrollment in student_enrollments:
-            total_score = enrollment.total_score
-            if total_score is not None and enrollment.course.credit_unit > 0:
-                grade_point = get_grade_point(total_score)
-                student_total_credit_units += enrollment.course.credit_unit
-                student_weighted_grade_points += grade_point * enrollment.course.credit_unit
-
-            if enrollment.attendance_percentage is not None:
-                student_total_attendance_percentage_sum += enrollment.attendance_percentage
-                student_courses_for_attendance_avg += 1
-
-        student_cgpa = (student_weighted_grade_points / student_total_credit_units) if student_total_credit_units > 0 else 0
-        student_avg_attendance = (student_total_attendance_percentage_sum / student_courses_for_attendance_avg) if student_courses_for_attendance_avg > 0 else 0
-
-        if student_total_credit_units > 0:
-            department_overall_cgpa_sum += student_cgpa
-            students_with_valid_cgpa += 1
-
-        students_data_for_table.append({
-            'student': student,
-            'overall_cgpa': student_cgpa,
-            'average_attendance': student_avg_attendance,
-        })
+    avg_department_cgpa = StudentSummary.objects.filter(
+        student__department=department, total_credit_units__gt=0,
+    ).aggregate(avg=Avg('cgpa', default=0))['avg']
 
-    avg_department_cgpa = (department_overall_cgpa_sum / students_with_valid_cgpa) if students_with_valid_cgpa > 0 else 0
-
-    # Department Courses List
-    department_courses_list = []
-    courses_in_department = Course.objects.filter(department=department).order_by('course_code').select_related('semester')
-
-    for course in courses_in_department:
-        # Only count enrollments for the current course, regardless of semester, for a total count
-        enrolled_students_count = Enrollment.objects.filter(course=course).values('student').distinct().count()
-        department_courses_list.append({
-            'course': course,
-            'enrolled_students_count': enrolled_students_count,
-        })
+    department_courses_list = [
+        {'course': course, 'enrolled_students_count': course.enrolled_students_count}
+        for course in department_course_rows(department)
+    ]
+    total_courses_in_dept = len(department_courses_list)
+    leaderboard = department_leaderboard(department)
 
     context = {
         'department': department,
         'total_students_in_dept': total_students_in_dept,
         'avg_department_cgpa': avg_department_cgpa,
         'total_courses_in_dept': total_courses_in_dept,
-        'students_data': students_data_for_table,
         'department_courses': department_courses_list,
+        'leaderboard': leaderboard,
+        'page_size': DEFAULT_PAGE_SIZE,
     }
     return render(request, 'performance_monitoring/department_dashboard.html', context)
 
 
+def department_student_search(request):
+    department_id = session_department_id(request)
+    if not department_id:
+        return JsonResponse({'error': "Please log in as a department admin."}, status=403)
+
+    try:
+        rows, next_cursor = search_department_students(
+            department_id,
+            query=request.GET.get('q', ''),
+            sort=request.GET.get('sort', 'student_id'),
+            descending=request.GET.get('direction') == 'desc',
+            cursor=request.GET.get('cursor') or None,
+            limit=request.GET.get('limit', DEFAULT_PAGE_SIZE),
+        )
+    except (InvalidSearch, ValueError) as error:
+        return JsonResponse({'error': str(error)}, status=400)
+
+    for row in rows:
+        row['report_url'] = reverse('student_performance_report', kwargs={'student_id': row['student_id']})
+    return JsonResponse({'results': rows, 'next_cursor': next_cursor})
+
+
+def department_analytics(request):
+    department_id = session_department_id(request)
+    if not department_id:
+        messages.error(request, "Please log in as a department admin to view this page.")
+        return redirect('admin_department_login')
+
+    department = get_object_or_404(Department, pk=department_id)
+    semesters = Semester.objects.filter(course__department=department).distinct()
+    semester = None
+    if request.GET.get('semester', '').isdigit():
+        semester = get_object_or_404(semesters, pk=request.GET['semester'])
+
+    # Every statistic comes from one enrollment query reduced with NumPy
+    analytics = cohort_analytics(department, semester)
+
+    context = {
+        'department': department,
+        'semesters': semesters,
+        'selected_semester': semester,
+        'analytics': analytics,
+        'chart_data': {
+            'grades': analytics.grade_distribution,
+            'scores': dict(analytics.score_histogram),
+            'cgpas': dict(analytics.cgpa_histogram),
+        },
+    }
+    return render(request, 'performance_monitoring/department_analytics.html', context)
+
+
+@conditional_dashboard(student_fingerprint)
 def student_performance_report(request, student_id):
-    student = get_object_or_404(Student, student_id=student_id)
-    enrollments = Enrollment.objects.filter(student=student).order_by('semester__academic_year', 'semester__name')
-
-    semester_data_raw = {}
-    course_performance_data = []
-
-    overall_total_credit_units = 0
-    overall_weighted_grade_points = 0
-    overall_total_attendance_percentage_sum = 0
-    total_enrollments_for_attendance_avg = 0
-    total_unique_courses = set()
-
-
-    for enrollment in enrollments:
-        semester = enrollment.semester
-        if semester not in semester_data_raw:
-            semester_data_raw[semester] = {
-                'enrollments': [],
-                'total_credit_units': 0,
-                'weighted_grade_points': 0,
-                'total_attendance': 0,
-                'num_courses': 0,
-            }
-
-        current_total_score = enrollment.total_score
-        grade_point = get_grade_point(current_total_score)
-
-        semester_data_raw[semester]['enrollments'].append(enrollment)
-        
-        # Only include courses with credit units in CGPA calculation
-        if current_total_score is not None and enrollment.course.credit_unit > 0:
-            semester_data_raw[semester]['total_credit_units'] += enrollment.course.credit_unit
-            semester_data_raw[semester]['weighted_grade_points'] += grade_point * enrollment.course.credit_unit
-            
-        semester_data_raw[semester]['total_attendance'] += enrollment.attendance_percentage
-        semester_data_raw[semester]['num_courses'] += 1
-        total_unique_courses.add(enrollment.course.pk) # Count unique courses for total courses metric
-
-        # Prepare JSON data for Chart.js
-        course_performance_data.append({
-            'course_code': enrollment.course.course_code,
-            # Ensure data is float for JSON dump compatibility
-            'total_score': float(current_total_score) if current_total_score is not None else 0.0, 
-            'attendance_percentage': float(enrollment.attendance_percentage),
-        })
-
-
-    processed_semester_data = {}
-    sorted_semesters = sorted(semester_data_raw.keys(), key=lambda s: (s.academic_year, s.start_date if s.start_date else 0))
-
-    for semester in sorted_semesters:
-        data = semester_data_raw[semester]
-        processed_semester_data[semester] = {
-            'enrollments': data['enrollments'],
-            'cgpa': (data['weighted_grade_points'] / data['total_credit_units']) if data['total_credit_units'] > 0 else 0,
-            'average_attendance': (data['total_attendance'] / data['num_courses']) if data['num_courses'] > 0 else 0,
-        }
-        overall_total_credit_units += data['total_credit_units']
-        overall_weighted_grade_points += data['weighted_grade_points']
-        overall_total_attendance_percentage_sum += data['total_attendance']
-        total_enrollments_for_attendance_avg += data['num_courses']
-
-
-    overall_cgpa = (overall_weighted_grade_points / overall_total_credit_units) if overall_total_credit_units > 0 else 0
-    overall_average_attendance = (overall_total_attendance_percentage_sum / total_enrollments_for_attendance_avg) if total_enrollments_for_attendance_avg > 0 else 0
+    student = get_object_or_404(Student.objects.select_related('department', 'summary'), student_id=student_id)
+    transcript = get_cached_transcript(student)
+    # Positions move when classmates' results change, so they are read live rather than cached
+    class_position, semester_positions = class_positions(student, transcript.semesters)
 
     context = {
         'student': student,
-        'semester_data': processed_semester_data,
-        'overall_cgpa': overall_cgpa,
-        'overall_average_attendance': overall_average_attendance,
-        'total_unique_courses': len(total_unique_courses), # Use unique course count
-        'course_performance_data_json': json.dumps(course_performance_data),
+        'transcript': transcript,
+        'overall_cgpa': transcript.overall_cgpa,
+        'overall_average_attendance': transcript.overall_average_attendance,
+        'total_unique_courses': transcript.total_unique_courses, # Use unique course count
+        'chart_data_url': chart_data_url(student),
+        'class_position': class_position,
+        'semesters_with_positions': list(zip(transcript.semesters, semester_positions)),
         'is_admin_view': True # Always True if accessed from a department context
     }
 
-    return render(request, 'performance_monitoring/student_report.html', context)
\ No newline at end of file
+    return render(request, 'performance_monitoring/student_report.html', context)
+
+
+# --- Chart Data ---
+# The transcript pages load their chart from here instead of embedding it.
+# The page links to the current data version (?v=...); that URL never
+# changes meaning, so the browser may keep it and share it between the
+# dashboard and the report until the student's results change.
+def chart_data_url(student):
+    url = reverse('student_chart_data', kwargs={'student_id': student.student_id})
+    return f'{url}?v={data_version(student)}'
+
+
+@gzip_page
+def student_chart_data(request, student_id):
+    student = get_object_or_404(Student.objects.select_related('summary'), student_id=student_id)
+    is_staff = request.user.is_authenticated and request.user.is_staff
+    if not (is_staff or request.session.get('student_id') == student.student_id
+            or session_department_id(request) == student.department_id):
+        return JsonResponse({'error': "You may not view this student's results."}, status=403)
+
+    version = data_version(student)
+    response = get_conditional_response(request, etag=quote_etag(version))
+    if response is None:
+        transcript = get_cached_transcript(student)
+        response = JsonResponse(transcript.chart.as_columns(), json_dumps_params={'separators': (',', ':')})
+        response['ETag'] = quote_etag(version)
+    if request.GET.get('v') == version:
+        patch_cache_control(response, private=True, max_age=settings.CHART_DATA_MAX_AGE, immutable=True)
+    else:
+        patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+# --- Export Views ---
+def export_results(request):
+    # Department admins export their own department; staff may pick any (or all)
+    if request.user.is_authenticated and request.user.is_staff:
+        department = None
+        if request.GET.get('department'):
+            department = get_object_or_404(Department, pk=request.GET['department'])
+    elif session_department_id(request):
+        department = get_object_or_404(Department, pk=session_department_id(request))
+    else:
+        messages.error(request, "Please log in as a department admin to export results.")
+        return redirect('admin_department_login')
+
+    semester_name = request.GET.get('semester') or None
+    academic_year = request.GET.get('academic_year') or None
+    if academic_year and not academic_year.isdigit():
+        return HttpResponseBadRequest("academic_year must be a number.")
+
+    rows = iter_export_rows(department, semester_name, academic_year)
+    filename = slugify('-'.join(str(part) for part in ('results', department or 'all', semester_name, academic_year) if part))
+
+    if request.GET.get('format') == 'xlsx':
+        try:
+            output = write_xlsx(rows)
+        except ImportError:
+            return HttpResponseBadRequest("XLSX export needs the openpyxl package; use format=csv.")
+        return FileResponse(output, as_attachment=True, filename=f'{filename}.xlsx')
+
+    response = StreamingHttpResponse(iter_csv(rows), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+    return response
@@ -0,0 +1,26 @@
+# performance_monitoring/worker.py
+# Entry points for run_worker's process pool. The pool uses the spawn start
+# method so children never share the parent's database connections; this
+# module imports no models, so a fresh child can load it before Django is
+# set up.
+import signal
+
+import django
+
+
+def initialize():
+    # Ctrl+C reaches the whole process group; the parent decides when to stop
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    django.setup()
+
+
+def execute(pk):
+    from django.db import close_old_connections
+    from .jobs import execute_job
+
+    # Long-lived processes: drop connections that timed out or broke between jobs
+    close_old_connections()
+    try:
+        return execute_job(pk)
+    finally:
+        close_old_connections()
@@ -4,6 +4,7 @@ Django settings for student_performance_system project.
 
 from pathlib import Path
 import os
+from django.core.exceptions import ImproperlyConfigured
 import dj_database_url  # ADDED for production database connection
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -47,6 +48,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'performance_monitoring.middleware.RequestProfilingMiddleware', # first, so every query is counted
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware', # ADDED for serving static files in production
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -81,12 +83,25 @@ WSGI_APPLICATION = 'student_performance_system.wsgi.application'
 # Database (UPDATED)
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 
+# Connections are persistent: each gunicorn worker thread keeps one open for
+# DB_CONN_MAX_AGE seconds (0 closes it after every request) and checks it
+# before reusing it, so a connection the server dropped meanwhile fails over
+# to a fresh one instead of failing a request. Peak Postgres connections are
+# therefore workers x threads; when that exceeds max_connections, put
+# PgBouncer in front (transaction pooling) and set DB_POOLER=pgbouncer,
+# which turns off server-side cursors since they don't survive a pooled
+# transaction. Django 5.0 has no built-in connection pool.
+DB_CONN_MAX_AGE = int(os.environ.get('DB_CONN_MAX_AGE', 600))
+DB_POOLER = os.environ.get('DB_POOLER', '')
+
 # If DATABASE_URL is set (e.g., on Render), use it for PostgreSQL.
 if os.environ.get('DATABASE_URL'):
     DATABASES = {
         'default': dj_database_url.config(
             default=os.environ.get('DATABASE_URL'),
-            conn_max_age=600  # connection pool timeout
+            conn_max_age=DB_CONN_MAX_AGE,
+            conn_health_checks=True,
+            disable_server_side_cursors=DB_POOLER == 'pgbouncer',
         )
     }
 else:
@@ -95,9 +110,185 @@ else:
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
             'NAME': BASE_DIR / 'db.sqlite3',
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
         }
     }
 
+# SQLite profiles, picked with SQLITE_PROFILE. The pragmas are applied to
+# every new connection (performance_monitoring/db.py):
+#   optimized  (default) WAL lets dashboards keep reading while a score edit
+#              commits, and synchronous=NORMAL only fsyncs at checkpoints
+#              (still crash-safe with WAL). busy_timeout makes a writer wait
+#              for the lock instead of failing; transactions also take the
+#              write lock up front (BEGIN IMMEDIATE, see
+#              performance_monitoring/backends/sqlite3), so read-then-write
+#              transactions can't deadlock into "database is locked". A
+#              bigger page cache (KiB when negative), memory-mapped reads
+#              and in-memory temp tables speed up the dashboards' sorts
+#              and aggregates.
+#   default    SQLite's own settings, for comparison (benchmark_sqlite)
+SQLITE_PROFILES = {
+    'optimized': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 20000)),
+        'cache_size': -int(os.environ.get('SQLITE_CACHE_KIB', 20000)),
+        'mmap_size': int(os.environ.get('SQLITE_MMAP_BYTES', 256 * 1024 * 1024)),
+        'temp_store': 'MEMORY',
+    },
+    'default': {},
+}
+SQLITE_PROFILE = os.environ.get('SQLITE_PROFILE', 'optimized')
+SQLITE_PRAGMAS = SQLITE_PROFILES[SQLITE_PROFILE]
+SQLITE_ENGINES = {
+    'optimized': 'performance_monitoring.backends.sqlite3',
+    'default': 'django.db.backends.sqlite3',
+}
+if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+    DATABASES['default']['ENGINE'] = SQLITE_ENGINES[SQLITE_PROFILE]
+
+
+# Cache
+# Local memory by default; set CACHE_DIR to share the cache between gunicorn
+# workers through the file-based backend. Sessions on the cache and the
+# login throttle need it shared, so outside DEBUG they refuse a per-process
+# cache unless SINGLE_PROCESS=1 says the site runs in one process.
+if os.environ.get('CACHE_DIR'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('CACHE_DIR'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'student-performance',
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+    }
+PER_PROCESS_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+NEEDS_SHARED_CACHE = (
+    CACHES['default']['BACKEND'] in PER_PROCESS_CACHES and not DEBUG and os.environ.get('SINGLE_PROCESS') != '1'
+)
+
+# Sessions
+# The sessions only hold a few ids and names. SESSION_BACKEND picks where:
+#   db              (default) one django_session read per request
+#   cached_db       reads come from the cache, writes go to both
+#   cache           cache only
+#   signed_cookies  no server-side storage at all; the payload travels in
+#                   the cookie, and logging out can't revoke a copied cookie
+# cached_db and cache need a cache shared by all workers: with a per-process
+# one, a logout on one worker leaves the session live in the others' caches
+# (see Cache above).
+# Expired rows left by the db-backed engines are deleted by the
+# clear_expired_sessions job that run_worker schedules (see PERIODIC_JOBS).
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'cache': 'django.contrib.sessions.backends.cache',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+SESSION_BACKEND = os.environ.get('SESSION_BACKEND', 'db')
+if SESSION_BACKEND in ('cached_db', 'cache') and NEEDS_SHARED_CACHE:
+    raise ImproperlyConfigured(f"SESSION_BACKEND={SESSION_BACKEND} needs a cache shared by all workers; set CACHE_DIR.")
+SESSION_ENGINE = SESSION_ENGINES[SESSION_BACKEND]
+SESSION_COOKIE_AGE = int(os.environ.get('SESSION_COOKIE_AGE', 60 * 60 * 24 * 14))
+
+# Computed transcripts are keyed by per-student data versions kept in the
+# database, so a long timeout never serves stale results, even with a
+# per-process cache (see performance_monitoring/caching.py).
+TRANSCRIPT_CACHE_TIMEOUT = int(os.environ.get('TRANSCRIPT_CACHE_TIMEOUT', 60 * 60 * 24))
+# Rendered course tables of semesters that have ended (Semester.end_date in
+# the past) are kept this long; open semesters are re-rendered every time.
+SEMESTER_FRAGMENT_TIMEOUT = int(os.environ.get('SEMESTER_FRAGMENT_TIMEOUT', 60 * 60 * 24 * 30))
+# Browser max-age for a transcript's chart data at a given data version; the
+# pages link to a new URL when the results change.
+CHART_DATA_MAX_AGE = int(os.environ.get('CHART_DATA_MAX_AGE', 60 * 60 * 24 * 30))
+
+
+# Request profiling (performance_monitoring/middleware.py)
+# A sampled fraction of requests is profiled and logged as one JSON line;
+# summarise the log with `manage.py profile_report`. Off by default locally,
+# set REQUEST_PROFILING_SAMPLE_RATE=1 to profile every request.
+REQUEST_PROFILING_SAMPLE_RATE = float(os.environ.get('REQUEST_PROFILING_SAMPLE_RATE', 0 if DEBUG else 0.05))
+REQUEST_PROFILING_HEADERS = DEBUG or os.environ.get('REQUEST_PROFILING_HEADERS') == '1'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'request_profiles': (
+            {'class': 'logging.FileHandler', 'filename': os.environ['REQUEST_PROFILING_LOG'], 'formatter': 'message'}
+            if os.environ.get('REQUEST_PROFILING_LOG')
+            else {'class': 'logging.StreamHandler', 'formatter': 'message'}
+        ),
+    },
+    'loggers': {
+        'performance_monitoring.requests': {
+            'handlers': ['request_profiles'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
+
+# Background jobs (performance_monitoring/jobs.py, `manage.py run_worker`)
+# Failed jobs are retried up to JOB_MAX_ATTEMPTS times, waiting
+# JOB_RETRY_DELAY seconds and doubling after each failure. Admin actions
+# over more than BACKGROUND_JOB_THRESHOLD students are queued instead of
+# running inside the request. Exports written by jobs go to JOB_FILES_DIR.
+JOB_MAX_ATTEMPTS = int(os.environ.get('JOB_MAX_ATTEMPTS', 3))
+JOB_RETRY_DELAY = int(os.environ.get('JOB_RETRY_DELAY', 30))
+BACKGROUND_JOB_THRESHOLD = int(os.environ.get('BACKGROUND_JOB_THRESHOLD', 500))
+JOB_FILES_DIR = os.environ.get('JOB_FILES_DIR', str(BASE_DIR / 'job_files'))
+# Tasks run_worker queues on a schedule: task name -> seconds between runs
+PERIODIC_JOBS = {
+    'clear_expired_sessions': int(os.environ.get('SESSION_CLEANUP_INTERVAL', 60 * 60)),
+    'optimize_database': int(os.environ.get('DB_OPTIMIZE_INTERVAL', 60 * 60 * 24)),
+}
+
+
+# Login credentials and throttling (performance_monitoring/credentials.py)
+# Failed attempts allowed per sliding window of LOGIN_THROTTLE_WINDOW
+# seconds: per matric number / department from one client address, per
+# account from anywhere, and per client address across accounts (a whole
+# lab behind one NAT shares that last one, hence the high ceiling).
+#
+# The client address is REMOTE_ADDR. Behind a reverse proxy that is the
+# proxy's own address, so every client would share one bucket: set
+# LOGIN_THROTTLE_IP_HEADER to the header the proxy fills in (e.g.
+# HTTP_X_FORWARDED_FOR) and LOGIN_THROTTLE_PROXY_COUNT to the number of
+# proxies that append to it. Only do so behind such a proxy; otherwise
+# clients can send the header themselves and pick their own address.
+#
+# The counters live in the default cache. With a per-process one each worker
+# counts separately, so N workers would allow N times the limits; it is
+# refused outside DEBUG (see Cache above).
+if NEEDS_SHARED_CACHE:
+    raise ImproperlyConfigured(
+        "Login throttling needs a cache shared by all workers; set CACHE_DIR, "
+        "or SINGLE_PROCESS=1 if the site runs in a single process."
+    )
+LOGIN_THROTTLE_WINDOW = int(os.environ.get('LOGIN_THROTTLE_WINDOW', 300))
+LOGIN_THROTTLE_ACCOUNT_ATTEMPTS = int(os.environ.get('LOGIN_THROTTLE_ACCOUNT_ATTEMPTS', 5))
+LOGIN_THROTTLE_ACCOUNT_TOTAL_ATTEMPTS = int(os.environ.get('LOGIN_THROTTLE_ACCOUNT_TOTAL_ATTEMPTS', 50))
+LOGIN_THROTTLE_IP_ATTEMPTS = int(os.environ.get('LOGIN_THROTTLE_IP_ATTEMPTS', 500))
+LOGIN_THROTTLE_IP_HEADER = os.environ.get('LOGIN_THROTTLE_IP_HEADER', 'REMOTE_ADDR')
+LOGIN_THROTTLE_PROXY_COUNT = int(os.environ.get('LOGIN_THROTTLE_PROXY_COUNT', 1))
+# Hasher for student and department passwords (any PASSWORD_HASHERS algorithm)
+CREDENTIAL_HASHER = os.environ.get('CREDENTIAL_HASHER', 'scrypt')
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
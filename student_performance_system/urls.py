@@ -2,7 +2,7 @@
 
 from django.contrib import admin
 from django.urls import path, re_path # Make sure re_path is imported
-from performance_monitoring import views # Import the entire views module
+from performance_monitoring import api, views # Import the entire views module
 
 urlpatterns = [
     path('', views.home, name='home'),
@@ -20,11 +20,23 @@ urlpatterns = [
     path('department/login/', views.admin_department_login, name='admin_department_login'),
     # Department Dashboard (after successful login)
     path('department/dashboard/', views.department_dashboard, name='department_dashboard'),
+    # JSON pages for the department dashboard student table
+    path('department/students/search/', views.department_student_search, name='department_student_search'),
+    # Grade distributions, pass rates and CGPA percentiles (optionally ?semester=<id>)
+    path('department/analytics/', views.department_analytics, name='department_analytics'),
+    # Department result sheet export (CSV by default, ?format=xlsx for Excel)
+    path('department/results/export/', views.export_results, name='export_results'),
 
     # Student Performance Report URL (requires student_id and allows slashes)
     # This URL should be linked from the student dashboard or department dashboard
     re_path(r'^student_report/(?P<student_id>.+)/$', views.student_performance_report, name='student_performance_report'),
+    # Chart series for both transcript pages (columnar JSON, cached by data version)
+    re_path(r'^student_chart/(?P<student_id>.+)/$', views.student_chart_data, name='student_chart_data'),
     
+    # Async JSON API (numbers only, for the mobile client)
+    re_path(r'^api/students/(?P<student_id>.+)/transcript/?$', api.student_transcript, name='api_student_transcript'),
+    path('api/departments/<int:department_id>/summary', api.department_summary, name='api_department_summary'),
+
     # Django Admin Site URL - always place this after your specific admin paths
     path('admin/', admin.site.urls), 
 ]
\ No newline at end of file